@@ -0,0 +1,142 @@
+"""定点整数金额管线：整列解析为 1/10000 单位的 int64，再格式化回规范字符串。
+
+快路径覆盖常见写法（可带正负号、千分位、空格、¥/￥，小数去尾零后至多 4 位，
+整数部分至多 14 位有效数字）；科学计数法、NaN、全角数字、超长文本等其余写法
+逐个回落到 parse_amount 的 Decimal 解析，结果与 _amount_to_str 逐字节一致。
+"""
+import numpy as np
+import pandas as pd
+
+from bank_converter import _amount_to_str, parse_amount
+
+
+SCALE_DIGITS = 4
+SCALE = 10 ** SCALE_DIGITS
+MAX_INT_DIGITS = 14  # 10**14 * SCALE 仍在 int64 范围内
+MAX_FAST_LEN = 40    # 更长的文本不进入快路径，避免定宽数组按最长值膨胀
+
+# 与 parse_amount 一致：这些值（strip 后）直接视为空
+EMPTY_TOKENS = ('', '-', '--', 'nan', 'None')
+# parse_amount 在解析前删除的字符
+_NOISE_CODES = tuple(ord(c) for c in ', ¥￥')
+
+_POW10 = 10 ** np.arange(SCALE_DIGITS + 1, dtype=np.int64)
+
+# 小数部分 0..9999 → '.5' / '.0123' / ''，格式化时查表
+_FRAC_TEXT = np.array(
+    [f'.{r:0{SCALE_DIGITS}d}'.rstrip('0') if r else '' for r in range(SCALE)]
+)
+
+
+def _char_codes(raw):
+    """object 文本数组 → (n, 宽度) 的 uint32 码位矩阵；超长文本置空。"""
+    lengths = np.fromiter(map(len, raw), dtype=np.int64, count=len(raw))
+    too_long = lengths > MAX_FAST_LEN
+    values = np.where(too_long, '', raw) if too_long.any() else raw
+    arr = np.asarray(values, dtype=str) if len(raw) else np.zeros(0, dtype='<U1')
+    if arr.dtype.itemsize == 0:
+        arr = arr.astype('<U1')
+    width = arr.dtype.itemsize // 4
+    return arr.view(np.uint32).reshape(len(arr), width), too_long
+
+
+def parse_amount_column(text):
+    """整列解析金额。text 为已 strip 的 object 文本列（空值为 ''）。
+
+    按字符列从左到右扫描一次（向量化覆盖所有行），同时完成去噪、符号/小数点
+    校验和定点累加，内存只与行数成正比。返回 dict：
+        mag    int64 绝对值（1/10000 单位）
+        neg    是否带负号（保留 '-0' 这类写法）
+        valid  是否为有效金额
+        exotic {行位置: Decimal}，快路径无法表示的值
+    """
+    raw = text.to_numpy(dtype=object)
+    n = len(raw)
+    empty = text.isin(EMPTY_TOKENS).to_numpy()
+    codes, too_long = _char_codes(raw)
+
+    ok = ~empty & ~too_long
+    neg = np.zeros(n, dtype=bool)
+    seen_kept = np.zeros(n, dtype=bool)
+    seen_dot = np.zeros(n, dtype=bool)
+    any_digit = np.zeros(n, dtype=bool)
+    int_val = np.zeros(n, dtype=np.int64)
+    int_sig = np.zeros(n, dtype=np.int8)
+    frac_val = np.zeros(n, dtype=np.int64)
+    frac_count = np.zeros(n, dtype=np.int8)
+
+    for j in range(codes.shape[1]):
+        c = codes[:, j]
+        active = c != 0
+        for code in _NOISE_CODES:
+            active &= c != code
+        digit = active & (c >= 48) & (c <= 57)
+        dot = active & (c == 46)
+        sign = active & ((c == 45) | (c == 43))
+        ok &= ~(active & ~digit & ~dot & ~sign)
+        ok &= ~(sign & seen_kept) & ~(dot & seen_dot)
+        neg |= sign & (c == 45) & ~seen_kept
+
+        d = c.astype(np.int64) - 48
+        int_d = digit & ~seen_dot
+        int_sig += (int_d & ((int_val > 0) | (d > 0))).astype(np.int8)
+        ok &= int_sig <= MAX_INT_DIGITS
+        int_val = np.where(int_d & ok, int_val * 10 + d, int_val)
+
+        frac_d = digit & seen_dot
+        frac_count += frac_d.astype(np.int8)
+        in_scale = frac_d & (frac_count <= SCALE_DIGITS)
+        frac_val += np.where(in_scale, d * _POW10[SCALE_DIGITS - np.minimum(frac_count, SCALE_DIGITS)], 0)
+        ok &= ~(frac_d & ~in_scale & (d != 0))
+
+        any_digit |= digit
+        seen_dot |= dot
+        seen_kept |= active
+
+    fast = ok & any_digit
+    mag = np.where(fast, int_val * SCALE + frac_val, 0)
+    neg &= fast
+
+    valid = fast.copy()
+    exotic = {}
+    for pos in np.flatnonzero(~empty & ~fast):
+        d = parse_amount(raw[pos])
+        if d is not None:
+            exotic[int(pos)] = d
+            valid[pos] = True
+
+    return {'mag': mag, 'neg': neg, 'valid': valid, 'exotic': exotic}
+
+
+def amount_signs(amounts):
+    """返回 int8 数组：-1 / 0 / 1；无效金额记 0。"""
+    signs = np.where(amounts['mag'] > 0, np.where(amounts['neg'], -1, 1), 0).astype(np.int8)
+    signs[~amounts['valid']] = 0
+    for pos, d in amounts['exotic'].items():
+        signs[pos] = -1 if d < 0 else (1 if d > 0 else 0)
+    return signs
+
+
+def format_amount_column(amounts, index, mask=None, negate=False):
+    """格式化为 object 文本列；未选中（mask=False）或无效的位置为 ''。
+
+    negate=True 时先取反再格式化（signed_amount 借方取绝对值）。
+    """
+    select = amounts['valid'] if mask is None else (np.asarray(mask) & amounts['valid'])
+    out = np.full(len(index), '', dtype=object)
+
+    exotic_mask = np.zeros(len(index), dtype=bool)
+    exotic_mask[list(amounts['exotic'])] = True
+    fast = select & ~exotic_mask
+    if fast.any():
+        mag = amounts['mag'][fast]
+        neg = amounts['neg'][fast] ^ negate
+        text = np.char.add((mag // SCALE).astype(str), _FRAC_TEXT[mag % SCALE])
+        text = np.where(neg, np.char.add('-', text), text)
+        out[fast] = text.tolist()
+
+    for pos, d in amounts['exotic'].items():
+        if select[pos]:
+            out[pos] = _amount_to_str(-d if negate else d)
+
+    return pd.Series(out, index=index, dtype=object)
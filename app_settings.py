@@ -0,0 +1,63 @@
+"""用户配置 settings.json：与 last_choice.json 同在程序目录，缺省项取默认值。
+
+文件不存在或格式错误时全部按默认值处理，不影响启动。
+"""
+import json
+import os
+import sys
+
+
+if getattr(sys, 'frozen', False):
+    BASE_DIR = os.path.dirname(sys.executable)
+else:
+    BASE_DIR = os.getcwd()
+
+SETTINGS_FILE = os.path.join(BASE_DIR, 'settings.json')
+
+DEFAULT_SETTINGS = {
+    # 表格读取后端：auto（大 xlsx 用 calamine，其余 openpyxl，xls 用 xlrd）/ calamine / openpyxl / xlrd
+    'reader_backend': 'auto',
+    # 批量转换并行进程数：0 = CPU 核数 - 1
+    'batch_jobs': 0,
+    # 完整日志目录（相对程序目录）；为空时不写日志文件
+    'log_dir': 'logs',
+    # 转换结果缓存目录（相对程序目录，如 cache）；默认为空不缓存（缓存文件含流水明细）
+    'cache_dir': '',
+    # 缓存总大小上限（MB），超出时按最近最少使用淘汰
+    'cache_max_mb': 512,
+    # 默认输出格式：xlsx / csv（UTF-8）/ csv_gbk / parquet（需 pyarrow）
+    'output_format': 'xlsx',
+    # xlsx 每个工作表最多写出的数据行数：0 = Excel 上限（1048575）
+    'xlsx_max_rows': 0,
+    # 超出时滚动到：sheet 同一文件的新工作表 / file 新的编号文件（_part2、_part3…）
+    'xlsx_rollover': 'sheet',
+    # 批量合并查重：off 不查重 / flag 保留并另写重复交易清单 / drop 剔除重复交易
+    'dedup_mode': 'flag',
+    # 同时对照以往已导入的交易（每个源文件首次合并成功后记入导入历史）；false 只查本批内重复
+    'dedup_history': False,
+    # 导入历史的指纹索引（SQLite，相对程序目录）
+    'dedup_index': 'txn_index.sqlite',
+    # 性能分析：true 时每次转换在 cProfile 下运行，统计写到 <log_dir>/profile/
+    'profile': False,
+    # 内存跟踪：true 时按阶段记录峰值内存（tracemalloc + RSS 采样，会明显变慢）
+    'memory_tracking': False,
+    # 内存预算（MB）：批量转换预计峰值超出时提示；0 = 物理内存的一半
+    'memory_budget_mb': 0,
+}
+
+
+def load_settings():
+    """读取 settings.json 并与默认值合并。"""
+    settings = dict(DEFAULT_SETTINGS)
+    try:
+        with open(SETTINGS_FILE, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            settings.update(data)
+    except Exception:
+        pass
+    return settings
+
+
+def get_setting(key):
+    return load_settings().get(key, DEFAULT_SETTINGS.get(key))
@@ -8,6 +8,9 @@
     apply_apple_theme(root)
     ctk.CTkButton(root, text='转换', font=font_ui(13, 'bold'), **BUTTON_PRIMARY).pack()
 """
+import json
+import os
+import sys
 from tkinter import font as tkfont, ttk
 
 import customtkinter as ctk
@@ -109,15 +112,51 @@ _FONT_MONO_CANDIDATES = ['Cascadia Code', 'JetBrains Mono', 'Consolas', 'Courier
 _font_ui_family = 'Microsoft YaHei UI'
 _font_mono_family = 'Consolas'
 
+# 字体检测结果缓存：枚举系统字体较慢，之后的启动直接复用（候选列表或平台变化时重新检测）
+FONT_CACHE_FILE = 'font_cache.json'
 
-def _pick_font(candidates):
-    available = set(tkfont.families())
+
+def _pick_font(candidates, available=None):
+    if available is None:
+        available = set(tkfont.families())
     for name in candidates:
         if name in available:
             return name
     return candidates[-1]
 
 
+def _font_cache_path():
+    from app_settings import BASE_DIR
+    return os.path.join(BASE_DIR, FONT_CACHE_FILE)
+
+
+def _font_cache_key():
+    return [sys.platform, _FONT_UI_CANDIDATES, _FONT_MONO_CANDIDATES]
+
+
+def _pick_fonts_cached():
+    """返回 (主字体, 等宽字体)；优先读缓存，未命中时枚举系统字体并写回缓存。"""
+    path = _font_cache_path()
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+        if cached.get('key') == _font_cache_key():
+            return cached['ui'], cached['mono']
+    except Exception:
+        pass
+
+    available = set(tkfont.families())
+    ui = _pick_font(_FONT_UI_CANDIDATES, available)
+    mono = _pick_font(_FONT_MONO_CANDIDATES, available)
+    try:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'key': _font_cache_key(), 'ui': ui, 'mono': mono},
+                      f, ensure_ascii=False)
+    except OSError:
+        pass
+    return ui, mono
+
+
 def font_ui(size=12, weight='normal'):
     """主字体（用于 ctk 控件）。必须在 apply_apple_theme 之后调用。"""
     return ctk.CTkFont(family=_font_ui_family, size=size, weight=weight)
@@ -163,8 +202,7 @@ def apply_apple_theme(root):
     ctk.set_appearance_mode('light')
     ctk.set_default_color_theme('blue')
 
-    _font_ui_family = _pick_font(_FONT_UI_CANDIDATES)
-    _font_mono_family = _pick_font(_FONT_MONO_CANDIDATES)
+    _font_ui_family, _font_mono_family = _pick_fonts_cached()
 
     try:
         root.configure(fg_color=WINDOW_BG)
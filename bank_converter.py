@@ -1,27 +1,21 @@
-"""银行流水转换：核心逻辑 + 单文件窗口 + 批量混合窗口（苹果风 UI）。"""
+"""银行流水转换：核心逻辑 + 单文件窗口 + 批量混合窗口（苹果风 UI）。
+
+tkinter / customtkinter / apple_theme 只在窗口函数中导入，命令行（cli.py）
+使用核心逻辑时不需要图形界面环境。
+"""
 import json
 import os
-import re
 import sys
 from datetime import datetime
 from decimal import Decimal
-from tkinter import filedialog, ttk
 
-import customtkinter as ctk
 import pandas as pd
 
-from apple_theme import (
-    font_ui, font_title, font_mono,
-    BUTTON_PRIMARY, BUTTON_SECONDARY, BUTTON_PLAIN,
-    CARD_STYLE, ENTRY_STYLE, TEXTBOX_STYLE,
-    BLUE, RED, GREEN, ORANGE,
-    TEXT_PRIMARY, TEXT_SECONDARY, HOVER_BG,
-    WINDOW_BG, CARD_BG,
-    show_banner, ask_yes_no, transparent_frame,
-)
+from log_sink import configured_log_path, create_log_sink
+from task_runner import TaskCancelled, cancel_task, check_cancel, start_task
 from utils import (
-    build_unique_save_path, center_window, make_searchable_combobox,
-    open_folder, sanitize_filename_part,
+    build_unique_save_path, center_window, make_output_format_combobox,
+    make_searchable_combobox, open_folder, sanitize_filename_part,
 )
 
 
@@ -41,16 +35,25 @@ BANK_RULES_FILE = os.path.join(
 LAST_CHOICE_FILE = os.path.join(_BASE_DIR, 'last_choice.json')
 BANK_BUTTON_HEIGHT = 36
 BANK_ACTION_BUTTON_HEIGHT = 36
+# 批量并行转换时工作线程检查子进程结果/取消请求的间隔（毫秒）
+BATCH_POLL_MS = 100
+
+# 批量列表中按表头识别银行期间的状态，以及识别不出时的银行占位
+DETECTING = '识别中...'
+UNKNOWN_BANK = '未识别'
 
 
 def bank_button_style(style, height=BANK_BUTTON_HEIGHT):
     return dict(style, height=height)
 
 
-def build_timestamped_save_path(directory, filename):
+def build_timestamped_save_path(directory, filename, ext='.xlsx'):
+    """filename 末尾的 .xlsx / .csv / .parquet 会去掉，其余的点原样保留（如 2024.Q1）。"""
+    from table_writer import strip_output_extension
+
     timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
-    filename = sanitize_filename_part(os.path.splitext(filename)[0])
-    return build_unique_save_path(directory, f'{filename}_{timestamp}')
+    filename = sanitize_filename_part(strip_output_extension(filename))
+    return build_unique_save_path(directory, f'{filename}_{timestamp}', ext)
 
 
 # 统一模板表头（27 列，严格匹配后端 ImportBankDetailDTO.getHeadList()）
@@ -63,6 +66,10 @@ BANK_TEMPLATE_HEADERS = [
     '起息日', '借/贷金额',
 ]
 
+# 转换引擎：columnar = 整列向量化（默认），row = 逐行（对照用）
+BANK_ENGINES = ('columnar', 'row')
+DEFAULT_ENGINE = 'columnar'
+
 # 文件名 → 银行类型 关键字映射（按 key 长度倒序匹配，避免「中行」吞掉「中信」）
 BANK_FILENAME_KEYWORDS = {
     '招商银行': '招商银行', '招商': '招商银行', 'CMB': '招商银行',
@@ -83,20 +90,42 @@ BANK_FILENAME_KEYWORDS = {
 
 # ---------------- 配置加载 ----------------
 
-def load_bank_rules(banner_area=None):
-    """加载银行规则配置。失败时通过 banner 提示并返回空字典。"""
+def read_bank_rules(rules_file=None):
+    """读取银行规则配置（见 rule_registry，文件未修改时不重读），不涉及界面。
+
+    rules_file 缺省为 BANK_RULES_FILE，不存在时再找本模块同目录的 bank_rules.json。
+    返回 (rules, errors)：errors 为被跳过的个别银行规则的错误说明；
+    文件不存在时抛出 FileNotFoundError，格式错误时抛出原异常。
+    """
+    from rule_registry import get_rules
+
+    if not rules_file:
+        rules_file = BANK_RULES_FILE
+        if not os.path.exists(rules_file):
+            rules_file = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                      'bank_rules.json')
+    return get_rules(rules_file)
+
+
+def load_bank_rules(banner_area=None, rules_file=None):
+    """界面用：read_bank_rules 加 banner 提示。失败时提示并返回空字典；
+    个别银行规则有误时提示错误并跳过这些银行。banner_area 为 None 时不提示。
+    """
     try:
-        with open(BANK_RULES_FILE, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        return {k: v for k, v in data.items() if not k.startswith('_')}
-    except FileNotFoundError:
-        if banner_area is not None:
-            show_banner(banner_area, f'未找到银行规则文件: {BANK_RULES_FILE}', 'error', duration=0)
-        return {}
+        rules, errors = read_bank_rules(rules_file)
+    except FileNotFoundError as e:
+        message, rules, errors = f'未找到银行规则文件: {e.filename}', {}, []
     except Exception as e:
-        if banner_area is not None:
-            show_banner(banner_area, f'加载银行规则失败: {e}', 'error', duration=0)
-        return {}
+        message, rules, errors = f'加载银行规则失败: {e}', {}, []
+    else:
+        message = ''
+        if errors:
+            more = f'（另有 {len(errors) - 3} 处）' if len(errors) > 3 else ''
+            message = '银行规则有误，已跳过：' + '；'.join(errors[:3]) + more
+    if message and banner_area is not None:
+        from apple_theme import show_banner
+        show_banner(banner_area, message, 'warning' if rules else 'error', duration=0)
+    return rules
 
 
 def load_last_choice():
@@ -129,17 +158,31 @@ def guess_bank_by_filename(filename, available_banks):
 
 # ---------------- 转换核心（业务逻辑，UI 无关） ----------------
 
+def _bank_log_level(msg):
+    if '失败' in msg or '错误' in msg or '异常' in msg:
+        return 'error'
+    if '跳过' in msg or '警告' in msg:
+        return 'warning'
+    if '成功' in msg or '完成' in msg:
+        return 'success'
+    return None
+
+
 def _bank_log(log_widget, msg):
-    """日志输出，按内容自动染色。"""
+    """日志输出，按内容自动染色。
+
+    log_widget 为 list 时只收集文本（子进程中使用）；为函数时直接调用
+    （工作线程中把日志作为事件转交 Tk 线程）。
+    """
     if log_widget is None:
         return
-    level = None
-    if '失败' in msg or '错误' in msg or '异常' in msg:
-        level = 'error'
-    elif '跳过' in msg or '警告' in msg:
-        level = 'warning'
-    elif '成功' in msg or '完成' in msg:
-        level = 'success'
+    if isinstance(log_widget, list):
+        log_widget.append(msg)
+        return
+    if callable(log_widget):
+        log_widget(msg)
+        return
+    level = _bank_log_level(msg)
 
     line = msg + '\n'
     try:
@@ -178,38 +221,66 @@ def _amount_to_str(d):
     return s or '0'
 
 
-def extract_account_info(file_path, rule):
-    """从顶部行/单元格提取账户信息。"""
-    extract_cfg = rule.get('account_extract')
-    if not extract_cfg:
-        return {}
+def _account_cell_addresses(rule):
+    from rule_registry import compiled_rule
+    return compiled_rule(rule)['account_cells']
+
+
+def parse_account_info(cells, rule):
+    """按 account_extract（已预编译）从读出的 {单元格地址: 值} 中提取账户信息。"""
+    from rule_registry import compiled_rule
 
-    from openpyxl import load_workbook
     try:
-        wb = load_workbook(file_path, data_only=True, read_only=True)
-        ws = wb.worksheets[0]
         result = {}
-        for tpl_field, spec in extract_cfg.items():
-            cell_addr = spec.get('cell')
-            if not cell_addr:
-                continue
-            raw = ws[cell_addr].value
+        for tpl_field, cell_addr, strip, pattern in compiled_rule(rule)['account']:
+            raw = cells.get(cell_addr)
             if raw is None:
                 continue
             text = str(raw)
-            if spec.get('strip', False):
+            if strip:
                 text = text.strip().strip('\t').strip()
-            if spec.get('mode', 'cell') == 'regex':
-                m = re.search(spec.get('pattern', ''), text)
+            if pattern is not None:
+                m = pattern.search(text)
                 if m and m.groups():
                     text = m.group(1).strip()
             result[tpl_field] = text
-        wb.close()
         return result
     except Exception:
         return {}
 
 
+def extract_account_info(file_path, rule):
+    """从顶部行/单元格提取账户信息。"""
+    if not rule.get('account_extract'):
+        return {}
+
+    from source_reader import close_source, open_source, read_cells
+    source = open_source(file_path)
+    try:
+        return parse_account_info(read_cells(source, _account_cell_addresses(rule)), rule)
+    finally:
+        close_source(source)
+
+
+def read_bank_source(file_path, rule, nrows=None, metrics=None):
+    """打开一次源文件，返回 (df, account_info)；df 已去掉空表头列并 strip 列名。
+
+    读表失败时抛出原异常；metrics 为 stage_metrics 记录时计入 read / account 两个阶段。
+    """
+    from source_reader import read_source
+    from stage_metrics import file_size, stage
+
+    with stage(metrics, 'read', nbytes=file_size(file_path)) as s:
+        df, cells = read_source(file_path, rule.get('header_row', 1),
+                                _account_cell_addresses(rule), nrows=nrows)
+        df = df.loc[:, df.columns.notna()]
+        df.columns = [str(c).strip() for c in df.columns]
+        s['rows'] = len(df)
+    with stage(metrics, 'account'):
+        account_info = parse_account_info(cells, rule)
+    return df, account_info
+
+
 def _get_cell(row, col_name):
     if col_name is None:
         return None
@@ -354,102 +425,542 @@ def _transform_one_row(row, rule, account_info, bank_type_code):
     return out
 
 
-def convert_bank_rows(file_path, rule, log_widget=None):
-    """读取并转换一个文件，返回 (rows_list, skipped_count, error_msg)。"""
+def _transform_rows(df, rule, account_info, bank_type_code):
+    """逐行实现：返回 (rows_list, skipped_index)。"""
+    rows_out = []
+    skipped_index = []
+    for idx, row in df.iterrows():
+        out = _transform_one_row(row, rule, account_info, bank_type_code)
+        if not out['交易后余额'] or not out['交易日期']:
+            skipped_index.append(idx)
+            continue
+        rows_out.append(out)
+    return rows_out, skipped_index
+
+
+def convert_bank_rows(file_path, rule, log_widget=None, engine=DEFAULT_ENGINE, metrics=None,
+                      cancel=None):
+    """读取并转换一个文件，返回 (rows_list, skipped_count, error_msg)。
+
+    engine: 'columnar' 按列向量化执行（bank_engine）；'row' 逐行执行，
+    两者输出一致，保留 'row' 便于对照排查。
+    metrics 为 stage_metrics 记录时计入读取、账户信息、转换各阶段（分析模式下另按字段计时）。
+    cancel（threading.Event）在读完、转换前检查，已取消时抛出 TaskCancelled。
+    """
+    from stage_metrics import stage
+
+    if engine not in BANK_ENGINES:
+        return [], 0, f'未知转换引擎: {engine}'
+    header_row = rule.get('header_row', 1)
     try:
-        header_row = rule.get('header_row', 1)
-        df = pd.read_excel(file_path, sheet_name=0,
-                           header=header_row - 1, dtype=str)
+        df, account_info = read_bank_source(file_path, rule, metrics=metrics)
     except Exception as e:
         return [], 0, f'读取失败: {e}'
 
-    df = df.loc[:, df.columns.notna()]
-    df.columns = [str(c).strip() for c in df.columns]
     _bank_log(log_widget, f'  共 {len(df)} 行待处理')
-
-    account_info = extract_account_info(file_path, rule)
     if account_info:
         _bank_log(log_widget, f'  顶部账户信息: {account_info}')
 
-    bank_type_code = rule.get('bank_type_code', '')
-    rows_out = []
-    skipped = 0
+    check_cancel(cancel)
+    with stage(metrics, 'transform') as s:
+        if engine == 'row':
+            bank_type_code = rule.get('bank_type_code', '')
+            rows_out, skipped_index = _transform_rows(df, rule, account_info, bank_type_code)
+        else:
+            from bank_engine import transform_frame
+            from rule_registry import compiled_rule
+            out_df, skipped_index = transform_frame(
+                df, compiled_rule(rule), account_info,
+                metrics.get('fields') if metrics is not None else None)
+            rows_out = out_df.to_dict('records')
+        s['rows'] = len(rows_out)
+
+    for idx in skipped_index:
+        _bank_log(log_widget,
+                  f'  跳过第 {idx + header_row + 1} 行：余额或交易日期为空')
+
+    return rows_out, len(skipped_index), ''
+
+
+def convert_bank_chunks(file_path, rule, log_widget=None, stats=None,
+                        chunk_rows=None, cancel=None, metrics=None):
+    """流式转换：分块读取、转换，逐块产出输出 DataFrame（列为 BANK_TEMPLATE_HEADERS）。
+
+    与 convert_bank_rows（columnar）逐行一致，跳过规则和日志相同；内存只与块大小有关。
+    stats 为 dict 时累计 'rows' / 'skipped'。读取失败时抛出原异常；
+    cancel（threading.Event）被置位后在下一块开始前抛出 TaskCancelled。
+    读与写交错进行，不分阶段计时；metrics 只用于分析模式下按字段累计转换耗时。
+    """
+    from bank_engine import transform_frame
+    from rule_registry import compiled_rule
+    from source_reader import (CHUNK_ROWS, close_source, iter_table_chunks,
+                               open_source, read_cells)
+
+    if stats is None:
+        stats = {}
+    stats.setdefault('rows', 0)
+    stats.setdefault('skipped', 0)
+    header_row = rule.get('header_row', 1)
+    plan = compiled_rule(rule)
+
+    source = open_source(file_path, streaming=True)
+    try:
+        account_info = parse_account_info(
+            read_cells(source, _account_cell_addresses(rule)), rule)
+        if account_info:
+            _bank_log(log_widget, f'  顶部账户信息: {account_info}')
+
+        for df in iter_table_chunks(source, header_row, chunk_rows or CHUNK_ROWS):
+            check_cancel(cancel)
+            df = df.loc[:, df.columns.notna()]
+            df.columns = [str(c).strip() for c in df.columns]
+            out_df, skipped_index = transform_frame(
+                df, plan, account_info,
+                metrics.get('fields') if metrics is not None else None)
+            for idx in skipped_index:
+                _bank_log(log_widget,
+                          f'  跳过第 {idx + header_row + 1} 行：余额或交易日期为空')
+            stats['rows'] += len(out_df)
+            stats['skipped'] += len(skipped_index)
+            _bank_log(log_widget, f'  已处理 {df.index[-1] + 1} 行')
+            yield out_df
+    finally:
+        close_source(source)
+
+
+def _write_bank_rows(rows, save_path, fast=False, fmt='xlsx', parts=None):
+    """把 rows 按 BANK_TEMPLATE_HEADERS 列序流式写出，所有数据按文本，返回写出行数。
+
+    fmt 见 table_writer.OUTPUT_FORMATS；fast=True 时降低压缩率：文件略大，写出更快。
+    xlsx 超过单表行数上限时滚动到新工作表/文件，各部分记入 parts（见 write_text_table）。
+    """
+    from table_writer import write_text_table
+
+    return write_text_table(
+        save_path, BANK_TEMPLATE_HEADERS,
+        ([r.get(h, '') for h in BANK_TEMPLATE_HEADERS] for r in rows),
+        fmt=fmt, fast=fast, parts=parts,
+    )
 
-    for idx, row in df.iterrows():
-        out = _transform_one_row(row, rule, account_info, bank_type_code)
-        if not out['交易后余额'] or not out['交易日期']:
-            skipped += 1
-            _bank_log(log_widget,
-                      f'  跳过第 {idx + header_row + 1} 行：余额或交易日期为空')
-            continue
-        rows_out.append(out)
 
-    return rows_out, skipped, ''
+def _write_bank_chunks(chunks, save_path, fast=False, fmt='xlsx', parts=None):
+    """把 convert_bank_chunks 产出的各块依次流式写入同一个文件，返回写出行数。"""
+    from table_writer import write_text_table
+
+    return write_text_table(
+        save_path, BANK_TEMPLATE_HEADERS,
+        (values for df in chunks for values in df.itertuples(index=False, name=None)),
+        fmt=fmt, fast=fast, parts=parts,
+    )
+
+
+def _log_parts(log_widget, parts, sources):
+    """输出超过单表上限、分多部分写出时的分部索引。"""
+    from table_writer import describe_parts
+
+    lines = describe_parts(parts, sources)
+    if lines:
+        _bank_log(log_widget, f'  超过单表行数上限，分 {len(parts)} 部分写出：')
+        for line in lines:
+            _bank_log(log_widget, line)
+
+
+def _remove_partial_files(save_path, parts):
+    """删除未完成的输出：save_path 及已写出的各分部文件。"""
+    from table_writer import remove_outputs
+
+    remove_outputs(save_path, parts)
+
+
+def _bank_save_path(file_path, bank_name, save_dir_path, fmt):
+    from table_writer import format_extension
+
+    file_name = os.path.splitext(os.path.basename(file_path))[0]
+    return build_timestamped_save_path(
+        save_dir_path, f'{file_name}_{bank_name}_统一格式', format_extension(fmt)
+    )
+
+
+def _new_file_result(file_path, bank_name):
+    """单文件转换结果 dict。
+
+    status 取 ok / failed / empty / cancelled；output 为输出文件，
+    parts 为各分部 [{'path', 'sheet', 'rows'}]（仅成功时）。
+    """
+    return {'file': file_path, 'bank': bank_name, 'rows': 0, 'skipped': 0,
+            'status': 'ok', 'error': '', 'output': '', 'parts': []}
 
 
-def _write_bank_xlsx(rows, save_path):
-    """把 rows 写入指定 xlsx，所有单元格按文本格式。"""
-    from openpyxl import load_workbook
-    from openpyxl.styles import numbers
+def _file_failed(result, log_widget, error, status='failed', save_path=None, parts=None):
+    """记录失败（或取消）并删除未完成的输出，返回 result。"""
+    if save_path is not None:
+        _remove_partial_files(save_path, parts)
+    result.update(status=status, error=error)
+    _bank_log(log_widget, f'  {error}')
+    return result
 
-    out_df = pd.DataFrame(rows, columns=BANK_TEMPLATE_HEADERS)
-    out_df.to_excel(save_path, index=False, sheet_name='Sheet1', engine='openpyxl')
-    wb = load_workbook(save_path)
-    ws = wb.active
-    for r in ws.iter_rows(min_row=2, max_row=ws.max_row, min_col=1, max_col=ws.max_column):
-        for cell in r:
-            cell.number_format = numbers.FORMAT_TEXT
-    wb.save(save_path)
-    wb.close()
+
+def _file_written(result, log_widget, save_path, parts):
+    """写出结束：无有效行时删除空输出、记为 empty，否则记录输出路径和分部，返回 result。"""
+    if not result['rows']:
+        _remove_partial_files(save_path, parts)
+        result['status'] = 'empty'
+        _bank_log(log_widget, '  无有效数据行，未生成文件')
+        return result
+
+    result['output'] = save_path
+    result['parts'] = [{'path': path, 'sheet': sheet, 'rows': count}
+                       for path, sheet, count in parts]
+    _log_parts(log_widget, parts, [(os.path.basename(result['file']), result['rows'])])
+    _bank_log(log_widget,
+              f'  完成：输出 {result["rows"]} 行，跳过 {result["skipped"]} 行 → {save_path}')
+    return result
 
 
-def convert_bank_file(file_path, bank_name, rule, save_dir_path, log_widget):
-    """单文件转换。成功返回 True。"""
+def convert_bank_file_streaming(file_path, bank_name, rule, save_dir_path, log_widget,
+                                cancel=None, fmt='xlsx', metrics=None, fast=False):
+    """单文件流式转换（超大文件用）：边读边写，内存占用与行数无关。返回结果 dict（见
+    _new_file_result）。
+
+    读写交错，metrics 中只记一个 stream 阶段（行数为输出行数，字节数为源文件大小）。
+    """
+    from stage_metrics import file_size, stage
+
+    result = _new_file_result(file_path, bank_name)
+    _bank_log(log_widget, f'开始流式处理 [{bank_name}] {file_path}')
+    save_path = _bank_save_path(file_path, bank_name, save_dir_path, fmt)
+
+    stats = {}
+    parts = []
+    try:
+        with stage(metrics, 'stream', nbytes=file_size(file_path)) as s:
+            written = _write_bank_chunks(
+                convert_bank_chunks(file_path, rule, log_widget, stats, cancel=cancel,
+                                    metrics=metrics),
+                save_path, fast=fast, fmt=fmt, parts=parts)
+            s['rows'] = written
+    except TaskCancelled:
+        return _file_failed(result, log_widget, '已取消，未生成文件', 'cancelled',
+                            save_path, parts)
+    except PermissionError:
+        return _file_failed(result, log_widget, f'保存失败：{save_path} 被占用，请关闭后重试',
+                            save_path=save_path, parts=parts)
+    except Exception as e:
+        return _file_failed(result, log_widget, f'转换失败: {e}',
+                            save_path=save_path, parts=parts)
+
+    result.update(rows=written, skipped=stats.get('skipped', 0))
+    return _file_written(result, log_widget, save_path, parts)
+
+
+def convert_bank_file(file_path, bank_name, rule, save_dir_path, log_widget,
+                      stream=False, cancel=None, fmt='xlsx', profile=None, memory=None,
+                      fast=False):
+    """单文件转换，界面和命令行共用。返回结果 dict（见 _new_file_result），
+    metrics 为本次的 stage_metrics 记录。stream=True 时走 convert_bank_file_streaming。
+
+    log_widget 为日志文本框或任意可调用对象（见 _bank_log）；
+    cancel（threading.Event）被置位时在读完、转换和写出前停止，status 为 cancelled；
+    fmt 为输出格式（见 table_writer），fast=True 时降低压缩率以加快写出。
+    各阶段耗时在结束时汇总到日志并追加到 metrics.jsonl；profile 为是否做性能分析
+    （见 stage_metrics），memory 为是否按阶段记录峰值内存（见 memory_meter），
+    缺省分别按 settings.json 的 profile / memory_tracking。
+    """
+    from memory_meter import tracked, tracking_enabled
+    from stage_metrics import new_record, profiled, profiling_enabled, save_records
+
+    enabled = profiling_enabled(profile)
+    record = new_record('bank', file_path, profile=enabled, bank=bank_name, format=fmt,
+                        stream=stream)
+    with tracked(tracking_enabled(memory)), \
+            profiled(f'{bank_name}_{os.path.basename(file_path)}', enabled, record):
+        if stream:
+            result = convert_bank_file_streaming(file_path, bank_name, rule, save_dir_path,
+                                                 log_widget, cancel, fmt, record, fast)
+        else:
+            result = _convert_bank_file(file_path, bank_name, rule, save_dir_path, log_widget,
+                                        cancel, fmt, record, fast)
+    record['ok'] = result['status'] == 'ok'
+    _log_metrics(log_widget, record)
+    save_records([record])
+    result['metrics'] = record
+    return result
+
+
+def _log_metrics(log_widget, record):
+    from stage_metrics import summary_lines
+
+    for line in summary_lines(record):
+        _bank_log(log_widget, line)
+
+
+def _convert_bank_file(file_path, bank_name, rule, save_dir_path, log_widget,
+                       cancel, fmt, record, fast=False):
+    """convert_bank_file 的非流式部分：整表读入、转换（经缓存）、写出。"""
+    from conversion_cache import convert_bank_rows_cached
+    from stage_metrics import output_size, stage
+
+    result = _new_file_result(file_path, bank_name)
     _bank_log(log_widget, f'开始处理 [{bank_name}] {file_path}')
 
-    rows, skipped, err = convert_bank_rows(file_path, rule, log_widget)
+    try:
+        rows, skipped, err = convert_bank_rows_cached(file_path, rule, log_widget, record,
+                                                      cancel)
+        check_cancel(cancel)
+    except TaskCancelled:
+        return _file_failed(result, log_widget, '已取消，未生成文件', 'cancelled')
     if err:
-        _bank_log(log_widget, f'  {err}')
-        return False
+        return _file_failed(result, log_widget, err)
+    result.update(rows=len(rows), skipped=skipped)
     if not rows:
+        result['status'] = 'empty'
         _bank_log(log_widget, '  无有效数据行，未生成文件')
-        return False
-
-    file_name = os.path.splitext(os.path.basename(file_path))[0]
-    save_path = build_timestamped_save_path(
-        save_dir_path, f'{file_name}_{bank_name}_统一格式'
-    )
+        return result
 
+    save_path = _bank_save_path(file_path, bank_name, save_dir_path, fmt)
+    parts = []
     try:
-        _write_bank_xlsx(rows, save_path)
+        with stage(record, 'write', rows=len(rows)) as s:
+            _write_bank_rows(rows, save_path, fast=fast, fmt=fmt, parts=parts)
+            s['bytes'] = output_size(parts)
     except PermissionError:
-        _bank_log(log_widget, f'  保存失败：{save_path} 被占用，请关闭后重试')
-        return False
+        return _file_failed(result, log_widget, f'保存失败：{save_path} 被占用，请关闭后重试',
+                            save_path=save_path, parts=parts)
     except Exception as e:
-        _bank_log(log_widget, f'  保存失败: {e}')
-        return False
+        return _file_failed(result, log_widget, f'保存失败: {e}',
+                            save_path=save_path, parts=parts)
+
+    return _file_written(result, log_widget, save_path, parts)
+
+
+def _run_batch(task, items, save_dir_path, out_name, fast=False, workers=None,
+               dedup=None, fmt='xlsx', profile=None, memory=None, dedup_history=None):
+    """批量转换的工作线程部分：进程池并行转换、按列表顺序合并（查重）、写出。
+
+    items: [(iid, 序号, 文件名, 银行, 路径, 规则), ...]。每个文件完成时发
+    'file_finished' 事件 (iid, 行数, 跳过数, 错误, 日志行)，日志行末尾附该文件的
+    阶段耗时；取消时在文件之间抛出 TaskCancelled。返回结果 dict，status 取
+    ok / failed / empty / save_failed，duplicates 为查出的重复交易数，duplicates_path 为
+    flag 模式下另写的重复交易清单（无重复时为 ''），metrics 为整批的
+    stage_metrics 记录（并行转换、合并查重、写出）。有文件转换失败时等全部文件转换完，
+    返回 failed（不写出）：failures 按列表顺序列出全部失败的 (文件名, 错误)，
+    file / error 为其中第一个。
+    workers 为进程池大小，缺省按 settings.json 的 batch_jobs；dedup 为查重模式
+    （见 txn_index），dedup_history 为是否对照并记录导入历史，缺省分别按 settings.json 的
+    dedup_mode / dedup_history；fmt 为输出格式（见 table_writer）；
+    profile 为是否做性能分析、memory 为是否按阶段记录峰值内存，缺省按 settings.json 的
+    profile / memory_tracking。开始前按源文件大小估算峰值内存，超出 memory_budget_mb 时
+    先发一条警告日志（见 memory_meter）。
+    各文件和整批的记录在结束时（含失败、取消）追加到 metrics.jsonl。
+    """
+    from app_settings import get_setting
+    from batch_pool import batch_workers
+    from memory_meter import check_batch_budget, estimate_batch_peak, tracked, tracking_enabled
+    from stage_metrics import new_record, profiled, profiling_enabled, save_records
+
+    dedup = dedup or get_setting('dedup_mode')
+    if dedup_history is None:
+        dedup_history = bool(get_setting('dedup_history'))
+    paths = [item[4] for item in items]
+    warning = check_batch_budget(paths, workers or batch_workers())
+    if warning:
+        task['emit']('log', warning)
+
+    enabled = profiling_enabled(profile)
+    memory = tracking_enabled(memory)
+    record = new_record('batch', out_name, files=len(items), format=fmt,
+                        estimated_peak=estimate_batch_peak(paths, workers or batch_workers()))
+    file_records = []
+    try:
+        with tracked(memory), profiled(out_name, enabled, record):
+            result = _run_batch_stages(task, items, save_dir_path, out_name, fast, workers,
+                                       dedup, dedup_history, fmt, enabled, memory, record,
+                                       file_records)
+        record['status'] = result['status']
+        result['metrics'] = record
+        return result
+    finally:
+        save_records(file_records + [record])
 
-    _bank_log(log_widget,
-              f'  完成：输出 {len(rows)} 行，跳过 {skipped} 行 → {save_path}')
-    return True
+
+def _run_batch_stages(task, items, save_dir_path, out_name, fast, workers, mode, history,
+                      fmt, profile, memory, record, file_records):
+    from concurrent.futures import FIRST_COMPLETED, wait
+    from batch_pool import rows_from_result, submit_conversion
+    from stage_metrics import output_size, stage, summary_lines
+
+    results = {}
+    errors = {}
+    futures = {}
+    for item in items:
+        try:
+            futures[submit_conversion(item[4], item[5], workers, profile, memory)] = item
+        except Exception as e:
+            errors[item[0]] = f'提交转换失败: {e}'
+            task['emit']('file_finished', (item[0], 0, 0, errors[item[0]], []))
+    pending = set(futures)
+    try:
+        with stage(record, 'convert', rows=0) as s:
+            while pending:
+                check_cancel(task['cancel'])
+                done, pending = wait(pending, timeout=BATCH_POLL_MS / 1000,
+                                     return_when=FIRST_COMPLETED)
+                for future in done:
+                    iid, bank = futures[future][0], futures[future][3]
+                    try:
+                        columnar, skipped, err, logs, file_record = future.result()
+                        rows = rows_from_result(columnar)
+                    except Exception as e:
+                        rows, skipped, err, logs = [], 0, f'转换异常: {e}', []
+                        file_record = None
+                    if file_record is not None:
+                        file_record.update(bank=bank, ok=not err)
+                        file_records.append(file_record)
+                        logs = logs + summary_lines(file_record)
+                    task['emit']('file_finished', (iid, len(rows), skipped, err, logs))
+                    if err:
+                        errors[iid] = err
+                    else:
+                        results[iid] = rows
+                        s['rows'] += len(rows)
+    finally:
+        for future in pending:
+            future.cancel()
+
+    # 全部完成后按列表顺序汇总失败的文件，结果与各进程完成的先后无关；有失败则整批不写入
+    failures = [(fname, errors[iid]) for iid, _, fname, *_ in items if iid in errors]
+    if failures:
+        return {'status': 'failed', 'file': failures[0][0], 'error': failures[0][1],
+                'failures': failures, 'rows': sum(len(r) for r in results.values())}
+
+    index = None
+    if mode in ('flag', 'drop'):
+        from txn_index import open_index
+        try:
+            index = open_index(history)
+        except Exception as e:
+            task['emit']('log', f'警告: 打开导入历史失败，本批只查本批内重复：{e}')
+            index = open_index()
+
+    try:
+        with stage(record, 'merge') as s:
+            merged, duplicates, sources, dup_rows = _merge_batch_rows(task, items, results,
+                                                                      index, mode)
+            s['rows'] = len(merged)
+        if not merged:
+            return {'status': 'empty', 'duplicates': duplicates}
+
+        check_cancel(task['cancel'])
+        from table_writer import format_extension
+        save_path = build_timestamped_save_path(save_dir_path, out_name,
+                                                format_extension(fmt))
+        parts = []
+        try:
+            with stage(record, 'write', rows=len(merged)) as s:
+                _write_bank_rows(merged, save_path, fast=fast, fmt=fmt, parts=parts)
+                s['bytes'] = output_size(parts)
+        except PermissionError:
+            _remove_partial_files(save_path, parts)
+            return {'status': 'save_failed', 'error': f'{save_path} 被占用，请关闭后重试'}
+        except Exception as e:
+            _remove_partial_files(save_path, parts)
+            return {'status': 'save_failed', 'error': str(e)}
+
+        if index is not None:
+            from txn_index import commit_index
+            commit_index(index)
+        _log_parts(lambda msg: task['emit']('log', msg), parts, sources)
+        duplicates_path = _write_duplicate_report(task, dup_rows, save_path, fast, fmt)
+        return {'status': 'ok', 'save_path': save_path, 'rows': len(merged),
+                'duplicates': duplicates, 'duplicates_path': duplicates_path,
+                'parts': [{'path': path, 'sheet': sheet, 'rows': count}
+                          for path, sheet, count in parts]}
+    finally:
+        if index is not None:
+            from txn_index import close_index
+            close_index(index)
+
+
+def _merge_batch_rows(task, items, results, index, mode):
+    """按列表顺序合并各文件的行；index 不为 None 时逐文件查重，drop 模式剔除重复行。
+
+    返回 (合并后的行, 重复交易数, [(文件名, 汇入行数), ...], 重复行)；重复行为 flag 模式下
+    的 [(重复类型, 文件名, 合并结果中的行号, 行), ...]，其他模式为 []。
+    """
+    from txn_index import check_rows
+
+    merged = []
+    duplicates = 0
+    sources = []
+    dup_rows = []
+    for iid, idx_no, fname, _, path, _ in items:
+        rows = results[iid]
+        if index is not None and rows:
+            digest = None
+            if index['conn'] is not None:
+                from conversion_cache import file_digest
+                try:
+                    digest = file_digest(path)
+                except OSError:
+                    pass
+            in_batch, in_history, flags = check_rows(index, rows, fname, digest)
+            if in_batch or in_history:
+                duplicates += in_batch + in_history
+                action = '已剔除' if mode == 'drop' else '已保留'
+                task['emit']('log', f'[{idx_no}] {fname}：{in_batch + in_history} 笔重复交易'
+                                    f'（本批重复 {in_batch}，以往已导入 {in_history}），{action}')
+                if mode == 'drop':
+                    rows = [row for row, dup in zip(rows, flags) if not dup]
+                else:
+                    dup_rows.extend((dup, fname, len(merged) + i + 1, row)
+                                    for i, (row, dup) in enumerate(zip(rows, flags)) if dup)
+        merged.extend(rows)
+        sources.append((fname, len(rows)))
+    return merged, duplicates, sources, dup_rows
+
+
+def _write_duplicate_report(task, dup_rows, save_path, fast, fmt):
+    """flag 模式：把重复交易另写到「合并文件名_重复交易」（格式同合并结果），返回路径。
+
+    合并结果保持统一模板的 27 列不变；清单在模板列前加重复类型、来源文件和该行在合并
+    结果中的行号。无重复行时不写；写出失败只记警告，不影响合并结果。
+    """
+    if not dup_rows:
+        return ''
+    from table_writer import remove_outputs, write_text_table
+
+    stem, ext = os.path.splitext(save_path)
+    path = build_unique_save_path(os.path.dirname(save_path),
+                                  f'{os.path.basename(stem)}_重复交易', ext)
+    parts = []
+    try:
+        write_text_table(
+            path, ['重复类型', '来源文件', '合并结果行号'] + BANK_TEMPLATE_HEADERS,
+            ([dup, fname, str(number)] + [row.get(h, '') for h in BANK_TEMPLATE_HEADERS]
+             for dup, fname, number, row in dup_rows),
+            fmt=fmt, fast=fast, parts=parts)
+    except Exception as e:
+        remove_outputs(path, parts)
+        task['emit']('log', f'警告: 重复交易清单写出失败：{e}')
+        return ''
+    task['emit']('log', f'重复交易 {len(dup_rows)} 笔已列在 {path}')
+    return path
 
 
 # ---------------- 预览窗口 ----------------
 
 def preview_bank_file(file_path, bank_name, rule, win_parent, log_widget):
     """读取前 5 行做转换预演，弹窗用 Treeview 展示关键字段。"""
+    from tkinter import ttk
+    import customtkinter as ctk
+    from apple_theme import font_ui, font_title, BUTTON_PLAIN, CARD_STYLE, TEXT_PRIMARY, WINDOW_BG
+
     try:
-        header_row = rule.get('header_row', 1)
-        df = pd.read_excel(file_path, sheet_name=0,
-                           header=header_row - 1, dtype=str, nrows=5)
+        df, account_info = read_bank_source(file_path, rule, nrows=5)
     except Exception as e:
         _bank_log(log_widget, f'预览失败: {e}')
         return
 
-    df = df.loc[:, df.columns.notna()]
-    df.columns = [str(c).strip() for c in df.columns]
-
-    account_info = extract_account_info(file_path, rule)
     bank_type_code = rule.get('bank_type_code', '')
 
     preview_rows = [
@@ -508,6 +1019,14 @@ def preview_bank_file(file_path, bank_name, rule, win_parent, log_widget):
 # ---------------- 单文件转换窗口 ----------------
 
 def open_bank_converter_window(parent_root):
+    from tkinter import filedialog
+    import customtkinter as ctk
+    from apple_theme import (
+        font_ui, font_title, font_mono, BUTTON_PRIMARY, BUTTON_SECONDARY, BUTTON_PLAIN,
+        CARD_STYLE, TEXTBOX_STYLE, RED, GREEN, ORANGE, TEXT_PRIMARY, TEXT_SECONDARY, WINDOW_BG,
+        show_banner, ask_yes_no, transparent_frame,
+    )
+
     win = ctk.CTkToplevel(parent_root)
     win.title('银行流水转换')
     win.configure(fg_color=WINDOW_BG)
@@ -563,6 +1082,11 @@ def open_bank_converter_window(parent_root):
         p = filedialog.askopenfilename(filetypes=[('Excel files', '*.xlsx;*.xls')])
         if p:
             file_var.set(p)
+            from bank_detect import detect_bank
+            bank, confidence = detect_bank(p, rules)
+            if bank and bank != bank_var.get():
+                bank_combo.set(bank)
+                _bank_log(log_widget, f'按表头识别为 {bank}（置信度 {confidence:.0%}）')
 
     ctk.CTkButton(form_card, text='选择文件', command=pick_file,
                   width=88, font=font_ui(11), **bank_button_style(BUTTON_PLAIN)
@@ -582,12 +1106,23 @@ def open_bank_converter_window(parent_root):
                   width=88, font=font_ui(11), **bank_button_style(BUTTON_PLAIN)
                   ).grid(row=2, column=2, padx=(0, 16), pady=(10, 16))
 
+    _row(form_card, '输出格式', 3)
+    format_combo, get_format = make_output_format_combobox(form_card, width=16)
+    format_combo.grid(row=3, column=1, sticky='w', padx=(0, 8), pady=(0, 10))
+
+    stream_var = ctk.BooleanVar(value=False)
+    ctk.CTkCheckBox(form_card, text='流式转换（超大文件，边读边写，内存占用恒定）',
+                    variable=stream_var, font=font_ui(11),
+                    text_color=TEXT_SECONDARY, checkbox_width=18, checkbox_height=18
+                    ).grid(row=4, column=1, sticky='w', padx=(0, 8), pady=(0, 14))
+
     form_card.columnconfigure(1, weight=1)
 
     # 操作按钮区
     btn_row = transparent_frame(win)
     btn_row.pack(fill='x', padx=16, pady=(0, 10))
     buttons = {}
+    running = {'task': None, 'cancelled': False}
 
     def do_preview():
         if not bank_var.get():
@@ -620,23 +1155,50 @@ def open_bank_converter_window(parent_root):
             show_banner(banner_area, f'未找到银行规则：{bank_name}', 'error')
             return
 
-        log_widget.delete('1.0', 'end')
+        log_sink['clear']()
         buttons['preview'].configure(state='disabled')
         buttons['convert'].configure(state='disabled', text='处理中...')
-        win.update_idletasks()
-        try:
-            ok = convert_bank_file(file_path, bank_name, rule, save_path, log_widget)
-        finally:
+        buttons['cancel'].configure(state='normal')
+        stream = stream_var.get()
+        fmt = get_format()
+
+        # 转换在工作线程中执行，日志经事件队列回到界面线程
+        def work(task):
+            def task_log(msg):
+                task['emit']('log', msg)
+            return convert_bank_file(file_path, bank_name, rule, save_path, task_log,
+                                     stream=stream, cancel=task['cancel'], fmt=fmt)['status']
+
+        def on_event(kind, payload):
+            if kind == 'log':
+                _bank_log(log_widget, payload)
+
+        def on_done(status, error):
+            running['task'] = None
             buttons['preview'].configure(state='normal')
             buttons['convert'].configure(state='normal', text='开始转换')
-
-        if ok:
-            save_last_choice(bank_name, save_path)
-            if ask_yes_no(win, '完成', '转换完成，是否打开输出目录？',
-                          yes_text='打开目录', no_text='关闭'):
-                open_folder(save_path)
-        else:
-            show_banner(banner_area, '转换未完成，请查看日志', 'warning')
+            buttons['cancel'].configure(state='disabled')
+            if error is not None:
+                _bank_log(log_widget, f'  转换异常: {error}')
+            if status == 'ok':
+                save_last_choice(bank_name, save_path)
+                if ask_yes_no(win, '完成', '转换完成，是否打开输出目录？',
+                              yes_text='打开目录', no_text='关闭'):
+                    open_folder(save_path)
+            elif status == 'cancelled' or running['cancelled']:
+                show_banner(banner_area, '已取消转换', 'info')
+            else:
+                show_banner(banner_area, '转换未完成，请查看日志', 'warning')
+
+        running['cancelled'] = False
+        running['task'] = start_task(win, work, on_event, on_done)
+
+    def do_cancel():
+        if running['task'] is not None:
+            running['cancelled'] = True
+            cancel_task(running['task'])
+            buttons['cancel'].configure(state='disabled')
+            _bank_log(log_widget, '正在取消…')
 
     buttons['preview'] = ctk.CTkButton(
         btn_row, text='预览前 5 行', command=do_preview,
@@ -646,7 +1208,12 @@ def open_bank_converter_window(parent_root):
     buttons['convert'] = ctk.CTkButton(
         btn_row, text='开始转换', command=do_convert,
         font=font_ui(13, 'bold'), **bank_button_style(BUTTON_PRIMARY))
-    buttons['convert'].pack(side='left', fill='x', expand=True, padx=(4, 0))
+    buttons['convert'].pack(side='left', fill='x', expand=True, padx=4)
+
+    buttons['cancel'] = ctk.CTkButton(
+        btn_row, text='取消', command=do_cancel, state='disabled', width=80,
+        font=font_ui(12), **bank_button_style(BUTTON_PLAIN))
+    buttons['cancel'].pack(side='left', padx=(4, 0))
 
     # 日志卡片
     log_card = ctk.CTkFrame(win, **CARD_STYLE)
@@ -657,22 +1224,34 @@ def open_bank_converter_window(parent_root):
     ctk.CTkLabel(log_header, text='日志', font=font_title(12),
                  text_color=TEXT_PRIMARY).pack(side='left')
     ctk.CTkButton(log_header, text='清空',
-                  command=lambda: log_widget.delete('1.0', 'end'),
+                  command=lambda: log_sink['clear'](),
                   font=font_ui(11), width=60, **bank_button_style(BUTTON_PLAIN)
                   ).pack(side='right')
 
-    log_widget = ctk.CTkTextbox(log_card, height=240, font=font_mono(11),
+    log_box = ctk.CTkTextbox(log_card, height=240, font=font_mono(11),
                                 **TEXTBOX_STYLE)
-    log_widget.pack(fill='both', expand=True, padx=14, pady=(0, 12))
+    log_box.pack(fill='both', expand=True, padx=14, pady=(0, 12))
+
+    log_box.tag_config('error', foreground=RED)
+    log_box.tag_config('warning', foreground=ORANGE)
+    log_box.tag_config('success', foreground=GREEN)
 
-    log_widget.tag_config('error', foreground=RED)
-    log_widget.tag_config('warning', foreground=ORANGE)
-    log_widget.tag_config('success', foreground=GREEN)
+    # 缓冲日志：按固定频率刷新、合并连续跳过行、限制行数并写入日志文件
+    log_sink = create_log_sink(log_box, _bank_log_level, configured_log_path())
+    log_widget = log_sink['write']
 
 
 # ---------------- 批量混合窗口 ----------------
 
 def open_batch_converter_window(parent_root):
+    from tkinter import filedialog, ttk
+    import customtkinter as ctk
+    from apple_theme import (
+        font_ui, font_title, font_mono, BUTTON_PRIMARY, BUTTON_SECONDARY, BUTTON_PLAIN,
+        CARD_STYLE, ENTRY_STYLE, TEXTBOX_STYLE, RED, GREEN, ORANGE, TEXT_PRIMARY,
+        TEXT_SECONDARY, WINDOW_BG, show_banner, ask_yes_no, transparent_frame,
+    )
+
     win = ctk.CTkToplevel(parent_root)
     win.title('批量混合转换')
     win.configure(fg_color=WINDOW_BG)
@@ -693,6 +1272,8 @@ def open_batch_converter_window(parent_root):
     last_dir = last.get('save_dir') or ''
 
     path_by_iid = {}
+    running = {'task': None}
+    header_index = None
 
     # 标题
     ctk.CTkLabel(win, text='批量混合转换', font=font_title(16),
@@ -740,14 +1321,58 @@ def open_batch_converter_window(parent_root):
             vals[0] = i
             tree.item(iid, values=vals)
 
+    def _detect_banks(new_items):
+        """后台按表头识别银行；识别不出时用文件名猜测，仍猜不到标为未识别待人工指定。"""
+        nonlocal header_index
+        from bank_detect import build_header_index, detect_bank
+
+        if header_index is None:
+            header_index = build_header_index(rules)
+
+        def work(task):
+            for iid, p in new_items:
+                check_cancel(task['cancel'])
+                try:
+                    bank, confidence = detect_bank(p, index=header_index)
+                except Exception:
+                    bank, confidence = None, 0.0
+                task['emit']('detected', (iid, bank, confidence))
+
+        def on_event(kind, payload):
+            iid, bank, confidence = payload
+            if not tree.exists(iid) or tree.item(iid, 'values')[3] != DETECTING:
+                return
+            idx_no, fname, _, _ = tree.item(iid, 'values')
+            if bank:
+                _bank_log(log_widget, f'{fname}：识别为 {bank}（置信度 {confidence:.0%}）')
+                tree.item(iid, values=(idx_no, fname, bank, '待转换'))
+                return
+            bank = guess_bank_by_filename(fname, bank_names)
+            if bank:
+                _bank_log(log_widget, f'{fname}：表头未能识别，按文件名判断为 {bank}，请确认')
+                tree.item(iid, values=(idx_no, fname, bank, '待确认'))
+            else:
+                _bank_log(log_widget, f'警告: {fname}：未能识别银行类型，请选中后指定')
+                tree.item(iid, values=(idx_no, fname, UNKNOWN_BANK, '待确认'))
+
+        def on_done(result, error):
+            for iid, _ in new_items:
+                if tree.exists(iid) and tree.item(iid, 'values')[3] == DETECTING:
+                    on_event('detected', (iid, None, 0.0))
+
+        start_task(win, work, on_event, on_done)
+
     def add_files():
         paths = filedialog.askopenfilenames(filetypes=[('Excel files', '*.xlsx;*.xls')])
+        new_items = []
         for p in paths:
-            bank = guess_bank_by_filename(p, bank_names) or bank_names[0]
             iid = tree.insert('', 'end', values=(
-                len(path_by_iid) + 1, os.path.basename(p), bank, '待转换'))
+                len(path_by_iid) + 1, os.path.basename(p), UNKNOWN_BANK, DETECTING))
             path_by_iid[iid] = p
+            new_items.append((iid, p))
         _renumber()
+        if new_items:
+            _detect_banks(new_items)
 
     def remove_selected():
         for iid in tree.selection():
@@ -823,11 +1448,54 @@ def open_batch_converter_window(parent_root):
 
     ctk.CTkLabel(out_card, text='文件名', font=font_ui(12, 'bold'),
                  text_color=TEXT_SECONDARY, width=80, anchor='w'
-                 ).grid(row=1, column=0, sticky='w', padx=(16, 8), pady=(6, 14))
+                 ).grid(row=1, column=0, sticky='w', padx=(16, 8), pady=(6, 6))
 
-    out_name_var = ctk.StringVar(value='合并流水.xlsx')
+    out_name_var = ctk.StringVar(value='合并流水')
     ctk.CTkEntry(out_card, textvariable=out_name_var, width=440, **ENTRY_STYLE
-                 ).grid(row=1, column=1, sticky='w', padx=(0, 8), pady=(6, 14))
+                 ).grid(row=1, column=1, sticky='w', padx=(0, 8), pady=(6, 6))
+
+    ctk.CTkLabel(out_card, text='输出格式', font=font_ui(12, 'bold'),
+                 text_color=TEXT_SECONDARY, width=80, anchor='w'
+                 ).grid(row=2, column=0, sticky='w', padx=(16, 8), pady=(6, 6))
+    format_combo, get_format = make_output_format_combobox(out_card, width=16)
+    format_combo.grid(row=2, column=1, sticky='w', padx=(0, 8), pady=(6, 6))
+
+    fast_write_var = ctk.BooleanVar(value=False)
+    ctk.CTkCheckBox(out_card, text='快速写出（降低压缩率，文件稍大）',
+                    variable=fast_write_var, font=font_ui(11),
+                    text_color=TEXT_SECONDARY, checkbox_width=18, checkbox_height=18
+                    ).grid(row=3, column=1, sticky='w', padx=(0, 8), pady=(0, 4))
+
+    # 查重：勾选时剔除重复交易；不勾选时按 settings.json（flag 另写重复交易清单）
+    from app_settings import get_setting
+    dedup_setting = get_setting('dedup_mode')
+    dedup_drop_var = ctk.BooleanVar(value=dedup_setting == 'drop')
+    ctk.CTkCheckBox(out_card, text='剔除重复交易',
+                    variable=dedup_drop_var, font=font_ui(11),
+                    text_color=TEXT_SECONDARY, checkbox_width=18, checkbox_height=18
+                    ).grid(row=4, column=1, sticky='w', padx=(0, 8), pady=(0, 4))
+    dedup_history_var = ctk.BooleanVar(value=bool(get_setting('dedup_history')))
+    ctk.CTkCheckBox(out_card, text='同时对照以往已导入的交易（记录本批源文件）',
+                    variable=dedup_history_var, font=font_ui(11),
+                    text_color=TEXT_SECONDARY, checkbox_width=18, checkbox_height=18
+                    ).grid(row=5, column=1, sticky='w', padx=(0, 8), pady=(0, 14))
+
+    def do_reset_history():
+        if not ask_yes_no(win, '清空导入记录', '清空后，以往合并过的交易不再提示为已导入。\n确定清空？',
+                          yes_text='清空', yes_style='danger'):
+            return
+        from txn_index import reset_index
+        try:
+            count = reset_index()
+        except Exception as e:
+            show_banner(banner_area, f'清空导入记录失败：{e}', 'error')
+            return
+        _bank_log(log_widget, f'已清空导入历史：{count} 笔交易指纹')
+        show_banner(banner_area, '已清空导入记录', 'success')
+
+    ctk.CTkButton(out_card, text='清空导入记录', command=do_reset_history,
+                  width=100, font=font_ui(11), **bank_button_style(BUTTON_PLAIN)
+                  ).grid(row=5, column=2, padx=(0, 16), pady=(0, 14))
 
     out_card.columnconfigure(1, weight=1)
 
@@ -840,17 +1508,21 @@ def open_batch_converter_window(parent_root):
     ctk.CTkLabel(log_header, text='日志', font=font_title(12),
                  text_color=TEXT_PRIMARY).pack(side='left')
     ctk.CTkButton(log_header, text='清空',
-                  command=lambda: log_widget.delete('1.0', 'end'),
+                  command=lambda: log_sink['clear'](),
                   font=font_ui(11), width=60, **bank_button_style(BUTTON_PLAIN)
                   ).pack(side='right')
 
-    log_widget = ctk.CTkTextbox(log_card, height=240, font=font_mono(11),
+    log_box = ctk.CTkTextbox(log_card, height=240, font=font_mono(11),
                                 **TEXTBOX_STYLE)
-    log_widget.pack(fill='both', expand=True, padx=14, pady=(0, 12))
+    log_box.pack(fill='both', expand=True, padx=14, pady=(0, 12))
 
-    log_widget.tag_config('error', foreground=RED)
-    log_widget.tag_config('warning', foreground=ORANGE)
-    log_widget.tag_config('success', foreground=GREEN)
+    log_box.tag_config('error', foreground=RED)
+    log_box.tag_config('warning', foreground=ORANGE)
+    log_box.tag_config('success', foreground=GREEN)
+
+    # 缓冲日志：按固定频率刷新、合并连续跳过行、限制行数并写入日志文件
+    log_sink = create_log_sink(log_box, _bank_log_level, configured_log_path())
+    log_widget = log_sink['write']
 
     def do_batch_convert():
         if not path_by_iid:
@@ -864,78 +1536,141 @@ def open_batch_converter_window(parent_root):
         if not out_name:
             show_banner(banner_area, '请填写输出文件名', 'warning')
             return
-        if not out_name.lower().endswith('.xlsx'):
-            out_name += '.xlsx'
-
-        log_widget.delete('1.0', 'end')
-        convert_btn.configure(state='disabled', text='处理中...')
-        win.update_idletasks()
 
-        merged = []
-        try:
-            for iid in tree.get_children():
-                vals = list(tree.item(iid, 'values'))
-                idx_no, fname, bank, _ = vals
-                fpath = path_by_iid[iid]
+        statuses = [tree.item(iid, 'values')[3] for iid in tree.get_children()]
+        if DETECTING in statuses:
+            show_banner(banner_area, '正在识别银行类型，请稍候', 'info')
+            return
+        unknown = sum(1 for iid in tree.get_children()
+                      if tree.item(iid, 'values')[2] == UNKNOWN_BANK)
+        if unknown:
+            show_banner(banner_area, f'有 {unknown} 个文件未识别银行类型，请选中后指定',
+                        'warning')
+            return
 
-                tree.item(iid, values=(idx_no, fname, bank, '处理中...'))
-                win.update_idletasks()
-                _bank_log(log_widget, f'\n[{idx_no}] [{bank}] {fname}')
+        log_sink['clear']()
+
+        items = []
+        for iid in tree.get_children():
+            idx_no, fname, bank, _ = tree.item(iid, 'values')
+            rule = rules.get(bank)
+            if not rule:
+                tree.item(iid, values=(idx_no, fname, bank, '失败'))
+                _bank_log(log_widget, f'[{idx_no}] [{bank}] {fname}')
+                _bank_log(log_widget, f'  未找到规则：{bank}，整批终止')
+                show_banner(banner_area, f'未找到银行规则：{bank}，整批终止', 'error')
+                return
+            items.append((iid, idx_no, fname, bank, path_by_iid[iid], rule))
 
-                rule = rules.get(bank)
-                if not rule:
-                    tree.item(iid, values=(idx_no, fname, bank, '失败'))
-                    _bank_log(log_widget, f'  未找到规则：{bank}，整批终止')
-                    show_banner(banner_area, f'未找到银行规则：{bank}，整批终止', 'error')
-                    return
+        from batch_pool import batch_workers
 
-                rows, skipped, err = convert_bank_rows(fpath, rule, log_widget)
+        convert_btn.configure(state='disabled', text='处理中...')
+        cancel_btn.configure(state='normal')
+        _bank_log(log_widget, f'并行转换 {len(items)} 个文件（{batch_workers()} 个进程）')
+        for iid, idx_no, fname, bank, _, _ in items:
+            tree.item(iid, values=(idx_no, fname, bank, '处理中...'))
+
+        fast = fast_write_var.get()
+        fmt = get_format()
+        dedup = 'drop' if dedup_drop_var.get() else (
+            'off' if dedup_setting == 'off' else 'flag')
+        dedup_history = dedup_history_var.get()
+        by_iid = {item[0]: item for item in items}
+
+        def work(task):
+            return _run_batch(task, items, save_dir_path, out_name, fast, dedup=dedup,
+                              fmt=fmt, dedup_history=dedup_history)
+
+        def on_event(kind, payload):
+            if kind == 'log':
+                _bank_log(log_widget, payload)
+            elif kind == 'file_finished':
+                iid, rows_count, skipped, err, logs = payload
+                _, idx_no, fname, bank, _, _ = by_iid[iid]
+                _bank_log(log_widget, f'\n[{idx_no}] [{bank}] {fname}')
+                for line in logs:
+                    _bank_log(log_widget, line)
                 if err:
                     tree.item(iid, values=(idx_no, fname, bank, '失败'))
-                    _bank_log(log_widget, f'  {err}，整批终止')
-                    show_banner(banner_area,
-                                f'[{fname}] 转换失败：{err}（已合并 {len(merged)} 行未写入）',
-                                'error')
-                    return
-                if not rows:
+                    _bank_log(log_widget, f'  {err}；其余文件继续转换，整批完成后不写入')
+                elif not rows_count:
                     tree.item(iid, values=(idx_no, fname, bank, '无有效行'))
                     _bank_log(log_widget, '  无有效行，跳过但继续后续文件')
-                    continue
-
-                merged.extend(rows)
-                tree.item(iid, values=(idx_no, fname, bank, f'成功 ({len(rows)} 行)'))
-                _bank_log(log_widget, f'  汇入 {len(rows)} 行（跳过 {skipped}）')
+                else:
+                    tree.item(iid, values=(idx_no, fname, bank, f'成功 ({rows_count} 行)'))
+                    _bank_log(log_widget, f'  汇入 {rows_count} 行（跳过 {skipped}）')
 
-            if not merged:
-                _bank_log(log_widget, '\n所有文件均无有效数据，未生成合并文件')
-                show_banner(banner_area, '所有文件均无有效数据，未生成合并文件', 'warning')
-                return
-
-            output_name = os.path.splitext(out_name)[0]
-            save_path = build_timestamped_save_path(save_dir_path, output_name)
-            try:
-                _write_bank_xlsx(merged, save_path)
-            except PermissionError:
-                msg = f'{save_path} 被占用，请关闭后重试'
-                _bank_log(log_widget, f'\n保存失败：{msg}')
-                show_banner(banner_area, f'保存失败：{msg}', 'error')
+        def on_done(result, error):
+            running['task'] = None
+            convert_btn.configure(state='normal', text='开始转换')
+            cancel_btn.configure(state='disabled')
+            for iid, idx_no, fname, bank, _, _ in items:
+                if tree.exists(iid) and tree.item(iid, 'values')[3] == '处理中...':
+                    tree.item(iid, values=(idx_no, fname, bank, '未完成'))
+            if isinstance(error, TaskCancelled):
+                _bank_log(log_widget, '\n已取消，未生成合并文件')
+                show_banner(banner_area, '已取消，未生成合并文件', 'info')
                 return
-            except Exception as e:
-                _bank_log(log_widget, f'\n保存失败：{e}')
-                show_banner(banner_area, f'保存失败：{e}', 'error')
+            if error is not None:
+                _bank_log(log_widget, f'\n批量转换异常：{error}')
+                show_banner(banner_area, f'批量转换异常：{error}', 'error')
                 return
-
+            _show_batch_result(result, save_dir_path)
+
+        running['task'] = start_task(win, work, on_event, on_done)
+
+    def do_cancel_batch():
+        if running['task'] is not None:
+            cancel_task(running['task'])
+            cancel_btn.configure(state='disabled')
+            _bank_log(log_widget, '\n正在取消…')
+
+    def _show_batch_result(result, save_dir_path):
+        status = result['status']
+        if status == 'failed':
+            failures = result['failures']
+            _bank_log(log_widget, f'\n{len(failures)} 个文件转换失败，整批未写入：')
+            for fname, err in failures:
+                _bank_log(log_widget, f'  {fname}：{err}')
+            show_banner(banner_area,
+                        f'{len(failures)} 个文件转换失败（首个：[{result["file"]}] '
+                        f'{result["error"]}），已转换 {result["rows"]} 行未写入', 'error')
+        elif status == 'empty':
+            _bank_log(log_widget, '\n所有文件均无有效数据，未生成合并文件')
+            show_banner(banner_area, '所有文件均无有效数据，未生成合并文件', 'warning')
+        elif status == 'save_failed':
+            _bank_log(log_widget, f'\n保存失败：{result["error"]}')
+            show_banner(banner_area, f'保存失败：{result["error"]}', 'error')
+        else:
+            save_path = result['save_path']
+            if result.get('duplicates'):
+                _bank_log(log_widget, f'查出重复交易 {result["duplicates"]} 笔')
+            _log_metrics(log_widget, result['metrics'])
             _bank_log(log_widget,
-                      f'\n========== 全部完成：合并 {len(merged)} 行 → {save_path} ==========')
+                      f'\n========== 全部完成：合并 {result["rows"]} 行 → {save_path} ==========')
             save_last_choice(bank_names[0], save_dir_path)
             if ask_yes_no(win, '完成',
-                          f'共合并 {len(merged)} 行到 {os.path.basename(save_path)}\n是否打开输出目录？',
+                          f'共合并 {result["rows"]} 行到 {os.path.basename(save_path)}\n是否打开输出目录？',
                           yes_text='打开目录', no_text='关闭'):
                 open_folder(save_dir_path)
-        finally:
-            convert_btn.configure(state='normal', text='开始转换')
+
+    cancel_btn = ctk.CTkButton(
+        action_row, text='取消', command=do_cancel_batch, state='disabled', width=100,
+        font=font_ui(13), **bank_button_style(BUTTON_PLAIN))
+    cancel_btn.pack(side='right', padx=(8, 0))
 
     convert_btn = ctk.CTkButton(
         action_row, text='开始转换', command=do_batch_convert,
         font=font_ui(14, 'bold'), **bank_button_style(BUTTON_PRIMARY))
-    convert_btn.pack(fill='x')
+    convert_btn.pack(side='left', fill='x', expand=True)
+
+    def on_close():
+        # 关窗时取消进行中的批量任务并关闭常驻进程池，避免子进程滞留
+        if running['task'] is not None:
+            cancel_task(running['task'])
+        from batch_pool import shutdown_pool
+        shutdown_pool()
+        log_sink['flush']()
+        win.destroy()
+
+    win.protocol('WM_DELETE_WINDOW', on_close)
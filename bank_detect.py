@@ -0,0 +1,91 @@
+"""按表头内容识别银行：只读每个文件的前几行，与各银行规则的表头签名比对。
+
+表头签名取自规则的 header_row 和 column_mapping（以及 amount_column /
+marker_column）引用的源列名。build_header_index 预先建立倒排索引
+（表头行号, 列名）→ [银行]，识别时每个文件只需读取最大表头行数以内的行。
+
+置信度 = 命中的签名列数 / 签名列数；得分并列第一的银行不止一家时减半。
+低于 DETECT_MIN_CONFIDENCE 视为未识别，由调用方退回文件名猜测或人工指定。
+"""
+from collections import Counter
+
+
+DETECT_MIN_CONFIDENCE = 0.8
+
+
+def _rule_sources(rule):
+    """规则引用的全部源列名（去重、strip）。"""
+    names = []
+    for spec in rule.get('column_mapping', {}).values():
+        source = spec.get('source') if isinstance(spec, dict) else spec
+        names.extend(source if isinstance(source, list) else [source])
+    names.append(rule.get('amount_column'))
+    mc = rule.get('marker_column') or {}
+    names.extend([mc.get('col'), mc.get('amount_col')])
+    return {n.strip() for n in names if isinstance(n, str) and n.strip()}
+
+
+def build_header_index(rules):
+    """建立表头签名索引 dict：rows（需检查的表头行号）/ columns / sizes。"""
+    columns = {}
+    sizes = {}
+    for bank, rule in rules.items():
+        header_row = rule.get('header_row', 1)
+        signature = _rule_sources(rule)
+        if not signature:
+            continue
+        sizes[bank] = (header_row, len(signature))
+        for name in signature:
+            columns.setdefault((header_row, name), []).append(bank)
+    return {
+        'rows': sorted({hr for hr, _ in sizes.values()}),
+        'columns': columns,
+        'sizes': sizes,
+    }
+
+
+def score_header_rows(rows, index):
+    """按已读出的前几行打分，返回 [(银行, 置信度), ...]，置信度从高到低。"""
+    hits = Counter()
+    for header_row in index['rows']:
+        if header_row > len(rows):
+            continue
+        cells = {str(v).strip() for v in rows[header_row - 1] if v is not None}
+        for name in cells:
+            for bank in index['columns'].get((header_row, name), ()):
+                hits[bank] += 1
+
+    ranked = sorted(((hits[bank] / size, hits[bank], bank)
+                     for bank, (_, size) in index['sizes'].items() if hits[bank]),
+                    reverse=True)
+    if not ranked:
+        return []
+    top = ranked[0][:2]
+    tied = sum(1 for score, count, _ in ranked if (score, count) == top)
+    return [(bank, score / 2 if tied > 1 and (score, count) == top else score)
+            for score, count, bank in ranked]
+
+
+def detect_bank(file_path, rules=None, index=None):
+    """识别单个文件的银行，返回 (银行, 置信度)；未识别时银行为 None。
+
+    index 缺省由 rules 现场建立；批量识别时应先 build_header_index 再逐个传入。
+    """
+    from source_reader import close_source, open_source, read_top_rows
+
+    if index is None:
+        index = build_header_index(rules)
+    if not index['rows']:
+        return None, 0.0
+
+    source = open_source(file_path)
+    try:
+        rows = read_top_rows(source, index['rows'][-1])
+    finally:
+        close_source(source)
+
+    ranked = score_header_rows(rows, index)
+    if not ranked:
+        return None, 0.0
+    bank, confidence = ranked[0]
+    return (bank if confidence >= DETECT_MIN_CONFIDENCE else None), confidence
@@ -0,0 +1,228 @@
+"""银行流水列式转换引擎：把 bank_rules.json 中的一条规则编译成整列操作计划。
+
+输出与 bank_converter._transform_one_row 的逐行实现逐字节一致；
+convert_bank_rows(engine='row') 可切回逐行实现做对照（见 compare_engines）。
+"""
+from collections import Counter
+import re
+import time
+
+import pandas as pd
+
+from amount_engine import amount_signs, format_amount_column, parse_amount_column
+from bank_converter import BANK_TEMPLATE_HEADERS, convert_bank_rows
+from date_engine import convert_date_column
+from stage_metrics import add_field_time
+
+
+DATE_FIELDS = ('交易日期', '起息日')
+AMOUNT_FIELDS = ('借方金额', '贷方金额')
+BALANCE_FIELD = '交易后余额'
+
+
+# ---------------- 规则编译 ----------------
+
+def _spec_source(spec):
+    return spec if isinstance(spec, str) else (spec or {}).get('source')
+
+
+def compile_rule(rule):
+    """把规则编译为执行计划 dict。
+
+    steps: [(模板列, 操作, 参数), ...]，操作取值：
+        'select'  取源列文本（strip）；参数 (列名, strip_spaces)
+        'date'    日期拼接/格式转换；参数为归一后的日期 spec
+        'amount'  金额归一（交易后余额）；参数为列名
+    account: [(模板列, 单元格, strip, 已编译正则或 None), ...]，account_cells 为其单元格地址
+    """
+    cm = rule.get('column_mapping', {})
+    steps = []
+    for tpl_field, spec in cm.items():
+        if tpl_field not in BANK_TEMPLATE_HEADERS or tpl_field in AMOUNT_FIELDS:
+            continue
+        if tpl_field in DATE_FIELDS and isinstance(spec, dict):
+            source = spec.get('source')
+            steps.append((tpl_field, 'date', {
+                'sources': source if isinstance(source, list) else [source],
+                'multi': isinstance(source, list),
+                'join': spec.get('join', ' '),
+                'date_only_first': bool(spec.get('date_only_first')),
+                'pad_seconds': bool(spec.get('pad_seconds')),
+                'in_fmt': spec.get('in_fmt'),
+                'out_fmt': spec.get('out_fmt'),
+            }))
+        elif tpl_field == BALANCE_FIELD:
+            steps.append((tpl_field, 'amount', _spec_source(spec)))
+        elif spec is None:
+            continue
+        else:
+            strip_spaces = isinstance(spec, dict) and bool(spec.get('strip_spaces'))
+            steps.append((tpl_field, 'select', (_spec_source(spec), strip_spaces)))
+
+    account = []
+    for tpl_field, spec in (rule.get('account_extract') or {}).items():
+        if not spec.get('cell'):
+            continue
+        pattern = (re.compile(spec.get('pattern', ''))
+                   if spec.get('mode', 'cell') == 'regex' else None)
+        account.append((tpl_field, spec['cell'], bool(spec.get('strip', False)), pattern))
+
+    return {
+        'steps': steps,
+        'account': account,
+        'account_cells': [cell for _, cell, _, _ in account],
+        'header_row': rule.get('header_row', 1),
+        'fixed_values': {k: str(v) for k, v in rule.get('fixed_values', {}).items()},
+        'bank_type_code': rule.get('bank_type_code', ''),
+        'rule': rule,
+    }
+
+
+# ---------------- 整列操作 ----------------
+
+def _blank(index):
+    return pd.Series('', index=index, dtype=object)
+
+
+def _as_text(series):
+    """空值 → ''，其余 str().strip()；统一为 object 列，避免字符串扩展类型改变 strip 语义。"""
+    obj = series.astype(object)
+    obj = obj.where(obj.notna(), '').map(str).astype(object)
+    return obj.str.strip()
+
+
+def _source_text(df, col, usable):
+    # 与 _get_cell 一致：缺列、重名列都视为空
+    if not isinstance(col, str) or col not in usable:
+        return _blank(df.index)
+    return _as_text(df[col])
+
+
+def _join_nonempty(parts, sep):
+    """等价于 sep.join(p for p in parts if p)。"""
+    acc = parts[0]
+    for part in parts[1:]:
+        both = (acc != '') & (part != '')
+        acc = (acc + sep + part).where(both, acc.where(acc != '', part))
+    return acc
+
+
+def _build_date(df, spec, usable):
+    parts = [_source_text(df, col, usable) for col in spec['sources']]
+    if spec['multi']:
+        if spec['date_only_first']:
+            first = parts[0]
+            parts[0] = first.where(~first.str.contains(' ', regex=False),
+                                   first.str.split(' ', n=1).str[0])
+        raw = _join_nonempty(parts, spec['join'])
+    else:
+        raw = parts[0]
+
+    if spec['pad_seconds']:
+        raw = raw.where(raw.str.count(':') != 1, raw + ':00')
+    if not spec['in_fmt'] or not spec['out_fmt']:
+        return raw
+    return convert_date_column(raw, spec['in_fmt'], spec['out_fmt'])
+
+
+def _amount_column(text):
+    return format_amount_column(parse_amount_column(text), text.index)
+
+
+def normalize_debit_credit_columns(df, rule, usable=None):
+    """借贷归一（列式版 normalize_debit_credit）：返回 (借方金额列, 贷方金额列)。
+
+    signed_amount 按正负号、marker_column 按 jie_value/dai_value 生成布尔掩码，
+    一次性分派到两列，不再逐行分支。
+    """
+    if usable is None:
+        usable = {c for c, n in Counter(df.columns).items() if n == 1}
+    mode = rule.get('debit_credit_mode', 'two_columns')
+    cm = rule.get('column_mapping', {})
+    index = df.index
+
+    if mode == 'two_columns':
+        jie = _amount_column(_source_text(df, _spec_source(cm.get('借方金额')), usable))
+        dai = _amount_column(_source_text(df, _spec_source(cm.get('贷方金额')), usable))
+        return jie, dai
+
+    if mode == 'signed_amount':
+        amounts = parse_amount_column(
+            _source_text(df, rule.get('amount_column'), usable))
+        signs = amount_signs(amounts)
+        jie = format_amount_column(amounts, index, mask=signs < 0, negate=True)
+        dai = format_amount_column(amounts, index, mask=signs > 0)
+        return jie, dai
+
+    if mode == 'marker_column':
+        mc = rule.get('marker_column', {})
+        marker = _source_text(df, mc.get('col'), usable)
+        amounts = parse_amount_column(_source_text(df, mc.get('amount_col'), usable))
+        to_jie = (marker == mc.get('jie_value')).to_numpy()
+        to_dai = ~to_jie & (marker == mc.get('dai_value')).to_numpy()
+        jie = format_amount_column(amounts, index, mask=to_jie)
+        dai = format_amount_column(amounts, index, mask=to_dai)
+        return jie, dai
+
+    return _blank(index), _blank(index)
+
+
+# ---------------- 执行 ----------------
+
+def transform_frame(df, plan, account_info, field_times=None):
+    """按 compile_rule 生成的计划整列转换源 DataFrame。
+
+    返回 (out_df, skipped_index)：out_df 为 27 列 object 文本（已剔除跳过行），
+    skipped_index 为余额或交易日期为空被跳过的源行索引列表。
+    field_times 为 dict 时按模板列累计各步骤耗时（性能分析用，见 stage_metrics）。
+    """
+    index = df.index
+    usable = {c for c, n in Counter(df.columns).items() if n == 1}
+
+    out = {h: None for h in BANK_TEMPLATE_HEADERS}
+    for tpl_field, op, arg in plan['steps']:
+        start = time.perf_counter()
+        if op == 'date':
+            out[tpl_field] = _build_date(df, arg, usable)
+        elif op == 'amount':
+            out[tpl_field] = _amount_column(_source_text(df, arg, usable))
+        else:
+            col, strip_spaces = arg
+            text = _source_text(df, col, usable)
+            if strip_spaces:
+                text = text.str.replace(' ', '', regex=False)
+            out[tpl_field] = text
+        add_field_time(field_times, tpl_field, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    out['借方金额'], out['贷方金额'] = normalize_debit_credit_columns(df, plan['rule'], usable)
+    add_field_time(field_times, '借方金额/贷方金额', time.perf_counter() - start)
+
+    for h in BANK_TEMPLATE_HEADERS:
+        if out[h] is None:
+            out[h] = _blank(index)
+
+    fills = list(account_info.items()) + list(plan['fixed_values'].items())
+    fills.append(('银行类型', plan['bank_type_code']))
+    for k, v in fills:
+        if k in out:
+            out[k] = out[k].where(out[k] != '', v)
+
+    out_df = pd.DataFrame(out, index=index, columns=BANK_TEMPLATE_HEADERS)
+    skip = (out_df[BALANCE_FIELD] == '') | (out_df['交易日期'] == '')
+    return out_df[~skip], list(index[skip])
+
+
+def compare_engines(file_path, rule):
+    """分别用列式与逐行引擎转换同一文件，返回首个差异描述；一致时返回 None。"""
+    col_rows, col_skipped, col_err = convert_bank_rows(file_path, rule, engine='columnar')
+    row_rows, row_skipped, row_err = convert_bank_rows(file_path, rule, engine='row')
+    if (col_skipped, col_err) != (row_skipped, row_err):
+        return f'跳过/错误不一致: columnar={col_skipped, col_err} row={row_skipped, row_err}'
+    if len(col_rows) != len(row_rows):
+        return f'行数不一致: columnar={len(col_rows)} row={len(row_rows)}'
+    for i, (a, b) in enumerate(zip(col_rows, row_rows)):
+        for h in BANK_TEMPLATE_HEADERS:
+            if a.get(h, '') != b.get(h, ''):
+                return f'第 {i + 1} 行 {h} 不一致: columnar={a.get(h)!r} row={b.get(h)!r}'
+    return None
@@ -0,0 +1,89 @@
+"""批量转换进程池：工作进程常驻复用，pandas 和转换引擎每个进程只导入一次。
+
+submit_conversion 返回 concurrent.futures.Future，结果为
+((columns, data), skipped, error_msg, log_lines, metrics)：转换结果按列传回（列名 + 每列
+取值列表，同转换缓存的格式），比逐行 dict 序列化得快、传输量小，由 rows_from_result
+还原成行；日志在子进程中收集，由界面线程按文件输出，metrics 为该文件的 stage_metrics 记录。
+"""
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import os
+
+from app_settings import get_setting
+
+
+_POOL = None
+_POOL_WORKERS = 0
+
+
+def batch_workers():
+    """并行进程数：settings.json 的 batch_jobs，0 或无效值时取 CPU 核数 - 1。"""
+    try:
+        jobs = int(get_setting('batch_jobs'))
+    except (TypeError, ValueError):
+        jobs = 0
+    if jobs <= 0:
+        jobs = (os.cpu_count() or 2) - 1
+    return max(1, jobs)
+
+
+def _warm_worker():
+    # 进程启动时预先导入，首个任务不再承担 pandas/numpy 的导入开销
+    import bank_engine  # noqa: F401
+    import source_reader  # noqa: F401
+
+
+def _convert_in_worker(file_path, rule, profile=False, memory=False):
+    from conversion_cache import convert_bank_rows_cached, rows_to_columns
+    from memory_meter import tracked
+    from stage_metrics import new_record, profiled
+
+    logs = []
+    record = new_record('bank', file_path, profile=profile)
+    with tracked(memory), profiled(os.path.basename(file_path), profile, record):
+        try:
+            rows, skipped, err = convert_bank_rows_cached(file_path, rule, logs, record)
+        except Exception as e:
+            rows, skipped, err = [], 0, f'转换异常: {e}'
+    record['rows'] = len(rows)
+    return rows_to_columns(rows), skipped, err, logs, record
+
+
+def rows_from_result(columnar):
+    """子进程传回的 (columns, data) → 行 dict 列表。"""
+    from conversion_cache import rows_from_columns
+
+    return rows_from_columns(*columnar)
+
+
+def get_pool(workers=None):
+    """返回常驻进程池；进程数变化或池已损坏（子进程被杀、异常退出）时重建。"""
+    global _POOL, _POOL_WORKERS
+    workers = workers or batch_workers()
+    if _POOL is None or _POOL_WORKERS != workers or getattr(_POOL, '_broken', False):
+        shutdown_pool()
+        _POOL = ProcessPoolExecutor(max_workers=workers, initializer=_warm_worker)
+        _POOL_WORKERS = workers
+    return _POOL
+
+
+def submit_conversion(file_path, rule, workers=None, profile=False, memory=False):
+    """提交一个文件的 convert_bank_rows（经转换缓存）到进程池（workers 缺省取 batch_workers()）。
+
+    profile=True 时子进程在 cProfile 下转换，每个文件单独写出 .prof（见 stage_metrics）；
+    memory=True 时子进程按阶段记录峰值内存（见 memory_meter）。
+    池在提交时已损坏则重建后再提交一次。
+    """
+    try:
+        return get_pool(workers).submit(_convert_in_worker, file_path, rule, profile, memory)
+    except BrokenProcessPool:
+        shutdown_pool()
+        return get_pool(workers).submit(_convert_in_worker, file_path, rule, profile, memory)
+
+
+def shutdown_pool():
+    """关闭常驻进程池（不等待正在运行的转换）；窗口或程序关闭时调用。"""
+    global _POOL
+    if _POOL is not None:
+        _POOL.shutdown(wait=False, cancel_futures=True)
+        _POOL = None
@@ -0,0 +1,83 @@
+"""对比银行流水统一模板（27 列）在各输出格式下的写出与回读耗时。
+
+    python benchmarks/bench_output_formats.py --rows 200000
+
+写出走 table_writer.write_text_table（与转换流程相同）；回读用 pandas
+（dtype=str），近似下游导入的开销。parquet 需要 pyarrow，未安装时跳过。
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd  # noqa: E402
+
+from bank_converter import BANK_TEMPLATE_HEADERS  # noqa: E402
+from table_writer import (  # noqa: E402
+    CSV_ENCODINGS, OUTPUT_FORMATS, format_available, format_extension, write_text_table,
+)
+
+
+def make_rows(rows):
+    """生成与转换输出相似的行：金额、日期、账号为短文本，其余列部分为空。"""
+    out = []
+    for i in range(rows):
+        values = [''] * len(BANK_TEMPLATE_HEADERS)
+        values[0] = f'{(i * 37) % 1000000}.{i % 100:02d}'
+        values[3] = f'6222{i % 9973:08d}'
+        values[5] = f'SN{i:010d}'
+        values[6] = f'2024-{i % 12 + 1:02d}-{i % 28 + 1:02d} 10:{i % 60:02d}:00'
+        values[7] = 'CMB'
+        values[9] = '10'
+        values[10] = ('转账', '代发工资', '手续费', '利息')[i % 4]
+        values[12 if i % 2 else 13] = f'{(i * 13) % 50000}.{i % 100:02d}'
+        values[18] = f'对方单位{i % 503}'
+        out.append(values)
+    return out
+
+
+def read_back(path, fmt):
+    if fmt == 'xlsx':
+        return pd.read_excel(path, dtype=str)
+    if fmt in CSV_ENCODINGS:
+        return pd.read_csv(path, dtype=str, encoding=CSV_ENCODINGS[fmt],
+                           keep_default_na=False)
+    return pd.read_parquet(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--skip-read', action='store_true', help='只测写出')
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    print(f'{args.rows} 行 × {len(BANK_TEMPLATE_HEADERS)} 列')
+    print(f'{"格式":<14}{"写出(s)":>10}{"行/秒":>12}{"回读(s)":>10}{"文件(MB)":>10}')
+    with tempfile.TemporaryDirectory() as tmp:
+        for fmt in OUTPUT_FORMATS:
+            if not format_available(fmt):
+                print(f'{fmt:<14}（未安装依赖，跳过）')
+                continue
+            for fast in (False, True):
+                name = fmt + ('-fast' if fast else '')
+                if fast and fmt in CSV_ENCODINGS:
+                    continue  # CSV 不压缩，fast 无区别
+                path = os.path.join(tmp, name + format_extension(fmt))
+                start = time.perf_counter()
+                write_text_table(path, BANK_TEMPLATE_HEADERS, rows, fmt=fmt, fast=fast)
+                written = time.perf_counter() - start
+                read = ''
+                if not args.skip_read:
+                    start = time.perf_counter()
+                    read_back(path, fmt)
+                    read = f'{time.perf_counter() - start:.2f}'
+                print(f'{name:<14}{written:>10.2f}{args.rows / written:>12.0f}'
+                      f'{read:>10}{os.path.getsize(path) / 2**20:>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
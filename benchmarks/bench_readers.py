@@ -0,0 +1,96 @@
+"""比较各读取后端在样例文件上的整表读取耗时，并给出每个文件的最快后端。
+
+    python benchmarks/bench_readers.py 样例1.xlsx 样例目录/ ...
+    python benchmarks/bench_readers.py --rows 100000   # 不给文件时生成合成样例
+
+未安装的后端（python-calamine / xlrd）自动跳过。
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from source_reader import (  # noqa: E402
+    READER_BACKENDS, backend_available, backend_supports, choose_backend, read_source,
+)
+
+
+def collect_files(paths):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if os.path.splitext(name)[1].lower() in ('.xlsx', '.xlsm', '.xls'):
+                    files.append(os.path.join(path, name))
+        else:
+            files.append(path)
+    return files
+
+
+def make_sample(path, rows):
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(['交易日期', '交易时间', '摘要', '借方发生额', '贷方发生额', '余额',
+               '对方账号', '对方户名'])
+    for i in range(rows):
+        ws.append([f'2024-{i % 12 + 1:02d}-{i % 28 + 1:02d}', f'{i % 24:02d}:{i % 60:02d}:00',
+                   f'摘要{i % 97}', f'{i % 5000}.{i % 100:02d}' if i % 2 else '',
+                   '' if i % 2 else f'{i % 7000}.5', i * 1.25,
+                   f'6222{i:012d}', f'客户{i % 1000}'])
+    wb.save(path)
+
+
+def time_backend(path, backend, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        df, _ = read_source(path, backend=backend)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, len(df)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('paths', nargs='*', help='样例文件或目录')
+    parser.add_argument('--rows', type=int, default=50000, help='合成样例行数')
+    parser.add_argument('--repeat', type=int, default=1)
+    args = parser.parse_args()
+
+    backends = [b for b in READER_BACKENDS if backend_available(b)]
+    print('可用后端:', ', '.join(backends))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        files = collect_files(args.paths)
+        if not files:
+            sample = os.path.join(tmp, f'sample_{args.rows}.xlsx')
+            make_sample(sample, args.rows)
+            files = [sample]
+
+        for path in files:
+            size_mb = os.path.getsize(path) / 2**20
+            print(f'\n{os.path.basename(path)}  ({size_mb:.1f} MB，自动选择: '
+                  f'{choose_backend(path) or "pandas 默认"})')
+            results = []
+            for backend in backends:
+                if not backend_supports(backend, path):
+                    continue
+                try:
+                    elapsed, rows = time_backend(path, backend, args.repeat)
+                except Exception as e:
+                    print(f'  {backend:<10} 失败: {e}')
+                    continue
+                results.append((elapsed, backend))
+                print(f'  {backend:<10}{elapsed:>8.2f}s  {rows} 行')
+            if results:
+                elapsed, backend = min(results)
+                print(f'  最快: {backend}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,216 @@
+"""基准测试套件：用合成流水逐家银行测转换各阶段的吞吐（行/秒）与峰值内存。
+
+    python benchmarks/bench_suite.py [--sizes 1000 10000 100000] [--bank 招商银行 ...]
+                                     [--out 结果.json] [--compare 上次结果.json]
+
+银行流水（每家银行 × 每个行数）：
+    convert_bank_rows   读取 + 按规则转换（直接调用，不经转换缓存）
+    _write_bank_rows    按统一模板写出 xlsx
+通用模板映射（同样的行数，合成 DataFrame）：
+    apply_split_info    约 10% 的行按「;」拆成 2-3 行
+    apply_date_formats  yyyy/MM/dd HH:mm:ss → yyyy-MM-dd
+    save_text_excel     写出 xlsx
+
+每个用例在独立子进程中运行，峰值内存为该子进程的峰值 RSS（Windows 需 psutil，
+否则记为空）。合成文件按 (银行, 行数, seed) 缓存在 --data-dir，重复运行不再生成。
+结果写成 JSON；--compare 时逐项列出与上次结果的耗时比值（< 1 为变快）。
+"""
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+import importlib
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.synthetic_statements import ensure_statement, load_rules  # noqa: E402
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+GENERIC_CASE = '通用模板'
+SPLIT_RATIO = 10  # 每 SPLIT_RATIO 行有一行需要拆分
+WARM_MODULES = ('pandas', 'openpyxl', 'source_reader', 'bank_engine', 'bank_converter',
+                'table_writer')
+
+
+def peak_rss_mb():
+    """当前进程的峰值 RSS（MB）；取不到时返回 None。"""
+    try:
+        import resource
+    except ImportError:
+        try:
+            import psutil
+        except ImportError:
+            return None
+        info = psutil.Process().memory_info()
+        return getattr(info, 'peak_wset', info.rss) / 2**20
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (2**20 if sys.platform == 'darwin' else 1024)  # macOS 为字节，Linux 为 KB
+
+
+def _timed(stages, name, rows, func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    seconds = time.perf_counter() - start
+    stages[name] = {'seconds': round(seconds, 4),
+                    'rows_per_sec': round(rows / seconds) if seconds else None}
+    return result
+
+
+def run_bank_case(file_path, rule, out_dir):
+    from bank_converter import _write_bank_rows, convert_bank_rows
+
+    stages = {}
+    rows, skipped, err = _timed(stages, 'convert_bank_rows', 0,
+                                convert_bank_rows, file_path, rule)
+    if err:
+        return {'error': err}
+    stage = stages['convert_bank_rows']
+    stage['rows_per_sec'] = round(len(rows) / stage['seconds']) if stage['seconds'] else None
+    save_path = os.path.join(out_dir, 'bank.xlsx')
+    _timed(stages, '_write_bank_rows', len(rows), _write_bank_rows, rows, save_path)
+    os.remove(save_path)
+    return {'rows_out': len(rows), 'skipped': skipped, 'stages': stages}
+
+
+def make_generic_frame(rows):
+    import pandas as pd
+
+    return pd.DataFrame({
+        '交易时间': [f'2024/{i % 12 + 1:02d}/{i % 28 + 1:02d} 10:{i % 60:02d}:00'
+                 for i in range(rows)],
+        '金额': [f'{(i * 37) % 100000}.{i % 100:02d}' for i in range(rows)],
+        '对方户名': [f'单位{i % 503};单位{i % 211};单位{i % 97}' if i % SPLIT_RATIO == 0
+                 else f'单位{i % 503}' for i in range(rows)],
+        '摘要': [('转账', '代发工资', '手续费', '利息')[i % 4] for i in range(rows)],
+    })
+
+
+def run_generic_case(rows, out_dir):
+    import excel_converter
+
+    df = make_generic_frame(rows)
+    stages = {}
+    df = _timed(stages, 'apply_split_info', rows,
+                excel_converter.apply_split_info, df, {'对方户名': ';'})
+    date_info = {'交易时间': {'input': 'yyyy/MM/dd HH:mm:ss', 'output': 'yyyy-MM-dd'}}
+    df = _timed(stages, 'apply_date_formats', len(df),
+                excel_converter.apply_date_formats, df, date_info)
+    save_path = os.path.join(out_dir, 'generic.xlsx')
+    _timed(stages, 'save_text_excel', len(df), excel_converter.save_text_excel, df, save_path)
+    os.remove(save_path)
+    return {'rows_out': len(df), 'stages': stages}
+
+
+def _run_case(case, rows, file_path, rule):
+    """子进程入口：运行一个用例并附上峰值 RSS。"""
+    for module in WARM_MODULES:  # 导入耗时不计入各阶段
+        importlib.import_module(module)
+    with tempfile.TemporaryDirectory() as out_dir:
+        if case == GENERIC_CASE:
+            result = run_generic_case(rows, out_dir)
+        else:
+            result = run_bank_case(file_path, rule, out_dir)
+    result['peak_rss_mb'] = peak_rss_mb()
+    return result
+
+
+def run_isolated(case, rows, file_path=None, rule=None):
+    ctx = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+        return pool.submit(_run_case, case, rows, file_path, rule).result()
+
+
+def _fmt_rate(value):
+    return f'{value:,}' if value is not None else '-'
+
+
+def print_result(entry):
+    if 'error' in entry:
+        print(f'{entry["case"]:<10}{entry["rows"]:>9}  失败：{entry["error"]}')
+        return
+    rss = entry['peak_rss_mb']
+    for i, (name, stage) in enumerate(entry['stages'].items()):
+        head = f'{entry["case"]:<10}{entry["rows"]:>9}' if i == 0 else ' ' * 19
+        tail = f'{rss:>10.0f}' if i == 0 and rss is not None else ''
+        print(f'{head}  {name:<20}{stage["seconds"]:>9.3f}'
+              f'{_fmt_rate(stage["rows_per_sec"]):>12}{tail}')
+
+
+def compare(results, old_path):
+    with open(old_path, 'r', encoding='utf-8') as f:
+        old = {(e['case'], e['rows']): e for e in json.load(f)['results']}
+    print(f'\n与 {old_path} 对比（耗时比值，< 1 为变快）：')
+    for entry in results:
+        before = old.get((entry['case'], entry['rows']))
+        if not before or 'stages' not in before or 'stages' not in entry:
+            continue
+        for name, stage in entry['stages'].items():
+            prev = before['stages'].get(name)
+            if prev and prev['seconds']:
+                print(f'{entry["case"]:<10}{entry["rows"]:>9}  {name:<20}'
+                      f'{stage["seconds"] / prev["seconds"]:>8.2f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES),
+                        help='源文件数据行数，可到 1000000')
+    parser.add_argument('--bank', action='append', help='只测指定银行（可重复）')
+    parser.add_argument('--skip-generic', action='store_true', help='不测通用模板映射')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--data-dir',
+                        default=os.path.join(tempfile.gettempdir(), 'excel_converter_bench'),
+                        help='合成源文件缓存目录')
+    parser.add_argument('--out', help='结果 JSON 路径，默认 benchmarks/results/bench_时间.json')
+    parser.add_argument('--compare', help='上次结果 JSON，对比各阶段耗时')
+    args = parser.parse_args()
+
+    rules = load_rules()
+    unknown = [b for b in args.bank or [] if b not in rules]
+    if unknown:
+        parser.error(f'bank_rules.json 中没有: {"、".join(unknown)}')
+
+    print(f'{"用例":<10}{"行数":>9}  {"阶段":<20}{"耗时(s)":>9}{"行/秒":>12}{"峰值RSS(MB)":>10}')
+    results = []
+    for rows in args.sizes:
+        cases = [(bank, rules[bank]) for bank in args.bank or rules]
+        if not args.skip_generic:
+            cases.append((GENERIC_CASE, None))
+        for case, rule in cases:
+            file_path = None
+            if rule is not None:
+                file_path = ensure_statement(args.data_dir, case, rule, rows, args.seed)
+            entry = {'case': case, 'rows': rows}
+            entry.update(run_isolated(case, rows, file_path, rule))
+            results.append(entry)
+            print_result(entry)
+
+    import pandas as pd
+
+    out_path = args.out or os.path.join(
+        ROOT, 'benchmarks', 'results', f'bench_{datetime.now():%Y%m%d_%H%M%S}.json')
+    os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+    report = {
+        'time': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+        'seed': args.seed,
+        'results': results,
+    }
+    with open(out_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f'\n结果已写入 {out_path}')
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""对比通用模板路径的两种文本 xlsx 写出方式。
+
+    python benchmarks/bench_text_writer.py --rows 200000
+
+legacy：旧版 save_text_excel（复制 → astype(str) → to_excel → load_workbook 逐格设格式 → 再保存）
+stream：当前 save_text_excel（xlsx_writer 单遍流式写出）
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd  # noqa: E402
+
+from excel_converter import save_text_excel  # noqa: E402
+
+
+def legacy_save_text_excel(dataframe, save_path):
+    from openpyxl import load_workbook
+    from openpyxl.styles import numbers
+
+    output_df = dataframe.copy()
+    for col in output_df.columns:
+        output_df[col] = output_df[col].astype(str).replace('nan', '')
+
+    output_df.to_excel(save_path, index=False, sheet_name='Sheet1', engine='openpyxl')
+    wb = load_workbook(save_path)
+    try:
+        ws = wb.active
+        for row in ws.iter_rows(min_row=2, max_row=ws.max_row,
+                                min_col=1, max_col=ws.max_column):
+            for cell in row:
+                cell.number_format = numbers.FORMAT_TEXT
+        wb.save(save_path)
+    finally:
+        wb.close()
+
+
+def make_frame(rows, cols):
+    data = {}
+    for c in range(cols):
+        values = [f'{c}-{i % 9973}-文本' for i in range(rows)]
+        if c % 4 == 0:
+            values = [None if i % 7 == 0 else v for i, v in enumerate(values)]
+        data[f'列{c + 1}'] = values
+    return pd.DataFrame(data, dtype=str)
+
+
+def measure(func, df, path):
+    tracemalloc.start()
+    start = time.perf_counter()
+    func(df, path)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak, os.path.getsize(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--cols', type=int, default=12)
+    parser.add_argument('--skip-legacy', action='store_true', help='只测流式写出')
+    args = parser.parse_args()
+
+    df = make_frame(args.rows, args.cols)
+    cases = [('stream', save_text_excel),
+             ('stream-fast', lambda d, p: save_text_excel(d, p, fast=True))]
+    if not args.skip_legacy:
+        cases.insert(0, ('legacy', legacy_save_text_excel))
+
+    print(f'{args.rows} 行 × {args.cols} 列')
+    print(f'{"方式":<12}{"耗时(s)":>10}{"行/秒":>12}{"峰值内存(MB)":>14}{"文件(MB)":>10}')
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, func in cases:
+            elapsed, peak, size = measure(func, df, os.path.join(tmp, f'{name}.xlsx'))
+            print(f'{name:<12}{elapsed:>10.2f}{args.rows / elapsed:>12.0f}'
+                  f'{peak / 2**20:>14.1f}{size / 2**20:>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
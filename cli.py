@@ -0,0 +1,297 @@
+"""命令行入口：无界面执行银行流水转换和通用模板映射，便于计划任务调用。
+
+    python cli.py bank 流水.xlsx --bank 招商银行 --out 输出目录 [--stream] [--json]
+    python cli.py batch a.xlsx b.xlsx=工商银行 --out 输出目录 --name 合并 [--jobs 8]
+    python cli.py generic a.xlsx b.xlsx --template 模板.xlsx --mapping 映射名 --out 输出目录
+    各子命令可加 --format xlsx|csv|csv_gbk|parquet 指定输出格式，--profile 做性能分析，
+    --memory 按阶段记录峰值内存
+
+日志输出到 stderr；--json 时在 stdout 输出机器可读的汇总。
+退出码：0 全部成功，1 有文件转换/保存失败，2 参数或配置错误。
+不导入 tkinter / customtkinter（界面库只在窗口函数中导入），可在无图形界面的环境运行。
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+
+from table_writer import OUTPUT_FORMATS, format_available
+
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+
+
+def _make_logger(quiet):
+    def log(msg, level=None):
+        if not quiet:
+            print(msg, file=sys.stderr, flush=True)
+    return log
+
+
+def _headless_task(on_event=None):
+    """与 task_runner 任务 dict 同结构，事件直接同步交给 on_event。"""
+    return {
+        'cancel': threading.Event(),
+        'emit': lambda kind, payload=None: on_event and on_event(kind, payload),
+    }
+
+
+def _load_rules(rules_file=None):
+    """读取银行规则（见 bank_converter.read_bank_rules）；读不到任何规则时按参数错误退出。"""
+    from bank_converter import read_bank_rules
+
+    try:
+        rules, errors = read_bank_rules(rules_file)
+    except FileNotFoundError as e:
+        raise SystemExit(_usage_error(f'未找到银行规则文件：{e.filename}'))
+    except Exception as e:
+        raise SystemExit(_usage_error(f'未能加载银行规则：{e}'))
+    for msg in errors:
+        print(f'警告: 银行规则有误，已跳过 {msg}', file=sys.stderr)
+    if not rules:
+        raise SystemExit(_usage_error('未能加载银行规则：没有可用的银行规则'))
+    return rules
+
+
+def _usage_error(msg):
+    print(f'错误: {msg}', file=sys.stderr)
+    return EXIT_USAGE
+
+
+# ---------------- 子命令 ----------------
+
+def run_bank(args, log):
+    from bank_converter import convert_bank_file
+
+    rules = _load_rules(args.rules)
+    rule = rules.get(args.bank)
+    if not rule:
+        return _usage_error(f'未找到银行规则：{args.bank}'), None
+
+    entry = convert_bank_file(args.file, args.bank, rule, args.out, log, stream=args.stream,
+                              fmt=args.format, profile=args.profile, memory=args.memory,
+                              fast=args.fast)
+    record = entry.pop('metrics')
+    summary = {'mode': 'bank', 'ok': entry['status'] == 'ok', 'output': entry['output'],
+               'rows': entry['rows'], 'files': [entry], 'metrics': record}
+    return (EXIT_OK if summary['ok'] else EXIT_FAILED), summary
+
+
+def _resolve_batch_files(specs, rules, default_bank):
+    """FILE 或 FILE=银行；未指定银行时按表头识别，再按文件名猜测，最后退回 --bank。"""
+    from bank_converter import guess_bank_by_filename
+    from bank_detect import build_header_index, detect_bank
+
+    index = build_header_index(rules)
+    resolved = []
+    for spec in specs:
+        path, sep, bank = spec.rpartition('=')
+        if not sep or bank not in rules:
+            path, bank = spec, None
+        if not bank and os.path.exists(path):
+            bank = detect_bank(path, index=index)[0]
+        bank = bank or guess_bank_by_filename(path, list(rules)) or default_bank
+        if not bank:
+            raise SystemExit(_usage_error(f'无法确定银行类型：{path}（可写成 文件=银行 或加 --bank）'))
+        if bank not in rules:
+            raise SystemExit(_usage_error(f'未找到银行规则：{bank}'))
+        resolved.append((path, bank))
+    return resolved
+
+
+def run_batch(args, log):
+    from bank_converter import _bank_log, _run_batch
+    from stage_metrics import summary_lines
+
+    rules = _load_rules(args.rules)
+    files = _resolve_batch_files(args.files, rules, args.bank)
+    items = [(i, i + 1, os.path.basename(path), bank, path, rules[bank])
+             for i, (path, bank) in enumerate(files)]
+    entries = {i: {'file': path, 'bank': bank, 'rows': 0, 'skipped': 0,
+                   'status': 'pending', 'error': ''}
+               for i, (path, bank) in enumerate(files)}
+
+    def on_event(kind, payload):
+        if kind == 'log':
+            _bank_log(log, payload)
+        if kind != 'file_finished':
+            return
+        iid, rows_count, skipped, err, logs = payload
+        entry = entries[iid]
+        _bank_log(log, f"\n[{iid + 1}] [{entry['bank']}] {entry['file']}")
+        for line in logs:
+            _bank_log(log, line)
+        if err:
+            _bank_log(log, f'  {err}；其余文件继续转换，整批完成后不写入')
+        entry.update(rows=rows_count, skipped=skipped, error=err,
+                     status='failed' if err else ('ok' if rows_count else 'empty'))
+
+    if args.dedup_reset:
+        from txn_index import reset_index
+        _bank_log(log, f'已清空导入历史：{reset_index()} 笔交易指纹')
+
+    result = _run_batch(_headless_task(on_event), items, args.out, args.name,
+                        fast=args.fast, workers=args.jobs, dedup=args.dedup,
+                        fmt=args.format, profile=args.profile, memory=args.memory,
+                        dedup_history=args.dedup_history)
+
+    status = result['status']
+    if status == 'ok':
+        _bank_log(log, f"\n全部完成：合并 {result['rows']} 行 → {result['save_path']}")
+        for line in summary_lines(result['metrics']):
+            _bank_log(log, line)
+    elif status == 'failed':
+        _bank_log(log, f"\n{len(result['failures'])} 个文件转换失败，整批未写入：")
+        for fname, err in result['failures']:
+            _bank_log(log, f'  {fname}：{err}')
+    elif status == 'empty':
+        _bank_log(log, '\n所有文件均无有效数据，未生成合并文件')
+    else:
+        _bank_log(log, f"\n保存失败：{result['error']}")
+
+    summary = {'mode': 'batch', 'ok': status == 'ok', 'status': status,
+               'output': result.get('save_path', ''), 'rows': result.get('rows', 0),
+               'duplicates': result.get('duplicates', 0),
+               'duplicates_output': result.get('duplicates_path', ''),
+               'parts': result.get('parts', []),
+               'files': [entries[i] for i in range(len(items))],
+               'failed_files': [fname for fname, _ in result.get('failures', [])],
+               'metrics': result.get('metrics')}
+    return (EXIT_OK if status == 'ok' else EXIT_FAILED), summary
+
+
+def _load_mapping(spec):
+    """--mapping：映射 JSON 文件路径，或 history_mappings.json 中保存的映射名。"""
+    from excel_converter import load_history_mappings
+
+    if os.path.isfile(spec):
+        with open(spec, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    history = load_history_mappings()
+    if spec not in history:
+        raise SystemExit(_usage_error(
+            f'未找到映射：{spec}（已保存：{", ".join(history) or "无"}）'))
+    return history[spec]
+
+
+def run_generic(args, log):
+    from excel_converter import _convert_excel_files_work
+    from source_reader import read_source
+
+    mapping = _load_mapping(args.mapping)
+    try:
+        template_columns = list(read_source(args.template)[0].columns)
+    except Exception as e:
+        return _usage_error(f'加载模板出错：{e}'), None
+
+    sheets = []
+
+    def on_event(kind, payload):
+        if kind == 'log':
+            log(*payload)
+        elif kind == 'sheet_finished':
+            sheets.append(payload)
+
+    success, failed = _convert_excel_files_work(
+        _headless_task(on_event), args.files, template_columns, mapping, args.out,
+        args.format, args.profile, args.memory)
+    log(f'完成：成功 {success}，失败 {failed}')
+
+    summary = {'mode': 'generic', 'ok': failed == 0,
+               'rows': sum(s['rows'] for s in sheets), 'files': sheets}
+    return (EXIT_OK if failed == 0 else EXIT_FAILED), summary
+
+
+# ---------------- 入口 ----------------
+
+def build_parser():
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--json', action='store_true', help='在 stdout 输出 JSON 汇总')
+    common.add_argument('--summary-file', help='同时把 JSON 汇总写入该文件')
+    common.add_argument('-q', '--quiet', action='store_true', help='不输出过程日志')
+    common.add_argument('--rules', help='银行规则文件（默认 bank_rules.json）')
+    common.add_argument('--format', choices=list(OUTPUT_FORMATS), default=None,
+                        help='输出格式（默认按 settings.json 的 output_format）')
+    common.add_argument('--profile', action='store_true', default=None,
+                        help='性能分析：cProfile 统计写到日志目录 profile/（默认按 settings.json）')
+    common.add_argument('--memory', action='store_true', default=None,
+                        help='按阶段记录峰值内存（tracemalloc + RSS，默认按 settings.json）')
+
+    parser = argparse.ArgumentParser(
+        prog='cli.py', description='Excel 转换器命令行（无界面）')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('bank', help='单文件银行流水转换', parents=[common])
+    p.add_argument('file')
+    p.add_argument('--bank', required=True, help='银行类型（bank_rules.json 中的名称）')
+    p.add_argument('--out', required=True, help='输出目录')
+    p.add_argument('--stream', action='store_true', help='流式转换（超大文件）')
+    p.add_argument('--fast', action='store_true', help='快速写出（降低压缩率）')
+    p.add_argument('--clear-cache', action='store_true', help='转换前清空转换结果缓存')
+
+    p = sub.add_parser('batch', help='多银行批量合并', parents=[common])
+    p.add_argument('files', nargs='+', help='FILE 或 FILE=银行；未指定时按表头识别，再按文件名猜测')
+    p.add_argument('--bank', help='猜不到银行时使用的默认银行')
+    p.add_argument('--out', required=True, help='输出目录')
+    p.add_argument('--name', default='合并结果', help='输出文件名')
+    p.add_argument('--jobs', type=int, default=None, help='并行进程数（默认按 settings.json）')
+    p.add_argument('--fast', action='store_true', help='快速写出（降低压缩率）')
+    p.add_argument('--dedup', choices=('off', 'flag', 'drop'), default=None,
+                   help='重复交易：off 不查 / flag 保留并另写重复交易清单 / drop 剔除'
+                        '（默认按 settings.json）')
+    p.add_argument('--dedup-history', action='store_true', default=None,
+                   help='同时对照以往已导入的交易，并记录本批源文件（默认按 settings.json）')
+    p.add_argument('--dedup-reset', action='store_true', help='合并前清空导入历史')
+    p.add_argument('--clear-cache', action='store_true', help='转换前清空转换结果缓存')
+
+    p = sub.add_parser('generic', help='通用模板映射', parents=[common])
+    p.add_argument('files', nargs='+')
+    p.add_argument('--template', required=True, help='模板文件')
+    p.add_argument('--mapping', required=True, help='映射 JSON 文件或已保存的映射名')
+    p.add_argument('--out', required=True, help='输出目录')
+    return parser
+
+
+COMMANDS = {'bank': run_bank, 'batch': run_batch, 'generic': run_generic}
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if not os.path.isdir(args.out):
+        return _usage_error(f'输出目录不存在：{args.out}')
+    if getattr(args, 'jobs', None) is not None and args.jobs < 1:
+        return _usage_error('--jobs 必须 ≥ 1')
+    if args.format is None:
+        from app_settings import get_setting
+        args.format = get_setting('output_format')
+    if not format_available(args.format):
+        return _usage_error(f'输出格式不可用：{args.format}（parquet 需要安装 pyarrow）')
+
+    log = _make_logger(args.quiet)
+    if getattr(args, 'clear_cache', False):
+        from conversion_cache import clear_cache
+        log(f'已清空转换结果缓存：{clear_cache()} 个文件')
+
+    try:
+        code, summary = COMMANDS[args.command](args, log)
+    except SystemExit as e:
+        return e.code
+
+    if summary is not None:
+        text = json.dumps(summary, ensure_ascii=False, indent=2)
+        if args.json:
+            print(text)
+        if args.summary_file:
+            with open(args.summary_file, 'w', encoding='utf-8') as f:
+                f.write(text)
+    return code
+
+
+if __name__ == '__main__':
+    import multiprocessing
+
+    multiprocessing.freeze_support()
+    sys.exit(main())
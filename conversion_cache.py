@@ -0,0 +1,198 @@
+"""转换结果缓存：源文件内容未变、规则未变时直接取上次的转换结果。
+
+默认关闭：缓存文件含流水明细，只在 settings.json 设置了 cache_dir 时启用，
+结果保留到超出 cache_max_mb 被淘汰或用 clear_cache 清空为止。
+缓存键 = sha256(源文件内容) + sha256(规则 JSON) + 实际使用的读取后端 + CONVERTER_VERSION；
+不同后端读出的值可能不同，切换 reader_backend 后不会取到其他后端的结果。
+每个结果一个文件，按列存储（列名 + 每列取值列表）为 JSON 后 zlib 压缩，
+读取时不执行任何代码；同时保存跳过行数和过程日志，命中时原样回放。
+目录总大小超过 settings.json 的 cache_max_mb 时，按最近使用时间（命中时
+刷新文件 mtime）淘汰最旧的结果。写入先写临时文件再替换，多进程并发安全。
+"""
+import hashlib
+import json
+import os
+import zlib
+
+
+# 转换输出口径（bank_converter / bank_engine）变化时加 1，旧缓存自动失效
+CONVERTER_VERSION = 2
+CACHE_SUFFIX = '.json.z'
+# 旧版 pickle 格式的缓存文件，不再读取，clear_cache 时一并删除
+LEGACY_SUFFIX = '.rows'
+# 旧版默认开启缓存时的目录
+LEGACY_DIR = 'cache'
+HASH_BLOCK = 1024 * 1024
+
+
+def cache_dir():
+    """settings.json 中 cache_dir 指定的缓存目录；为空或上限为 0 时返回 None（不缓存）。"""
+    from app_settings import BASE_DIR, get_setting
+
+    directory = get_setting('cache_dir')
+    if not directory or not get_setting('cache_max_mb'):
+        return None
+    return os.path.join(BASE_DIR, directory)
+
+
+def file_digest(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def rule_digest(rule):
+    text = json.dumps(rule, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def cache_key(file_path, rule):
+    from source_reader import choose_backend
+
+    backend = choose_backend(file_path) or 'pandas'
+    return (f'{file_digest(file_path)[:32]}-{rule_digest(rule)[:16]}-{backend}'
+            f'-v{CONVERTER_VERSION}')
+
+
+def _entry_path(directory, key):
+    return os.path.join(directory, key + CACHE_SUFFIX)
+
+
+def rows_to_columns(rows):
+    """行 dict 列表 → (列名, 每列取值列表)；缓存和进程间传递都用这种按列的形式。"""
+    columns = list(rows[0]) if rows else []
+    return columns, [[row[c] for row in rows] for c in columns]
+
+
+def rows_from_columns(columns, data):
+    return [dict(zip(columns, values)) for values in zip(*data)]
+
+
+def load_entry(directory, key):
+    """读取缓存，返回 (rows, skipped, logs)；不存在或损坏时返回 None。"""
+    path = _entry_path(directory, key)
+    try:
+        with open(path, 'rb') as f:
+            entry = json.loads(zlib.decompress(f.read()).decode('utf-8'))
+        os.utime(path)  # 刷新最近使用时间
+    except Exception:
+        return None
+    return rows_from_columns(entry['columns'], entry['data']), entry['skipped'], entry['logs']
+
+
+def save_entry(directory, key, rows, skipped, logs):
+    """按列写入一条缓存；取值无法存为 JSON 或写入失败时忽略（不影响转换结果）。"""
+    columns, data = rows_to_columns(rows)
+    entry = {
+        'columns': columns,
+        'data': data,
+        'skipped': skipped,
+        'logs': logs,
+    }
+    path = _entry_path(directory, key)
+    tmp = f'{path}.{os.getpid()}.tmp'
+    try:
+        text = json.dumps(entry, ensure_ascii=False, separators=(',', ':'))
+    except (TypeError, ValueError):
+        return
+    try:
+        os.makedirs(directory, exist_ok=True)
+        with open(tmp, 'wb') as f:
+            f.write(zlib.compress(text.encode('utf-8')))
+        os.replace(tmp, path)
+    except OSError:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+
+
+def evict(directory, max_bytes):
+    """目录总大小超过 max_bytes 时按 mtime 从旧到新删除，返回删除的条数。"""
+    try:
+        entries = [(e.stat().st_mtime, e.stat().st_size, e.path)
+                   for e in os.scandir(directory) if e.name.endswith(CACHE_SUFFIX)]
+    except OSError:
+        return 0
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+        removed += 1
+    return removed
+
+
+def clear_cache(directory=None):
+    """删除缓存目录中的全部缓存文件（含旧版格式和残留临时文件），返回删除的个数。
+
+    directory 缺省取 settings.json 的 cache_dir；未设置（缓存关闭）时清理旧版默认目录 cache/。
+    """
+    if directory is None:
+        from app_settings import BASE_DIR, get_setting
+        directory = os.path.join(BASE_DIR, get_setting('cache_dir') or LEGACY_DIR)
+    try:
+        names = [e.path for e in os.scandir(directory)
+                 if e.name.endswith((CACHE_SUFFIX, LEGACY_SUFFIX, '.tmp'))]
+    except OSError:
+        return 0
+    removed = 0
+    for path in names:
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        removed += 1
+    return removed
+
+
+def convert_bank_rows_cached(file_path, rule, log_widget=None, metrics=None, cancel=None):
+    """带缓存的 convert_bank_rows，返回值相同：(rows_list, skipped_count, error_msg)。
+
+    命中时记一行「命中缓存」并回放上次的过程日志；只缓存成功的结果。
+    metrics 为 stage_metrics 记录时计入 cache（哈希 + 读缓存）、cache_save 阶段，
+    未命中时另有 convert_bank_rows 的各阶段；cancel 传给 convert_bank_rows。
+    """
+    from app_settings import get_setting
+    from bank_converter import _bank_log, convert_bank_rows
+    from stage_metrics import file_size, stage
+
+    directory = cache_dir()
+    key = None
+    if directory is not None:
+        with stage(metrics, 'cache', nbytes=file_size(file_path)) as s:
+            try:
+                key = cache_key(file_path, rule)
+            except OSError:
+                key = None
+            cached = load_entry(directory, key) if key is not None else None
+            if cached is not None:
+                s['rows'] = len(cached[0])
+        if metrics is not None:
+            metrics['cache_hit'] = cached is not None
+        if cached is not None:
+            rows, skipped, logs = cached
+            _bank_log(log_widget, f'  命中缓存（文件与规则未变），跳过转换：{len(rows)} 行')
+            for line in logs:
+                _bank_log(log_widget, line)
+            return rows, skipped, ''
+
+    logs = []
+    try:
+        rows, skipped, err = convert_bank_rows(file_path, rule, logs, metrics=metrics,
+                                               cancel=cancel)
+    finally:
+        for line in logs:
+            _bank_log(log_widget, line)
+    if key is not None and not err:
+        with stage(metrics, 'cache_save'):
+            save_entry(directory, key, rows, skipped, logs)
+            evict(directory, int(get_setting('cache_max_mb')) * 1024 * 1024)
+    return rows, skipped, err
@@ -0,0 +1,113 @@
+"""整列日期格式转换：只解析去重后的取值，结果映射回整列。
+
+先抽样确认输入格式；确认后对去重值调用 pd.to_datetime(format=...) 向量化解析，
+并用「按输入格式回写后与原文本一致」校验每个结果，不一致的值再逐个交给
+datetime.strptime，因此输出与逐个 strptime/strftime 完全一致。
+解析失败的值原样保留。
+"""
+from datetime import datetime
+import re
+
+import numpy as np
+import pandas as pd
+
+
+SAMPLE_SIZE = 32
+VECTORIZE_MIN_UNIQUE = 64  # 去重值太少时直接逐个解析，省去 pandas 调用开销
+
+# 只含这些指令的格式用 numpy 拼接输出；其他格式交给 DatetimeIndex.strftime（逐个调用，较慢）
+_FIELD_DIRECTIVES = {
+    '%m': 'month', '%d': 'day', '%H': 'hour', '%M': 'minute', '%S': 'second',
+}
+_TWO_DIGITS = np.array([f'{i:02d}' for i in range(100)])
+
+
+def _strptime_map(values, in_fmt, out_fmt):
+    mapping = {}
+    for v in values:
+        try:
+            mapping[v] = datetime.strptime(v, in_fmt).strftime(out_fmt)
+        except ValueError:
+            pass
+    return mapping
+
+
+def sample_values(uniques, size=SAMPLE_SIZE):
+    """从去重值中等距抽样。"""
+    if len(uniques) <= size:
+        return list(uniques)
+    positions = np.linspace(0, len(uniques) - 1, size).astype(int)
+    return [uniques[i] for i in positions]
+
+
+def confirm_format(uniques, in_fmt, size=SAMPLE_SIZE):
+    """抽样检查 in_fmt 是否适用于该列，返回样本中可解析的比例（无样本时为 0）。"""
+    sample = sample_values(uniques, size)
+    if not sample:
+        return 0.0
+    return len(_strptime_map(sample, in_fmt, in_fmt)) / len(sample)
+
+
+def format_datetimes(parsed, fmt):
+    """把无 NaT 的 DatetimeIndex 按 strftime 格式输出为 str 列表。"""
+    tokens = [t for t in re.split(r'(%.)', fmt) if t]
+    directives = [t for t in tokens if t.startswith('%')]
+    if any(t not in _FIELD_DIRECTIVES and t not in ('%Y', '%%') for t in directives):
+        return parsed.strftime(fmt).tolist()
+
+    acc = np.full(len(parsed), '', dtype='<U1')
+    for token in tokens:
+        if token == '%Y':
+            piece = parsed.year.to_numpy().astype(str)
+        elif token in _FIELD_DIRECTIVES:
+            piece = _TWO_DIGITS[getattr(parsed, _FIELD_DIRECTIVES[token]).to_numpy()]
+        else:
+            piece = '%' if token == '%%' else token
+        acc = np.char.add(acc, piece)
+    return acc.tolist()
+
+
+def _vectorized_map(uniques, in_fmt, out_fmt):
+    index = pd.Index(uniques, dtype=object)
+    try:
+        parsed = pd.to_datetime(index, format=in_fmt, errors='coerce')
+        notna = np.asarray(parsed.notna(), dtype=bool)
+        exact = notna.copy()
+        exact[notna] = (np.array(format_datetimes(parsed[notna], in_fmt), dtype=object)
+                        == index[notna].to_numpy(dtype=object))
+    except (ValueError, TypeError, OverflowError):
+        return _strptime_map(uniques, in_fmt, out_fmt)
+
+    keys = index[exact].tolist()
+    if out_fmt == in_fmt:
+        mapping = dict(zip(keys, keys))
+    else:
+        mapping = dict(zip(keys, format_datetimes(parsed[exact], out_fmt)))
+    # pandas 解析失败或与 strptime 口径可能不同的值，逐个兜底
+    mapping.update(_strptime_map(index[~exact], in_fmt, out_fmt))
+    return mapping
+
+
+def build_date_mapping(uniques, in_fmt, out_fmt):
+    """对去重后的文本求 {原文本: 转换结果}；解析失败的值不在结果中。"""
+    if len(uniques) >= VECTORIZE_MIN_UNIQUE and confirm_format(uniques, in_fmt) >= 0.5:
+        return _vectorized_map(uniques, in_fmt, out_fmt)
+    return _strptime_map(uniques, in_fmt, out_fmt)
+
+
+def convert_date_column(values, in_fmt, out_fmt, fallback=None):
+    """整列转换日期文本。
+
+    values: 已 strip 的 object 文本列，'' 表示空值（结果仍为 ''）
+    fallback: 解析失败时返回的列，默认原值
+    """
+    nonempty = values != ''
+    uniques = pd.unique(values[nonempty].to_numpy(dtype=object))
+    mapping = build_date_mapping(uniques, in_fmt, out_fmt)
+
+    converted = values.map(mapping)
+    failed = converted.isna() & nonempty
+    result = converted.astype(object)
+    result[failed] = (values if fallback is None else fallback)[failed]
+    result[~nonempty] = ''
+    return result
@@ -3,31 +3,34 @@
 UI 框架：customtkinter
 通用模板映射业务逻辑：保留原实现
 所有 messagebox / simpledialog 已替换为 Banner / CTkInputDialog
+
+启动时只导入界面所需模块：pandas、openpyxl 和银行转换模块在首次使用时导入，
+首屏出现后再由后台线程预先导入，启动各阶段耗时见 startup_timing。
+tkinter / customtkinter / apple_theme 在各窗口函数中导入，命令行（cli.py）使用
+模板映射逻辑时不需要图形界面环境。
 """
+import startup_timing  # 须最先导入：计时起点
+
 from datetime import datetime
+from functools import lru_cache
 import json
+import multiprocessing
 import os
 import sys
-from tkinter import filedialog, ttk
-
-import customtkinter as ctk
-from openpyxl import load_workbook
-from openpyxl.styles import numbers
-import pandas as pd
-
-from apple_theme import (
-    apply_apple_theme,
-    font_ui, font_title, font_mono,
-    BUTTON_PRIMARY, BUTTON_SECONDARY, BUTTON_PLAIN,
-    CARD_STYLE, ENTRY_STYLE, TEXTBOX_STYLE,
-    BLUE, RED, GREEN, ORANGE,
-    TEXT_PRIMARY, TEXT_SECONDARY, HOVER_BG,
-    WINDOW_BG, CARD_BG,
-    show_banner, transparent_frame,
+import threading
+
+from log_sink import configured_log_path, create_log_sink
+from task_runner import TaskCancelled, cancel_task, check_cancel, start_task
+from table_writer import describe_parts, format_extension, remove_outputs, write_text_table
+from utils import (
+    build_unique_save_path, center_window, make_output_format_combobox,
+    sanitize_filename_part,
 )
-from bank_converter import open_bank_converter_window, open_batch_converter_window
-from utils import build_unique_save_path, center_window, sanitize_filename_part
 
+startup_timing.mark('imports')
+
+# 首屏出现后在后台预先导入的重模块（导入有全局锁，与首次使用时的导入不会冲突）
+PREFETCH_MODULES = ('pandas', 'openpyxl', 'source_reader', 'bank_engine', 'bank_converter')
 
 # ---------------- 路径常量 ----------------
 
@@ -40,22 +43,12 @@ HISTORY_TEMPLATES_FILE = os.path.join(base_dir, 'history_templates.json')
 HISTORY_MAPPINGS_FILE = os.path.join(base_dir, 'history_mappings.json')
 
 
-def save_text_excel(dataframe, save_path):
-    output_df = dataframe.copy()
-    for col in output_df.columns:
-        output_df[col] = output_df[col].astype(str).replace('nan', '')
-
-    output_df.to_excel(save_path, index=False, sheet_name='Sheet1', engine='openpyxl')
-    wb = load_workbook(save_path)
-    try:
-        ws = wb.active
-        for row in ws.iter_rows(min_row=2, max_row=ws.max_row,
-                                min_col=1, max_col=ws.max_column):
-            for cell in row:
-                cell.number_format = numbers.FORMAT_TEXT
-        wb.save(save_path)
-    finally:
-        wb.close()
+def save_text_excel(dataframe, save_path, fast=False, fmt='xlsx', parts=None):
+    """流式写出全文本表格（默认 xlsx，fmt 见 table_writer）：写出时把空值和 'nan' 置空，
+    不复制 DataFrame、不回读文件。超过单表行数上限时分部写出，各部分记入 parts。"""
+    write_text_table(save_path, [str(c) for c in dataframe.columns],
+                     dataframe.itertuples(index=False, name=None),
+                     fmt=fmt, fast=fast, blank_values=('nan',), parts=parts)
 
 
 def build_adjusted_split_info(split_info, template_to_file_mapping,
@@ -78,43 +71,57 @@ def build_adjusted_split_info(split_info, template_to_file_mapping,
 
 
 def apply_split_info(dataframe, adjusted_split_info):
+    """按 split_info 把单元格中用分隔符连接的多个值拆成多行（整列 str.split + explode）。
+
+    各列分别拆分：每段去掉首尾空白和分隔符字符，丢弃空段；全为空段时保留原文本，
+    空值输出为 ''。一行拆成该行各列段数的最大值行，段数不足的列补 ''，其余列照抄，
+    行索引沿用原行。
+    """
     if not adjusted_split_info:
         return dataframe
+    columns = {col: sym for col, sym in adjusted_split_info.items()
+               if col in dataframe.columns}
+    if not columns:
+        return dataframe
+    if not all(columns.values()):
+        log("错误: 拆分符不能为空，未拆分", 'error')
+        return dataframe
 
-    new_rows = []
-    for index, row in dataframe.iterrows():
-        try:
-            split_values_dict = {}
-            max_length = 1
-            for col_name, sym in adjusted_split_info.items():
-                if col_name in row.index:
-                    if pd.notna(row[col_name]):
-                        values = str(row[col_name]).split(sym)
-                        values = [v.strip().strip(sym).strip() for v in values]
-                        values = [v for v in values if v]
-                        if values:
-                            split_values_dict[col_name] = values
-                            max_length = max(max_length, len(values))
-                        else:
-                            split_values_dict[col_name] = [str(row[col_name])]
-                    else:
-                        split_values_dict[col_name] = ['']
-            if split_values_dict:
-                for i in range(max_length):
-                    new_row = row.copy()
-                    for col_name, values in split_values_dict.items():
-                        new_row[col_name] = values[i] if i < len(values) else ''
-                    new_rows.append(new_row)
-                log(f"信息: 行 {index} 拆分为 {max_length} 行")
-            else:
-                new_rows.append(row)
-        except Exception as row_error:
-            log(f"错误: 处理行 {index} 时出错: {row_error}", 'error')
-            new_rows.append(row)
-    return pd.DataFrame(new_rows)
+    import pandas as pd
+
+    positions = pd.RangeIndex(len(dataframe))
+    pieces = {}
+    for col, sym in columns.items():
+        values = dataframe[col]
+        text = pd.Series(values.where(values.notna(), '').astype(str).to_numpy(),
+                         index=positions)
+        parts = text.str.split(sym, regex=False).explode()
+        parts = parts.str.strip().str.strip(sym).str.strip()
+        parts = parts[parts != '']
+        # 全为空段（含空值）的行保留原文本
+        kept = text[~positions.isin(parts.index)]
+        parts = pd.concat([parts, kept]).sort_index(kind='stable')
+        pieces[col] = pd.Series(
+            parts.to_numpy(),
+            index=pd.MultiIndex.from_arrays([parts.index, parts.groupby(level=0).cumcount()]))
+
+    split = pd.DataFrame(pieces).sort_index().fillna('')
+    source_rows = split.index.get_level_values(0).to_numpy()
+    if len(split) == len(dataframe):
+        result = dataframe.copy()
+    else:
+        result = dataframe.iloc[source_rows]
+        counts = pd.Series(source_rows).value_counts()
+        multi = counts[counts > 1]
+        log(f"信息: {len(multi)} 行拆分为 {int(multi.sum())} 行，共 {len(split)} 行")
+    for col in columns:
+        result[col] = split[col].to_numpy()
+    return result
 
 
+@lru_cache(maxsize=None)
 def convert_date_format(fmt):
+    """界面中的日期格式（yyyy-MM-dd HH:mm:ss）转为 strftime 格式；结果按 fmt 缓存。"""
     if not fmt:
         return fmt
     replacements = [
@@ -128,20 +135,23 @@ def convert_date_format(fmt):
 
 
 def apply_date_formats(dataframe, date_format_info):
+    """按 date_format_info 整列转换日期文本（见 date_engine.convert_date_column，
+    每个不同的取值只解析一次）。空值输出为 ''，解析失败的值原样保留。"""
+    import pandas as pd
+    from date_engine import convert_date_column
+
     for col, fmt_config in date_format_info.items():
         if col in dataframe.columns:
             input_fmt = convert_date_format(fmt_config.get('input', ''))
             output_fmt = convert_date_format(fmt_config.get('output', ''))
             if input_fmt and output_fmt:
-                def convert_date(val, in_fmt=input_fmt, out_fmt=output_fmt):
-                    if pd.isna(val) or str(val).strip() == '':
-                        return ''
-                    try:
-                        dt = datetime.strptime(str(val).strip(), in_fmt)
-                        return dt.strftime(out_fmt)
-                    except ValueError:
-                        return str(val)
-                dataframe[col] = dataframe[col].apply(convert_date)
+                values = dataframe[col]
+                # 按位置对齐：拆分后的行索引可能重复
+                text = pd.Series(values.where(values.notna(), '').astype(str).to_numpy(),
+                                 dtype=object)
+                converted = convert_date_column(text.str.strip(), input_fmt, output_fmt,
+                                                fallback=text)
+                dataframe[col] = converted.to_numpy()
     return dataframe
 
 
@@ -154,7 +164,12 @@ column_mapping = None
 # UI 引用（main 块中初始化）
 root = None
 log_text = None
+log_sink = None
 banner_area = None
+convert_button = None
+cancel_button = None
+get_output_format = None
+convert_task = None
 
 
 # ---------------- 日志工具 ----------------
@@ -170,18 +185,13 @@ def _detect_level(msg):
 
 
 def log(msg, level=None):
-    """写日志，按 level 染色。level=None 时按内容自动检测。"""
-    if log_text is None:
+    """写日志，按 level 染色。level=None 时按内容自动检测。
+
+    经缓冲日志（log_sink）定时刷新到界面并写入日志文件，可在工作线程中调用。
+    """
+    if log_sink is None:
         return
-    if level is None:
-        level = _detect_level(msg)
-    line = msg if msg.endswith('\n') else msg + '\n'
-    if level == 'info':
-        log_text.insert('end', line)
-    else:
-        log_text.insert('end', line, level)
-    log_text.see('end')
-    log_text.update_idletasks()
+    log_sink['write'](msg, level)
 
 
 # ---------------- 历史记录 IO ----------------
@@ -217,12 +227,17 @@ def load_history_mappings():
 
 def select_template():
     global template_df
+    from tkinter import filedialog
+    from apple_theme import show_banner
+
     template_path = filedialog.askopenfilename(
         filetypes=[("Excel files", "*.xlsx;*.xls")])
     if not template_path:
         return
+    from source_reader import read_source
+
     try:
-        template_df = pd.read_excel(template_path, sheet_name=0, dtype=str)
+        template_df = read_source(template_path)[0]
         log(f"模板文件已加载: {template_path}", 'success')
         save_history_template(template_path)
     except Exception as e:
@@ -232,6 +247,13 @@ def select_template():
 
 def set_column_mapping():
     global column_mapping
+    from tkinter import filedialog, ttk
+    import customtkinter as ctk
+    from apple_theme import (
+        font_ui, font_title, BUTTON_PRIMARY, CARD_STYLE, ENTRY_STYLE, TEXT_PRIMARY,
+        TEXT_SECONDARY, WINDOW_BG, show_banner, transparent_frame,
+    )
+
     if template_df is None:
         show_banner(banner_area, "请先选择模板文件", 'warning')
         return
@@ -241,8 +263,10 @@ def set_column_mapping():
     if not file_path:
         return
 
+    from source_reader import read_source
+
     try:
-        df = pd.read_excel(file_path, sheet_name=0, dtype=str)
+        df = read_source(file_path)[0]
         file_columns = df.columns.tolist()
     except Exception as e:
         show_banner(banner_area, f"读取文件出错：{e}", 'error')
@@ -343,6 +367,8 @@ def set_column_mapping():
 
 def select_save_directory():
     global save_dir
+    from tkinter import filedialog
+
     chosen = filedialog.askdirectory()
     if chosen:
         save_dir = chosen
@@ -352,6 +378,13 @@ def select_save_directory():
 # ---------------- 主转换流程 ----------------
 
 def convert_excel_files():
+    global convert_task
+    from tkinter import filedialog
+    from apple_theme import show_banner
+
+    if convert_task is not None:
+        show_banner(banner_area, "转换进行中，请稍候或先取消", 'info')
+        return
     if template_df is None or column_mapping is None:
         show_banner(banner_area, "请先选择模板并设置列映射", 'warning')
         return
@@ -364,6 +397,96 @@ def convert_excel_files():
     if not file_paths:
         return
 
+    template_columns = list(template_df.columns)
+    mapping = dict(column_mapping)
+    save_dir_path = save_dir
+    fmt = get_output_format()
+
+    def work(task):
+        return _convert_excel_files_work(task, file_paths, template_columns,
+                                         mapping, save_dir_path, fmt)
+
+    def on_event(kind, payload):
+        if kind == 'log':
+            log(*payload)
+        elif kind == 'banner':
+            show_banner(banner_area, *payload)
+
+    def on_done(result, error):
+        global convert_task
+        convert_task = None
+        convert_button.configure(state='normal', text='转换 Excel 文件')
+        cancel_button.configure(state='disabled')
+        if isinstance(error, TaskCancelled):
+            log("已取消转换", 'warning')
+            show_banner(banner_area, "已取消转换", 'info')
+            return
+        if error is not None:
+            log(f"错误: 转换异常: {error}", 'error')
+            show_banner(banner_area, f"转换异常: {error}", 'error')
+            return
+        success_count, error_count = result
+        if error_count == 0:
+            show_banner(banner_area, f"全部完成：成功转换 {success_count} 个工作表", 'success')
+        else:
+            show_banner(banner_area,
+                        f"完成：成功 {success_count}，失败 {error_count}", 'warning')
+
+    convert_button.configure(state='disabled', text='转换中...')
+    cancel_button.configure(state='normal')
+    convert_task = start_task(root, work, on_event, on_done)
+
+
+def cancel_conversion():
+    if convert_task is not None:
+        cancel_task(convert_task)
+        cancel_button.configure(state='disabled')
+        log("正在取消…", 'warning')
+
+
+def _convert_excel_files_work(task, file_paths, template_columns, column_mapping,
+                              save_dir_path, fmt='xlsx', profile=None, memory=None):
+    """工作线程中逐文件、逐工作表转换；日志、提示和每个工作表的结果
+    （'sheet_finished'）以事件发回界面线程。fmt 为输出格式（见 table_writer）。
+
+    每个工作表记录读取、列映射、拆分、日期格式、写出各阶段耗时（见 stage_metrics），
+    汇总到日志并追加到 metrics.jsonl；profile 为是否做性能分析、memory 为是否按阶段
+    记录峰值内存，缺省按 settings.json 的 profile / memory_tracking。
+    返回 (成功工作表数, 失败数)；取消时在工作表之间抛出 TaskCancelled。
+    """
+    from memory_meter import tracked, tracking_enabled
+    from stage_metrics import profiled, profiling_enabled, save_records
+
+    records = []
+    try:
+        with tracked(tracking_enabled(memory)), \
+                profiled('generic', profiling_enabled(profile)) as prof:
+            result = _convert_sheets(task, file_paths, template_columns, column_mapping,
+                                     save_dir_path, fmt, records)
+    finally:
+        save_records(records)
+    if prof['path']:
+        task['emit']('log', (f"信息: 性能分析已写入 {prof['path']}", None))
+    return result
+
+
+def _convert_sheets(task, file_paths, template_columns, column_mapping, save_dir_path,
+                    fmt, records):
+    from source_reader import open_excel_file, open_source
+    from stage_metrics import new_record, output_size, stage, summary_lines
+
+    def task_log(msg, level=None):
+        task['emit']('log', (msg, level))
+
+    def task_banner(msg, level):
+        task['emit']('banner', (msg, level))
+
+    def sheet_finished(file_path, sheet_name, status, rows=0, output='', error=''):
+        task['emit']('sheet_finished', {
+            'file': file_path, 'sheet': sheet_name, 'status': status,
+            'rows': rows, 'output': output, 'error': error,
+        })
+
     split_info = column_mapping.get('split_info', {})
     date_format_info = column_mapping.get('date_format_info', {})
     template_to_file_mapping = {
@@ -376,82 +499,115 @@ def convert_excel_files():
 
     for file_path in file_paths:
         try:
-            sheet_names = pd.ExcelFile(file_path).sheet_names
-
-            for sheet_name in sheet_names:
-                df = pd.read_excel(file_path, sheet_name=sheet_name, dtype=str)
-
-                log(f"调试: 文件 {file_path} 工作表 {sheet_name} - 开始处理")
-
-                file_columns_ordered = [
-                    template_to_file_mapping[k] for k in template_to_file_mapping.keys()
-                ]
-                missing_columns = [c for c in file_columns_ordered if c not in df.columns]
-                if missing_columns:
-                    log(f"错误: 文件 {file_path} 工作表 {sheet_name} 缺少列: {missing_columns}",
-                        'error')
-                    error_count += 1
-                    continue
-
-                mapped_df = df[file_columns_ordered].copy()
-                template_columns_ordered = list(template_to_file_mapping.keys())
-                mapped_df.columns = template_columns_ordered
-
-                adjusted_split_info = build_adjusted_split_info(
-                    split_info, template_to_file_mapping, template_columns_ordered
-                )
-                mapped_df = apply_split_info(mapped_df, adjusted_split_info)
-
-                if date_format_info:
-                    mapped_df = apply_date_formats(mapped_df, date_format_info)
-
-                all_template_columns = list(template_df.columns)
-                for col in all_template_columns:
-                    if col not in mapped_df.columns:
-                        mapped_df[col] = ''
-                mapped_df = mapped_df[all_template_columns]
-
-                file_name = sanitize_filename_part(
-                    os.path.splitext(os.path.basename(file_path))[0]
-                )
-                if len(sheet_names) > 1:
-                    file_name += f'_{sanitize_filename_part(sheet_name)}'
-                timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
-                save_path = build_unique_save_path(save_dir, f'{file_name}_{timestamp}')
-
-                try:
-                    save_text_excel(mapped_df, save_path)
-                    log(f"成功: 文件 {file_path} 工作表 {sheet_name} 转换完成 → {save_path}",
-                        'success')
-                    success_count += 1
-                except PermissionError:
-                    msg = f"无法保存 {save_path}：文件可能被 Excel 占用"
-                    log(msg, 'error')
-                    show_banner(banner_area, msg, 'error')
-                    error_count += 1
-                    continue
-                except Exception as save_error:
-                    log(f"错误: 保存 {save_path} 出错: {save_error}", 'error')
-                    show_banner(banner_area, f"保存出错: {save_error}", 'error')
-                    error_count += 1
-                    continue
-
+            with open_excel_file(open_source(file_path)) as xls:
+                sheet_names = xls.sheet_names
+
+                for sheet_name in sheet_names:
+                    check_cancel(task['cancel'])
+                    record = new_record('generic', file_path, sheet=sheet_name, format=fmt,
+                                        ok=False)
+                    records.append(record)
+                    with stage(record, 'read') as s:
+                        df = xls.parse(sheet_name=sheet_name, dtype=str)
+                        s['rows'] = len(df)
+
+                    task_log(f"调试: 文件 {file_path} 工作表 {sheet_name} - 开始处理")
+
+                    file_columns_ordered = [
+                        template_to_file_mapping[k] for k in template_to_file_mapping.keys()
+                    ]
+                    missing_columns = [c for c in file_columns_ordered if c not in df.columns]
+                    if missing_columns:
+                        task_log(f"错误: 文件 {file_path} 工作表 {sheet_name} 缺少列: "
+                                 f"{missing_columns}", 'error')
+                        sheet_finished(file_path, sheet_name, 'failed',
+                                       error=f'缺少列: {missing_columns}')
+                        error_count += 1
+                        continue
+
+                    with stage(record, 'map'):
+                        mapped_df = df[file_columns_ordered].copy()
+                        template_columns_ordered = list(template_to_file_mapping.keys())
+                        mapped_df.columns = template_columns_ordered
+
+                    adjusted_split_info = build_adjusted_split_info(
+                        split_info, template_to_file_mapping, template_columns_ordered
+                    )
+                    with stage(record, 'split') as s:
+                        mapped_df = apply_split_info(mapped_df, adjusted_split_info)
+                        s['rows'] = len(mapped_df)
+
+                    if date_format_info:
+                        with stage(record, 'date'):
+                            mapped_df = apply_date_formats(mapped_df, date_format_info)
+
+                    all_template_columns = list(template_columns)
+                    for col in all_template_columns:
+                        if col not in mapped_df.columns:
+                            mapped_df[col] = ''
+                    mapped_df = mapped_df[all_template_columns]
+
+                    file_name = sanitize_filename_part(
+                        os.path.splitext(os.path.basename(file_path))[0]
+                    )
+                    if len(sheet_names) > 1:
+                        file_name += f'_{sanitize_filename_part(sheet_name)}'
+                    timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
+                    save_path = build_unique_save_path(save_dir_path,
+                                                       f'{file_name}_{timestamp}',
+                                                       format_extension(fmt))
+
+                    parts = []
+                    try:
+                        with stage(record, 'write', rows=len(mapped_df)) as s:
+                            save_text_excel(mapped_df, save_path, fmt=fmt, parts=parts)
+                            s['bytes'] = output_size(parts)
+                        record['ok'] = True
+                        part_lines = describe_parts(parts, [(
+                            f'{os.path.basename(file_path)} / {sheet_name}', len(mapped_df))])
+                        if part_lines:
+                            task_log(f"信息: 超过单表行数上限，分 {len(parts)} 部分写出：")
+                            for line in part_lines:
+                                task_log(line)
+                        task_log(f"成功: 文件 {file_path} 工作表 {sheet_name} 转换完成 → "
+                                 f"{save_path}", 'success')
+                        for line in summary_lines(record):
+                            task_log(line)
+                        sheet_finished(file_path, sheet_name, 'ok', len(mapped_df), save_path)
+                        success_count += 1
+                    except PermissionError:
+                        remove_outputs(save_path, parts)
+                        msg = f"无法保存 {save_path}：文件可能被 Excel 占用"
+                        task_log(msg, 'error')
+                        task_banner(msg, 'error')
+                        sheet_finished(file_path, sheet_name, 'failed', error=msg)
+                        error_count += 1
+                        continue
+                    except Exception as save_error:
+                        # 如 csv_gbk 遇到 GBK 无法表示的字符：删掉写了一半的文件
+                        remove_outputs(save_path, parts)
+                        task_log(f"错误: 保存 {save_path} 出错: {save_error}", 'error')
+                        task_banner(f"保存出错: {save_error}", 'error')
+                        sheet_finished(file_path, sheet_name, 'failed', error=str(save_error))
+                        error_count += 1
+                        continue
+
+        except TaskCancelled:
+            raise
         except Exception as e:
-            log(f"错误: 处理文件 {file_path} 时出错: {e}", 'error')
-            show_banner(banner_area,
-                        f"处理 {os.path.basename(file_path)} 出错: {e}", 'error')
+            task_log(f"错误: 处理文件 {file_path} 时出错: {e}", 'error')
+            task_banner(f"处理 {os.path.basename(file_path)} 出错: {e}", 'error')
+            sheet_finished(file_path, None, 'failed', error=str(e))
             error_count += 1
 
-    if error_count == 0:
-        show_banner(banner_area, f"全部完成：成功转换 {success_count} 个工作表", 'success')
-    else:
-        show_banner(banner_area,
-                    f"完成：成功 {success_count}，失败 {error_count}", 'warning')
+    return success_count, error_count
 
 
 # ---------------- 历史记录展示 ----------------
 
 def show_history_templates():
+    from apple_theme import show_banner
+
     templates = load_history_templates()
     if not templates:
         show_banner(banner_area, "暂无历史模板记录", 'info')
@@ -462,6 +618,8 @@ def show_history_templates():
 
 
 def show_history_mappings():
+    from apple_theme import show_banner
+
     mappings = load_history_mappings()
     if not mappings:
         show_banner(banner_area, "暂无历史映射记录", 'info')
@@ -472,6 +630,9 @@ def show_history_mappings():
 
 
 def _show_history_list(items, title, on_click, truncate=80):
+    import customtkinter as ctk
+    from apple_theme import font_ui, font_title, CARD_STYLE, TEXT_PRIMARY, HOVER_BG, WINDOW_BG
+
     win = ctk.CTkToplevel(root)
     win.title(title)
     win.configure(fg_color=WINDOW_BG)
@@ -508,8 +669,11 @@ def _show_history_list(items, title, on_click, truncate=80):
 
 def use_history_template(template_path):
     global template_df
+    from apple_theme import show_banner
+    from source_reader import read_source
+
     try:
-        template_df = pd.read_excel(template_path, sheet_name=0, dtype=str)
+        template_df = read_source(template_path)[0]
         log(f"历史模板已加载: {template_path}", 'success')
         save_history_template(template_path)
     except Exception as e:
@@ -523,13 +687,54 @@ def use_history_mapping(mapping):
     log("历史映射已应用", 'success')
 
 
+# ---------------- 银行转换入口（首次点击时导入） ----------------
+
+def open_bank_window():
+    from bank_converter import open_bank_converter_window
+    open_bank_converter_window(root)
+
+
+def open_batch_window():
+    from bank_converter import open_batch_converter_window
+    open_batch_converter_window(root)
+
+
+# ---------------- 启动收尾 ----------------
+
+def _prefetch_modules():
+    import importlib
+
+    for name in PREFETCH_MODULES:
+        try:
+            importlib.import_module(name)
+        except Exception:
+            continue
+
+
+def _on_first_window():
+    """首屏已绘制：记录启动耗时，再在后台预先导入数据处理模块。"""
+    startup_timing.mark('first_window')
+    log(startup_timing.format_report())
+    startup_timing.save_report()
+    threading.Thread(target=_prefetch_modules, daemon=True).start()
+
+
 # ---------------- 主窗口构建 ----------------
 
 def build_main_window():
-    global root, log_text, banner_area
+    global root, log_text, log_sink, banner_area, convert_button, cancel_button
+    global get_output_format
+    import customtkinter as ctk
+    from apple_theme import (
+        apply_apple_theme, font_ui, font_title, font_mono, BUTTON_PRIMARY, BUTTON_SECONDARY,
+        BUTTON_PLAIN, CARD_STYLE, TEXTBOX_STYLE, RED, GREEN, ORANGE, TEXT_PRIMARY,
+        TEXT_SECONDARY, transparent_frame,
+    )
+    startup_timing.mark('ui_imports')
 
     root = ctk.CTk()
     apply_apple_theme(root)
+    startup_timing.mark('theme')
     root.title('Excel 转换器')
     center_window(root, 580, 820)
 
@@ -560,11 +765,11 @@ def build_main_window():
     bank_btn_row = transparent_frame(bank_card)
     bank_btn_row.pack(fill='x', padx=16, pady=(0, 16))
     ctk.CTkButton(bank_btn_row, text='单文件转换',
-                  command=lambda: open_bank_converter_window(root),
+                  command=open_bank_window,
                   font=font_ui(13, 'bold'), **BUTTON_PRIMARY
                   ).pack(side='left', fill='x', expand=True, padx=(0, 4))
     ctk.CTkButton(bank_btn_row, text='批量混合转换',
-                  command=lambda: open_batch_converter_window(root),
+                  command=open_batch_window,
                   font=font_ui(13, 'bold'), **BUTTON_SECONDARY
                   ).pack(side='left', fill='x', expand=True, padx=(4, 0))
 
@@ -593,13 +798,19 @@ def build_main_window():
     row2.pack(fill='x', padx=16, pady=2)
     ctk.CTkButton(row2, text='选择生成文件路径', command=select_save_directory,
                   font=font_ui(12), **BUTTON_SECONDARY
-                  ).pack(fill='x', expand=True)
+                  ).pack(side='left', fill='x', expand=True, padx=(0, 4))
+    format_combo, get_output_format = make_output_format_combobox(row2, width=14)
+    format_combo.pack(side='left', padx=(4, 0))
 
     row3 = transparent_frame(generic_card)
     row3.pack(fill='x', padx=16, pady=(10, 6))
-    ctk.CTkButton(row3, text='转换 Excel 文件', command=convert_excel_files,
-                  font=font_ui(13, 'bold'), **BUTTON_PRIMARY
-                  ).pack(fill='x', expand=True)
+    convert_button = ctk.CTkButton(row3, text='转换 Excel 文件', command=convert_excel_files,
+                                   font=font_ui(13, 'bold'), **BUTTON_PRIMARY)
+    convert_button.pack(side='left', fill='x', expand=True, padx=(0, 4))
+    cancel_button = ctk.CTkButton(row3, text='取消', command=cancel_conversion,
+                                  state='disabled', width=80, font=font_ui(12),
+                                  **BUTTON_PLAIN)
+    cancel_button.pack(side='left', padx=(4, 0))
 
     row4 = transparent_frame(generic_card)
     row4.pack(fill='x', padx=16, pady=(0, 14))
@@ -619,7 +830,7 @@ def build_main_window():
     ctk.CTkLabel(log_header, text='运行日志', font=font_title(13),
                  text_color=TEXT_PRIMARY).pack(side='left')
     ctk.CTkButton(log_header, text='清空',
-                  command=lambda: log_text.delete('1.0', 'end'),
+                  command=lambda: log_sink['clear'](),
                   font=font_ui(11), width=60, **BUTTON_PLAIN
                   ).pack(side='right')
 
@@ -632,8 +843,26 @@ def build_main_window():
     log_text.tag_config('warning', foreground=ORANGE)
     log_text.tag_config('success', foreground=GREEN)
 
+    # 缓冲日志：按固定频率刷新、合并连续拆分行、限制行数并写入日志文件
+    log_sink = create_log_sink(log_text, _detect_level, configured_log_path())
+
+    startup_timing.mark('window')
+    root.protocol('WM_DELETE_WINDOW', _on_main_close)
+    root.after(0, _on_first_window)
     return root
 
 
+def _on_main_close():
+    """关闭主窗口：若批量转换用过常驻进程池则先关闭，再销毁窗口。"""
+    pool = sys.modules.get('batch_pool')
+    if pool is not None:
+        pool.shutdown_pool()
+    if log_sink is not None:
+        log_sink['flush']()
+    root.destroy()
+
+
 if __name__ == '__main__':
+    # 打包后批量转换的进程池子进程需要
+    multiprocessing.freeze_support()
     build_main_window().mainloop()
@@ -0,0 +1,141 @@
+"""缓冲日志：消息先入缓冲区，由 Tk 线程按固定频率批量刷新到文本框。
+
+- 按行号连续的同类消息（逐行跳过）合并为区间，如「跳过第 5-9 行」
+- 文本框只保留最近 max_lines 行（环形缓冲），完整日志同时追加写入磁盘文件
+- write 可在任意线程调用；刷新只在 Tk 线程中进行
+"""
+from datetime import datetime
+import os
+import re
+import threading
+
+
+FLUSH_MS = 100
+MAX_LOG_LINES = 2000
+
+# 含行号、可按连续行号合并的消息；row 组为行号
+GROUPABLE_PATTERNS = (
+    re.compile(r'跳过第 (?P<row>\d+) 行'),
+)
+
+
+def configured_log_path():
+    """settings.json 中 log_dir 指定的按天滚动日志文件；log_dir 为空时不写文件。"""
+    from app_settings import BASE_DIR, get_setting
+
+    log_dir = get_setting('log_dir')
+    if not log_dir:
+        return None
+    return os.path.join(BASE_DIR, log_dir, f'convert_{datetime.now():%Y%m%d}.log')
+
+
+def _group_key(msg):
+    for pattern in GROUPABLE_PATTERNS:
+        m = pattern.search(msg)
+        if m:
+            return msg[:m.start('row')], msg[m.end('row'):], int(m.group('row'))
+    return None
+
+
+def _render_group(group):
+    head, tail, start, end, count, _ = group
+    if count == 1:
+        return f'{head}{start}{tail}'
+    return f'{head}{start}-{end}{tail}（{count} 条）'
+
+
+def create_log_sink(widget, detect_level, log_path=None,
+                    max_lines=MAX_LOG_LINES, flush_ms=FLUSH_MS):
+    """为文本框创建缓冲日志，返回 dict：write(msg, level=None) / flush() / clear()。
+
+    detect_level(msg) 在 level 为 None 时决定染色 tag（'info' 或 None 表示不染色）。
+    log_path 为 None 时不写文件；写文件失败后不再重试，不影响界面日志。
+    """
+    lock = threading.Lock()
+    pending = []          # [(text, level)]
+    state = {'group': None, 'file_ok': log_path is not None}
+
+    def _close_group():
+        group = state['group']
+        if group is not None:
+            pending.append((_render_group(group), group[5]))
+            state['group'] = None
+
+    def write(msg, level=None):
+        msg = msg.rstrip('\n')
+        if level is None:
+            level = detect_level(msg)
+        key = _group_key(msg)
+        with lock:
+            group = state['group']
+            if (key is not None and group is not None and key[:2] == group[:2]
+                    and key[2] == group[3] + 1 and level == group[5]):
+                state['group'] = (group[0], group[1], group[2], key[2], group[4] + 1, level)
+                return
+            _close_group()
+            if key is not None:
+                state['group'] = (key[0], key[1], key[2], key[2], 1, level)
+            else:
+                pending.append((msg, level))
+
+    def _take():
+        with lock:
+            _close_group()
+            lines = pending[:]
+            pending.clear()
+        return lines
+
+    def _write_file(lines):
+        if not state['file_ok']:
+            return
+        stamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        try:
+            os.makedirs(os.path.dirname(log_path) or '.', exist_ok=True)
+            with open(log_path, 'a', encoding='utf-8') as f:
+                f.writelines(f'[{stamp}] {text.strip(chr(10))}\n' for text, _ in lines)
+        except OSError:
+            state['file_ok'] = False
+
+    def flush():
+        lines = _take()
+        if not lines:
+            return
+        _write_file(lines)
+        try:
+            # 相邻同级别的行合并为一次 insert
+            run_text, run_level = [], lines[0][1]
+            for text, level in lines + [(None, object())]:
+                if level != run_level:
+                    chunk = ''.join(run_text)
+                    if run_level in (None, 'info'):
+                        widget.insert('end', chunk)
+                    else:
+                        widget.insert('end', chunk, run_level)
+                    run_text, run_level = [], level
+                if text is not None:
+                    run_text.append(text + '\n')
+            total = int(widget.index('end-1c').split('.')[0])
+            if total > max_lines:
+                widget.delete('1.0', f'{total - max_lines + 1}.0')
+            widget.see('end')
+        except Exception:
+            pass
+
+    def clear():
+        _write_file(_take())
+        try:
+            widget.delete('1.0', 'end')
+        except Exception:
+            pass
+
+    def tick():
+        try:
+            if not widget.winfo_exists():
+                return
+        except Exception:
+            return
+        flush()
+        widget.after(flush_ms, tick)
+
+    widget.after(flush_ms, tick)
+    return {'write': write, 'flush': flush, 'clear': clear}
@@ -0,0 +1,216 @@
+"""内存计量：按阶段记录峰值内存，批量转换前估算峰值并与内存预算比较。
+
+开启后（settings.json 的 memory_tracking 或命令行 --memory）两种口径同时记录：
+    Python 分配  tracemalloc 的峰值，只含 Python 对象（DataFrame 的 numpy 缓冲区也计入）
+    RSS          后台线程每 RSS_SAMPLE_MS 毫秒采样一次进程常驻内存，取阶段内最大值
+stage_metrics.stage 在每个阶段开始时重置峰值、结束时读取，写入该阶段的 peak_traced /
+peak_rss（字节）。tracemalloc 会让转换变慢数倍，只在排查时开启。
+
+批量预算：按源文件大小和经验系数估算峰值（界面进程持有全部转换结果，另有与进程数
+相同个数的文件同时在子进程中转换），超过 memory_budget_mb（0 为物理内存的一半）时提示。
+"""
+from contextlib import contextmanager
+import os
+import sys
+import threading
+import tracemalloc
+
+
+RSS_SAMPLE_MS = 50
+# 源文件每字节对应的内存（经验系数，合成流水实测）：(转换结果常驻, 转换中峰值)
+MEMORY_FACTORS = {'.xlsx': (20, 30), '.xlsm': (20, 30)}
+DEFAULT_FACTORS = (4, 6)  # xls 等未压缩格式
+
+_STATE = {'depth': 0, 'sampler': None, 'stop': None, 'peak_rss': 0, 'own_trace': False}
+_LOCK = threading.Lock()
+
+
+# ---------------- RSS ----------------
+
+def _windows_rss():
+    import ctypes
+    from ctypes import wintypes
+
+    class Counters(ctypes.Structure):
+        _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD),
+                    ('PeakWorkingSetSize', ctypes.c_size_t),
+                    ('WorkingSetSize', ctypes.c_size_t),
+                    ('QuotaPeakPagedPoolUsage', ctypes.c_size_t),
+                    ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                    ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t),
+                    ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                    ('PagefileUsage', ctypes.c_size_t),
+                    ('PeakPagefileUsage', ctypes.c_size_t)]
+
+    counters = Counters()
+    counters.cb = ctypes.sizeof(counters)
+    process = ctypes.windll.kernel32.GetCurrentProcess()
+    if not ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters),
+                                                    counters.cb):
+        return None
+    return counters.WorkingSetSize
+
+
+def current_rss():
+    """当前进程常驻内存（字节）；取不到时返回 None。"""
+    try:
+        if sys.platform == 'win32':
+            return _windows_rss()
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError, IndexError):
+        pass
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return psutil.Process().memory_info().rss
+
+
+def physical_memory():
+    """物理内存总量（字节）；取不到时返回 None。"""
+    try:
+        if sys.platform == 'win32':
+            import ctypes
+
+            class Status(ctypes.Structure):
+                _fields_ = [('dwLength', ctypes.c_ulong), ('dwMemoryLoad', ctypes.c_ulong),
+                            ('ullTotalPhys', ctypes.c_ulonglong),
+                            ('ullAvailPhys', ctypes.c_ulonglong),
+                            ('ullTotalPageFile', ctypes.c_ulonglong),
+                            ('ullAvailPageFile', ctypes.c_ulonglong),
+                            ('ullTotalVirtual', ctypes.c_ulonglong),
+                            ('ullAvailVirtual', ctypes.c_ulonglong),
+                            ('ullAvailExtendedVirtual', ctypes.c_ulonglong)]
+
+            status = Status()
+            status.dwLength = ctypes.sizeof(status)
+            ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status))
+            return status.ullTotalPhys or None
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _sample(stop):
+    while not stop.wait(RSS_SAMPLE_MS / 1000):
+        rss = current_rss()
+        if rss and rss > _STATE['peak_rss']:
+            _STATE['peak_rss'] = rss
+
+
+# ---------------- 跟踪开关 ----------------
+
+def tracking_enabled(memory=None):
+    """memory 为 None 时取 settings.json 的 memory_tracking。"""
+    if memory is not None:
+        return bool(memory)
+    from app_settings import get_setting
+    return bool(get_setting('memory_tracking'))
+
+
+def is_tracking():
+    return _STATE['depth'] > 0
+
+
+def start_tracking():
+    """开始 tracemalloc 与 RSS 采样；可嵌套，与 stop_tracking 成对调用。"""
+    with _LOCK:
+        _STATE['depth'] += 1
+        if _STATE['depth'] > 1:
+            return
+        # 已在跟踪（如 -X tracemalloc）时不接管，stop_tracking 也不停止
+        _STATE['own_trace'] = not tracemalloc.is_tracing()
+        if _STATE['own_trace']:
+            tracemalloc.start()
+        _STATE['peak_rss'] = current_rss() or 0
+        stop = threading.Event()
+        sampler = threading.Thread(target=_sample, args=(stop,), daemon=True)
+        sampler.start()
+        _STATE.update(sampler=sampler, stop=stop)
+
+
+def stop_tracking():
+    with _LOCK:
+        _STATE['depth'] -= 1
+        if _STATE['depth'] > 0:
+            return
+        _STATE['stop'].set()
+        _STATE['sampler'].join()
+        _STATE.update(sampler=None, stop=None)
+        if _STATE['own_trace']:
+            tracemalloc.stop()
+            _STATE['own_trace'] = False
+
+
+@contextmanager
+def tracked(enabled):
+    """enabled 时在块内开启内存跟踪。"""
+    if not enabled:
+        yield
+        return
+    start_tracking()
+    try:
+        yield
+    finally:
+        stop_tracking()
+
+
+def reset_peak():
+    """从现在起重新计峰值（阶段开始时调用）。"""
+    if hasattr(tracemalloc, 'reset_peak'):
+        tracemalloc.reset_peak()
+    _STATE['peak_rss'] = current_rss() or 0
+
+
+def read_peak():
+    """返回 (Python 分配峰值, RSS 峰值)，单位字节；RSS 取不到时为 None。"""
+    rss = current_rss()
+    if rss and rss > _STATE['peak_rss']:
+        _STATE['peak_rss'] = rss
+    return tracemalloc.get_traced_memory()[1], _STATE['peak_rss'] or None
+
+
+# ---------------- 批量预算 ----------------
+
+def memory_budget():
+    """settings.json 的 memory_budget_mb（字节）；为 0 时取物理内存的一半，取不到时 None。"""
+    from app_settings import get_setting
+
+    try:
+        budget_mb = int(get_setting('memory_budget_mb'))
+    except (TypeError, ValueError):
+        budget_mb = 0
+    if budget_mb > 0:
+        return budget_mb * 2**20
+    total = physical_memory()
+    return total // 2 if total else None
+
+
+def estimate_batch_peak(paths, workers=1):
+    """估算批量转换的峰值内存（字节）：全部结果常驻 + 最大的 workers 个文件同时转换。"""
+    held = []
+    peaks = []
+    for path in paths:
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            continue
+        held_factor, peak_factor = MEMORY_FACTORS.get(
+            os.path.splitext(path)[1].lower(), DEFAULT_FACTORS)
+        held.append(size * held_factor)
+        peaks.append(size * peak_factor)
+    return sum(held) + sum(sorted(peaks, reverse=True)[:max(1, workers)])
+
+
+def check_batch_budget(paths, workers=1):
+    """预计超出内存预算时返回提示文本，否则返回 ''。"""
+    budget = memory_budget()
+    if not budget:
+        return ''
+    estimate = estimate_batch_peak(paths, workers)
+    if estimate <= budget:
+        return ''
+    return (f'警告: 预计峰值内存约 {estimate / 2**20:.0f} MB，超过内存预算 '
+            f'{budget / 2**20:.0f} MB（settings.json 的 memory_budget_mb），'
+            f'可能内存不足；可分几批合并，或减少并行进程数')
@@ -0,0 +1,172 @@
+"""银行规则注册表：bank_rules.json 读取一次、校验结构并预编译，文件修改后才重新加载。
+
+get_rules 按文件修改时间（mtime）判断是否需要重读；未变化时直接返回缓存。
+每条规则加载时经 validate_rule 校验，有误的银行不进入注册表，错误信息
+指明银行和字段，如「农业银行 / account_extract.银行账号.pattern：正则无效」。
+校验通过的规则由 bank_engine.compile_rule 编译为执行计划（正则已编译、
+列已解析），转换时通过 compiled_rule 取用，不再逐行解释规则 dict。
+"""
+import json
+import os
+import re
+
+
+DEBIT_CREDIT_MODES = ('two_columns', 'signed_amount', 'marker_column')
+ACCOUNT_EXTRACT_MODES = ('cell', 'regex')
+MARKER_COLUMN_KEYS = ('col', 'amount_col', 'jie_value', 'dai_value')
+
+_CELL_RE = re.compile(r'^[A-Z]{1,3}[1-9]\d*$')
+
+# 绝对路径 → {'mtime', 'rules', 'errors'}
+_REGISTRY = {}
+# id(规则 dict) → (规则 dict, 执行计划)；持有规则 dict 本身，id 不会被复用
+_PLANS = {}
+
+
+# ---------------- 结构校验 ----------------
+
+def _check_source(source):
+    if isinstance(source, str) and source:
+        return True
+    return (isinstance(source, list) and bool(source)
+            and all(isinstance(s, str) and s for s in source))
+
+
+def _validate_mapping(cm, templates, err):
+    if not isinstance(cm, dict) or not cm:
+        err('column_mapping', '须为非空对象')
+        return
+    for tpl_field, spec in cm.items():
+        field = f'column_mapping.{tpl_field}'
+        if tpl_field not in templates:
+            err(field, '不是模板列')
+        elif spec is None or (isinstance(spec, str) and spec):
+            continue
+        elif not isinstance(spec, dict):
+            err(field, '须为源列名、对象或 null')
+        elif not _check_source(spec.get('source')):
+            err(f'{field}.source', '须为源列名或源列名列表')
+        else:
+            for key in ('in_fmt', 'out_fmt', 'join'):
+                if key in spec and not isinstance(spec[key], str):
+                    err(f'{field}.{key}', '须为字符串')
+
+
+def _validate_account(extract, err):
+    if not isinstance(extract, dict):
+        err('account_extract', '须为对象')
+        return
+    for tpl_field, spec in extract.items():
+        field = f'account_extract.{tpl_field}'
+        if not isinstance(spec, dict):
+            err(field, '须为对象')
+            continue
+        mode = spec.get('mode', 'cell')
+        if mode not in ACCOUNT_EXTRACT_MODES:
+            err(f'{field}.mode', f'取值须为 {" / ".join(ACCOUNT_EXTRACT_MODES)}')
+        cell = spec.get('cell')
+        if not isinstance(cell, str) or not _CELL_RE.match(cell):
+            err(f'{field}.cell', '须为单元格地址，如 B2')
+        if mode == 'regex':
+            try:
+                if re.compile(spec.get('pattern') or '').groups < 1:
+                    err(f'{field}.pattern', '正则须包含一个捕获组')
+            except (re.error, TypeError) as e:
+                err(f'{field}.pattern', f'正则无效: {e}')
+
+
+def validate_rule(bank, rule):
+    """校验一条银行规则，返回错误信息列表（空列表表示通过）。"""
+    from bank_converter import BANK_TEMPLATE_HEADERS
+
+    errors = []
+
+    def err(field, msg):
+        errors.append(f'{bank} / {field}：{msg}')
+
+    if not isinstance(rule, dict):
+        err('(规则)', '须为对象')
+        return errors
+
+    _validate_mapping(rule.get('column_mapping'), BANK_TEMPLATE_HEADERS, err)
+
+    # skip_top_rows 只是说明性字段（转换按 header_row 定位表头），不校验
+    header_row = rule.get('header_row', 1)
+    if isinstance(header_row, bool) or not isinstance(header_row, int) or header_row < 1:
+        err('header_row', '须为不小于 1 的整数')
+
+    mode = rule.get('debit_credit_mode', 'two_columns')
+    if mode not in DEBIT_CREDIT_MODES:
+        err('debit_credit_mode', f'取值须为 {" / ".join(DEBIT_CREDIT_MODES)}')
+    elif mode == 'signed_amount' and not isinstance(rule.get('amount_column'), str):
+        err('amount_column', 'signed_amount 模式须指定金额列')
+    elif mode == 'marker_column':
+        mc = rule.get('marker_column')
+        if not isinstance(mc, dict):
+            err('marker_column', 'marker_column 模式须为对象')
+        else:
+            for key in MARKER_COLUMN_KEYS:
+                if not isinstance(mc.get(key), str):
+                    err(f'marker_column.{key}', '须为字符串')
+
+    if not isinstance(rule.get('fixed_values', {}), dict):
+        err('fixed_values', '须为对象')
+    if not isinstance(rule.get('bank_type_code', ''), str):
+        err('bank_type_code', '须为字符串')
+    if rule.get('account_extract') is not None:
+        _validate_account(rule['account_extract'], err)
+    return errors
+
+
+# ---------------- 加载与缓存 ----------------
+
+def _load(path, mtime):
+    from bank_engine import compile_rule
+
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if not isinstance(data, dict):
+        raise ValueError('规则文件顶层须为对象')
+
+    rules, errors = {}, []
+    for bank, rule in data.items():
+        if bank.startswith('_'):
+            continue
+        problems = validate_rule(bank, rule)
+        if problems:
+            errors.extend(problems)
+            continue
+        rules[bank] = rule
+        _PLANS[id(rule)] = (rule, compile_rule(rule))
+    return {'mtime': mtime, 'rules': rules, 'errors': errors}
+
+
+def get_rules(rules_file):
+    """返回 (规则 dict, 错误信息列表)；文件未修改时直接用缓存。
+
+    文件不存在时抛出 FileNotFoundError，JSON 格式错误时抛出原异常。
+    返回的规则 dict 为共享缓存，调用方不应修改。
+    """
+    path = os.path.abspath(rules_file)
+    mtime = os.stat(path).st_mtime_ns
+    entry = _REGISTRY.get(path)
+    if entry is None or entry['mtime'] != mtime:
+        if entry is not None:
+            for rule in entry['rules'].values():
+                _PLANS.pop(id(rule), None)
+        entry = _REGISTRY[path] = _load(path, mtime)
+    return dict(entry['rules']), list(entry['errors'])
+
+
+def compiled_rule(rule):
+    """取规则的执行计划：注册表中的规则用预编译结果，其他（如子进程中的副本）现场编译。"""
+    cached = _PLANS.get(id(rule))
+    if cached is not None and cached[0] is rule:
+        return cached[1]
+    from bank_engine import compile_rule
+    return compile_rule(rule)
+
+
+def clear_registry():
+    _REGISTRY.clear()
+    _PLANS.clear()
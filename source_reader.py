@@ -0,0 +1,312 @@
+"""源文件读取：每个工作簿只打开一次，同时取顶部单元格和数据表。
+
+读取后端可插拔（READER_BACKENDS）：
+    calamine  python-calamine（Rust 实现），读 xlsx/xlsm/xlsb/xls/ods 最快
+    openpyxl  只读模式，xlsx/xlsm；流式分块读取只支持它
+    xlrd      旧版 .xls
+choose_backend 按 settings.json 的 reader_backend、扩展名和文件大小选择：auto 时
+不小于 CALAMINE_MIN_BYTES 的 xlsx 用 calamine（与 openpyxl 的逐值一致性见
+tests/test_source_reader.py），其余 xlsx 用 openpyxl，.xls 用 xlrd（未安装时退回 calamine）；
+都不可用时交给 pd.read_excel 自行选择引擎，单元格视为读不到。
+
+打开后先按地址读顶部单元格（账户信息），再把同一个 workbook 交给 pandas 读表，
+不再为单元格和数据表各解压、解析一遍。
+
+iter_table_chunks 按固定行数分块流式读取（openpyxl 只读模式逐行解析），
+每块的取值与 pd.read_excel(dtype=str) 整表读取完全一致，内存只与块大小有关。
+"""
+import importlib.util
+import os
+
+import pandas as pd
+from pandas.io.parsers import TextParser
+
+from app_settings import get_setting
+
+
+CHUNK_ROWS = 50000
+
+# 后端名 → (依赖模块, 支持的扩展名)
+READER_BACKENDS = {
+    'calamine': ('python_calamine', ('.xlsx', '.xlsm', '.xlsb', '.xls', '.ods')),
+    'openpyxl': ('openpyxl', ('.xlsx', '.xlsm')),
+    'xlrd': ('xlrd', ('.xls',)),
+}
+# auto 时 xlsx 不小于该大小才用 calamine：小文件差距可忽略，且与历史输出逐字节一致
+CALAMINE_MIN_BYTES = 1024 * 1024
+
+
+def backend_available(name):
+    module = READER_BACKENDS.get(name, (None,))[0]
+    return module is not None and importlib.util.find_spec(module) is not None
+
+
+def backend_supports(name, file_path):
+    ext = os.path.splitext(file_path)[1].lower()
+    return name in READER_BACKENDS and ext in READER_BACKENDS[name][1]
+
+
+def choose_backend(file_path, preferred=None, streaming=False):
+    """选择读取后端，返回后端名；没有合适后端时返回 None（交给 pandas 默认引擎）。
+
+    preferred 缺省取 settings.json 的 reader_backend；指定的后端未安装或
+    不支持该扩展名时按 auto 处理。streaming=True 时 xlsx 固定用 openpyxl。
+    """
+    if streaming and backend_supports('openpyxl', file_path):
+        return 'openpyxl'
+
+    preferred = preferred or get_setting('reader_backend')
+    if (preferred and preferred != 'auto' and backend_available(preferred)
+            and backend_supports(preferred, file_path)):
+        return preferred
+
+    if backend_supports('openpyxl', file_path):
+        try:
+            large = os.path.getsize(file_path) >= CALAMINE_MIN_BYTES
+        except OSError:
+            large = False
+        candidates = ('calamine', 'openpyxl') if large else ('openpyxl',)
+    else:
+        candidates = ('xlrd', 'calamine')
+    for name in candidates:
+        if backend_available(name) and backend_supports(name, file_path):
+            return name
+    return None
+
+
+def _load_book(file_path, backend):
+    # 打开参数与 pandas 各读取器内部一致，保证读出的表与 pd.read_excel 相同
+    if backend == 'openpyxl':
+        from openpyxl import load_workbook
+        return load_workbook(file_path, read_only=True, data_only=True, keep_links=False)
+    if backend == 'calamine':
+        from python_calamine import load_workbook
+        return load_workbook(file_path)
+    if backend == 'xlrd':
+        import xlrd
+        return xlrd.open_workbook(file_path)
+    return None
+
+
+def open_source(file_path, backend=None, streaming=False):
+    """打开源文件，返回 source dict：path / backend / book。
+
+    backend 缺省由 choose_backend 决定；打开失败时 book 为 None，读表交给 pd.read_excel。
+    """
+    backend = backend or choose_backend(file_path, streaming=streaming)
+    try:
+        book = _load_book(file_path, backend)
+    except Exception:
+        book = None
+    return {'path': file_path, 'backend': backend if book is not None else None,
+            'book': book}
+
+
+def close_source(source):
+    book = source.get('book')
+    if book is not None:
+        if hasattr(book, 'close'):
+            book.close()
+        elif hasattr(book, 'release_resources'):
+            book.release_resources()
+        source['book'] = None
+
+
+def _plain_value(value):
+    """各后端单元格值统一口径：空 → None，整数值浮点 → int（与 openpyxl 一致）。"""
+    if value == '':
+        return None
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def _calamine_cells(book, positions):
+    max_row = max(r for r, _ in positions.values())
+    rows = book.get_sheet_by_index(0).to_python(skip_empty_area=False, nrows=max_row)
+    values = {}
+    for addr, (r, c) in positions.items():
+        in_range = r <= len(rows) and c <= len(rows[r - 1])
+        values[addr] = _plain_value(rows[r - 1][c - 1]) if in_range else None
+    return values
+
+
+def _xlrd_cells(book, positions):
+    import xlrd
+
+    sheet = book.sheet_by_index(0)
+    values = {}
+    for addr, (r, c) in positions.items():
+        if r > sheet.nrows or c > sheet.ncols:
+            values[addr] = None
+            continue
+        cell = sheet.cell(r - 1, c - 1)
+        if cell.ctype == xlrd.XL_CELL_DATE:
+            values[addr] = xlrd.xldate_as_datetime(cell.value, book.datemode)
+        else:
+            values[addr] = _plain_value(cell.value)
+    return values
+
+
+def read_cells(source, addresses):
+    """读取首个工作表中的若干单元格，返回 {地址: 值}。
+
+    超出数据范围的单元格为 None（各后端一致）；地址无效或读取失败时不在结果中。
+    """
+    book = source.get('book')
+    if book is None or not addresses:
+        return {}
+    if source['backend'] == 'openpyxl':
+        ws = book.worksheets[0]
+        values = {}
+        for addr in addresses:
+            try:
+                values[addr] = ws[addr].value
+            except Exception:
+                continue
+        return values
+
+    from openpyxl.utils.cell import coordinate_to_tuple
+
+    positions = {}
+    for addr in addresses:
+        try:
+            positions[addr] = coordinate_to_tuple(addr)
+        except Exception:
+            continue
+    if not positions:
+        return {}
+    try:
+        if source['backend'] == 'calamine':
+            return _calamine_cells(book, positions)
+        return _xlrd_cells(book, positions)
+    except Exception:
+        return {}
+
+
+def read_top_rows(source, nrows):
+    """读取首个工作表的前 nrows 行原始值（列表的列表，行尾空单元格可能保留）。
+
+    只解析所需的行，用于按表头识别银行等轻量场景；读取失败时返回 []。
+    """
+    book = source.get('book')
+    try:
+        if book is None:
+            df = pd.read_excel(source['path'], header=None, nrows=nrows, dtype=str)
+            return [[None if pd.isna(v) else v for v in row]
+                    for row in df.itertuples(index=False, name=None)]
+        if source['backend'] == 'openpyxl':
+            ws = book.worksheets[0]
+            ws.reset_dimensions()
+            return [list(row) for row in ws.iter_rows(max_row=nrows, values_only=True)]
+        if source['backend'] == 'calamine':
+            rows = book.get_sheet_by_index(0).to_python(skip_empty_area=False, nrows=nrows)
+            return [[_plain_value(v) for v in row] for row in rows]
+        sheet = book.sheet_by_index(0)
+        return [[_plain_value(v) for v in sheet.row_values(r)]
+                for r in range(min(nrows, sheet.nrows))]
+    except Exception:
+        return []
+
+
+def open_excel_file(source):
+    """在已打开的 workbook 上构造 pd.ExcelFile（多工作表逐个 parse 时不重复打开）。
+
+    ExcelFile 关闭时会一并关闭 workbook，交出后 source 不再持有它。
+    """
+    book = source.get('book')
+    if book is None:
+        return pd.ExcelFile(source['path'])
+    source['book'] = None
+    return pd.ExcelFile(book, engine=source['backend'])
+
+
+def read_table(source, header_row=1, nrows=None):
+    """读取首个工作表，第 header_row 行为表头，全部按文本（dtype=str）。
+
+    pandas 读完会关闭传入的 workbook，因此需要的单元格应先用 read_cells 取出。
+    """
+    with open_excel_file(source) as xls:
+        return xls.parse(sheet_name=0, header=header_row - 1, dtype=str, nrows=nrows)
+
+
+def read_source(file_path, header_row=1, addresses=(), nrows=None, backend=None):
+    """打开一次文件，返回 (DataFrame, {地址: 值})。读表失败时抛出原异常。"""
+    source = open_source(file_path, backend)
+    try:
+        cells = read_cells(source, addresses)
+        return read_table(source, header_row, nrows), cells
+    finally:
+        close_source(source)
+
+
+def _convert_cell(cell):
+    """与 pandas openpyxl 读取器的单元格转换一致：空 → ''，整数值浮点 → int。"""
+    from openpyxl.cell.cell import TYPE_ERROR, TYPE_NUMERIC
+
+    value = cell.value
+    if value is None:
+        return ''
+    if cell.data_type == TYPE_ERROR:
+        return float('nan')
+    if cell.data_type == TYPE_NUMERIC:
+        as_int = int(value)
+        return as_int if as_int == value else float(value)
+    return value
+
+
+def _trimmed_rows(ws):
+    """逐行产出已去掉行尾空单元格的取值列表（与 pandas 相同）；末尾的连续空行不产出。"""
+    pending_empty = 0
+    for row in ws.rows:
+        values = [_convert_cell(cell) for cell in row]
+        while values and values[-1] == '':
+            values.pop()
+        if not values:
+            pending_empty += 1
+            continue
+        for _ in range(pending_empty):
+            yield []
+        pending_empty = 0
+        yield values
+
+
+def _parse_chunk(header, rows, offset):
+    width = max([len(header)] + [len(r) for r in rows])
+    data = [r + [''] * (width - len(r)) for r in [header] + rows]
+    df = TextParser(data, header=0, dtype=str, skip_blank_lines=False).read()
+    df.index = pd.RangeIndex(offset, offset + len(df))
+    return df
+
+
+def iter_table_chunks(source, header_row=1, chunk_rows=CHUNK_ROWS):
+    """分块读取首个工作表，逐块产出 DataFrame（dtype=str，索引在整表中连续）。
+
+    非 openpyxl 后端退回整表读取后再切块。表头行不存在时抛出 ValueError。
+    """
+    book = source.get('book')
+    if source.get('backend') != 'openpyxl':
+        df = read_table(source, header_row)
+        for start in range(0, len(df), chunk_rows):
+            yield df.iloc[start:start + chunk_rows]
+        return
+
+    ws = book.worksheets[0]
+    ws.reset_dimensions()
+    rows = _trimmed_rows(ws)
+    header = None
+    for _ in range(header_row):
+        header = next(rows, None)
+        if header is None:
+            raise ValueError(f'表头行 {header_row} 超出工作表数据范围')
+
+    offset = 0
+    chunk = []
+    for values in rows:
+        chunk.append(values)
+        if len(chunk) >= chunk_rows:
+            yield _parse_chunk(header, chunk, offset)
+            offset += len(chunk)
+            chunk = []
+    if chunk:
+        yield _parse_chunk(header, chunk, offset)
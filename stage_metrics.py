@@ -0,0 +1,209 @@
+"""转换各阶段计量：每个阶段（读取、账户信息、转换、写出……）的耗时、行数、字节数。
+
+每个文件一条 record（批量合并另有一条 batch 记录），各阶段用 stage 计时：
+
+    record = new_record('bank', 文件路径, bank='招商银行')
+    with stage(record, 'read', nbytes=file_size(路径)) as s:
+        df = ...
+        s['rows'] = len(df)
+
+日志中每个文件输出 summary_lines 的一两行汇总；完整记录由 save_records 追加到日志
+目录下的 metrics.jsonl（log_dir 为空时不写）。record 为 None 时 stage 只计时不记录。
+
+性能分析（settings.json 的 profile 或命令行 --profile）：整次运行在 cProfile 下执行，
+统计写到日志目录 profile/ 下的 .prof 文件（python -m pstats 或 snakeviz 查看）；
+银行流水另按规则字段计时（column_mapping 各模板列、借贷归一），记入 record['fields']。
+
+内存跟踪开启时（见 memory_meter），每个阶段另记 peak_traced / peak_rss（字节），
+汇总行后附一行各阶段峰值内存。阶段之间不嵌套，各阶段峰值互不包含。
+"""
+from contextlib import contextmanager
+from datetime import datetime
+import json
+import os
+import re
+import time
+
+import memory_meter
+
+
+METRICS_FILE = 'metrics.jsonl'
+PROFILE_DIR = 'profile'
+SUMMARY_FIELDS = 5  # 汇总行中列出的最耗时字段数
+
+STAGE_LABELS = {
+    'cache': '缓存查找', 'read': '读取', 'account': '账户信息', 'transform': '转换',
+    'cache_save': '写缓存', 'stream': '流式读写', 'convert': '并行转换',
+    'merge': '合并查重', 'map': '列映射', 'split': '拆分', 'date': '日期格式',
+    'write': '写出',
+}
+
+
+def new_record(kind, file='', profile=False, **extra):
+    """kind 取 bank / batch / generic；profile=True 时附带按字段计时的 fields。"""
+    record = {'time': datetime.now().isoformat(timespec='seconds'),
+              'kind': kind, 'file': file, 'stages': []}
+    record.update(extra)
+    if profile:
+        record['fields'] = {}
+    return record
+
+
+@contextmanager
+def stage(record, name, rows=None, nbytes=None):
+    """计时一个阶段；产出的 dict 可在块内补填 rows / bytes。异常时同样记录。"""
+    info = {'name': name, 'seconds': 0.0, 'rows': rows, 'bytes': nbytes}
+    tracking = memory_meter.is_tracking()
+    if tracking:
+        memory_meter.reset_peak()
+    start = time.perf_counter()
+    try:
+        yield info
+    finally:
+        info['seconds'] = round(time.perf_counter() - start, 4)
+        if tracking:
+            info['peak_traced'], info['peak_rss'] = memory_meter.read_peak()
+        if record is not None:
+            record['stages'].append(info)
+
+
+def add_field_time(fields, name, seconds):
+    """按规则字段累计耗时（流式转换时各块累加）；fields 为 None 时忽略。"""
+    if fields is not None:
+        fields[name] = fields.get(name, 0.0) + seconds
+
+
+def file_size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return None
+
+
+def output_size(parts):
+    """write_text_table 记入 parts 的各输出文件总字节数。"""
+    return sum(file_size(path) or 0 for path in {path for path, _, _ in parts})
+
+
+def total_seconds(record):
+    return round(sum(s['seconds'] for s in record['stages']), 4)
+
+
+def peak_memory(record):
+    """各阶段 RSS 峰值的最大值（字节）；未跟踪内存时返回 None。"""
+    peaks = [s['peak_rss'] for s in record['stages'] if s.get('peak_rss')]
+    return max(peaks) if peaks else None
+
+
+def _format_bytes(n):
+    if n >= 2**20:
+        return f'{n / 2**20:.1f} MB'
+    return f'{n / 1024:.0f} KB'
+
+
+def summary_lines(record):
+    """如「  耗时 0.85s：读取 0.41s（12000 行，1.2 MB）· 转换 0.12s · 写出 0.30s」，
+    跟踪内存时加一行各阶段峰值内存，分析模式下再加一行最耗时的字段和 .prof 路径。"""
+    parts = []
+    for s in record['stages']:
+        extra = []
+        if s.get('rows') is not None:
+            extra.append(f'{s["rows"]} 行')
+        if s.get('bytes'):
+            extra.append(_format_bytes(s['bytes']))
+        text = f'{STAGE_LABELS.get(s["name"], s["name"])} {s["seconds"]:.2f}s'
+        parts.append(text + (f'（{"，".join(extra)}）' if extra else ''))
+    lines = [f'  耗时 {total_seconds(record):.2f}s：' + ' · '.join(parts)]
+    tracked = [s for s in record['stages'] if 'peak_traced' in s]
+    if tracked:
+        peak = peak_memory(record)
+        head = f'  峰值内存 {peak / 2**20:.0f} MB' if peak else '  峰值内存'
+        lines.append(head + '（RSS / Python 分配）：' + ' · '.join(
+            f'{STAGE_LABELS.get(s["name"], s["name"])} '
+            f'{(s["peak_rss"] or 0) / 2**20:.0f} / {s["peak_traced"] / 2**20:.0f} MB'
+            for s in tracked))
+    fields = sorted(record.get('fields', {}).items(), key=lambda kv: kv[1], reverse=True)
+    if fields:
+        lines.append('  按字段：' + ' · '.join(
+            f'{name} {seconds:.3f}s' for name, seconds in fields[:SUMMARY_FIELDS]))
+    if record.get('profile'):
+        lines.append(f'  性能分析已写入 {record["profile"]}')
+    return lines
+
+
+def _log_dir():
+    from app_settings import BASE_DIR, get_setting
+
+    log_dir = get_setting('log_dir')
+    return os.path.join(BASE_DIR, log_dir) if log_dir else None
+
+
+def save_records(records):
+    """追加到 <log_dir>/metrics.jsonl，每条一行；log_dir 为空或写入失败时忽略。
+
+    跟踪了内存的记录另写整个文件的 peak_rss / peak_traced（各阶段最大值）。
+    """
+    log_dir = _log_dir()
+    if not log_dir or not records:
+        return
+    for record in records:
+        traced = [s['peak_traced'] for s in record['stages'] if 'peak_traced' in s]
+        if traced:
+            record.update(peak_rss=peak_memory(record), peak_traced=max(traced))
+    try:
+        os.makedirs(log_dir, exist_ok=True)
+        with open(os.path.join(log_dir, METRICS_FILE), 'a', encoding='utf-8') as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+    except OSError:
+        pass
+
+
+# ---------------- 性能分析 ----------------
+
+def profiling_enabled(profile=None):
+    """profile 为 None 时取 settings.json 的 profile。"""
+    if profile is not None:
+        return bool(profile)
+    from app_settings import get_setting
+    return bool(get_setting('profile'))
+
+
+def dump_profile(profiler, name):
+    """把 cProfile 统计写到 <log_dir>/profile/时间_名称_进程号.prof，返回路径；失败返回 None。"""
+    log_dir = _log_dir()
+    if not log_dir:
+        return None
+    name = re.sub(r'[\\/:*?"<>|\s]+', '_', os.path.splitext(os.path.basename(name))[0])
+    path = os.path.join(log_dir, PROFILE_DIR,
+                        f'{datetime.now():%Y%m%d_%H%M%S}_{name}_{os.getpid()}.prof')
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        profiler.dump_stats(path)
+    except OSError:
+        return None
+    return path
+
+
+@contextmanager
+def profiled(name, enabled, record=None):
+    """enabled 时在 cProfile 下执行块内代码（只分析当前线程），结束后写出统计。
+
+    产出 dict，块结束后其 'path' 为 .prof 路径（未启用或写出失败为 None）；
+    record 不为 None 时同时记入 record['profile']。
+    """
+    result = {'path': None}
+    if not enabled:
+        yield result
+        return
+    import cProfile
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield result
+    finally:
+        profiler.disable()
+        result['path'] = dump_profile(profiler, name)
+        if record is not None and result['path']:
+            record['profile'] = result['path']
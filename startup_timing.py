@@ -0,0 +1,55 @@
+"""启动耗时记录：入口最先导入本模块，按阶段打点，首屏出现后汇总。
+
+计时起点为本模块被导入的时刻（解释器已启动；PyInstaller 单文件版的解包时间不含在内）。
+每次启动的结果追加到日志目录下的 startup.jsonl，便于跟踪首屏时间的变化。
+"""
+from datetime import datetime
+import json
+import os
+import sys
+import time
+
+
+_T0 = time.perf_counter()
+_MARKS = []
+
+
+def mark(stage):
+    """记录阶段 stage 结束时刻（相对起点的秒数）。"""
+    _MARKS.append((stage, time.perf_counter() - _T0))
+
+
+def marks():
+    return list(_MARKS)
+
+
+def format_report():
+    """如「启动耗时：imports 0.41s · theme 0.05s · window 0.22s · first_window 0.70s」。"""
+    parts = []
+    last = 0.0
+    for stage, at in _MARKS:
+        parts.append(f'{stage} {at - last:.2f}s')
+        last = at
+    return f'启动耗时 {last:.2f}s（' + ' · '.join(parts) + '）'
+
+
+def save_report():
+    """追加一行 JSON 到 <log_dir>/startup.jsonl；log_dir 为空或写入失败时忽略。"""
+    from app_settings import BASE_DIR, get_setting
+
+    log_dir = get_setting('log_dir')
+    if not log_dir:
+        return
+    record = {
+        'time': datetime.now().isoformat(timespec='seconds'),
+        'frozen': bool(getattr(sys, 'frozen', False)),
+        'total': round(_MARKS[-1][1], 3) if _MARKS else None,
+        'stages': {stage: round(at, 3) for stage, at in _MARKS},
+    }
+    try:
+        path = os.path.join(BASE_DIR, log_dir, 'startup.jsonl')
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+    except OSError:
+        pass
@@ -0,0 +1,193 @@
+"""文本表格输出：xlsx / CSV（UTF-8、GBK）/ Parquet，统一入口 write_text_table。
+
+三种格式都单次遍历 rows 流式写出，内存与行数无关；所有值按文本输出：
+    xlsx     xlsx_writer，单元格为文本格式（@）
+    csv      所有字段（含表头）加引号，UTF-8 不带 BOM
+    csv_gbk  同上，GBK 编码；遇到 GBK 无法表示的字符时报错，不静默丢字
+    parquet  全部列为 string 类型，按 PARQUET_ROW_GROUP 行一个行组写出（需 pyarrow）
+空值（None / NaN / blank_values 中的文本）在各格式中都写为空字符串。
+
+xlsx 单表有行数上限：超过 settings.json 的 xlsx_max_rows（0 为 Excel 上限）时
+按 xlsx_rollover 滚动到新工作表（sheet）或新编号文件（file）。写出的各部分记入
+parts，describe_parts 据此列出每部分包含哪些源文件的哪些行；写出失败时
+remove_outputs 按 parts 删除已写出的各部分。
+"""
+import csv
+import importlib.util
+import os
+
+from xlsx_writer import write_text_xlsx
+
+
+# 格式名 → (扩展名, 界面显示名)
+OUTPUT_FORMATS = {
+    'xlsx': ('.xlsx', 'Excel（xlsx）'),
+    'csv': ('.csv', 'CSV（UTF-8）'),
+    'csv_gbk': ('.csv', 'CSV（GBK）'),
+    'parquet': ('.parquet', 'Parquet'),
+}
+CSV_ENCODINGS = {'csv': 'utf-8', 'csv_gbk': 'gbk'}
+CSV_BATCH_ROWS = 2000
+PARQUET_ROW_GROUP = 50000
+
+
+def format_available(fmt):
+    if fmt == 'parquet':
+        return importlib.util.find_spec('pyarrow') is not None
+    return fmt in OUTPUT_FORMATS
+
+
+def available_formats():
+    return [fmt for fmt in OUTPUT_FORMATS if format_available(fmt)]
+
+
+def format_extension(fmt):
+    return OUTPUT_FORMATS[fmt][0]
+
+
+def strip_output_extension(name):
+    """去掉文件名末尾已知的输出扩展名（OUTPUT_FORMATS 中的，不区分大小写）。
+
+    只认这几种扩展名：「2024.Q1」保持不变，「合并流水.xlsx」→「合并流水」。
+    """
+    for ext in {ext for ext, _ in OUTPUT_FORMATS.values()}:
+        if name.lower().endswith(ext) and len(name) > len(ext):
+            return name[:-len(ext)]
+    return name
+
+
+def format_label(fmt):
+    return OUTPUT_FORMATS[fmt][1]
+
+
+def format_from_label(label):
+    for fmt, (_, text) in OUTPUT_FORMATS.items():
+        if text == label:
+            return fmt
+    return 'xlsx'
+
+
+def _text(value, blank_values):
+    if value is None or (isinstance(value, float) and value != value):
+        return ''
+    text = value if isinstance(value, str) else str(value)
+    return '' if text in blank_values else text
+
+
+def write_text_csv(save_path, headers, rows, encoding='utf-8', blank_values=()):
+    """所有字段加引号的 CSV，返回写出的数据行数。"""
+    blank_values = frozenset(blank_values)
+    count = 0
+    with open(save_path, 'w', encoding=encoding, newline='') as f:
+        writer = csv.writer(f, quoting=csv.QUOTE_ALL)
+        writer.writerow([str(h) for h in headers])
+        batch = []
+        for values in rows:
+            batch.append([_text(v, blank_values) for v in values])
+            if len(batch) >= CSV_BATCH_ROWS:
+                writer.writerows(batch)
+                count += len(batch)
+                batch = []
+        writer.writerows(batch)
+        count += len(batch)
+    return count
+
+
+def write_text_parquet(save_path, headers, rows, fast=False, blank_values=()):
+    """全 string 列的 Parquet，按行组流式写出，返回写出的数据行数。
+
+    fast=True 时用 snappy 压缩（更快），否则用 zstd（更小）。
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    blank_values = frozenset(blank_values)
+    headers = [str(h) for h in headers]
+    schema = pa.schema([(h, pa.string()) for h in headers])
+
+    def flush(batch):
+        columns = [pa.array(col, type=pa.string()) for col in zip(*batch)]
+        writer.write_table(pa.Table.from_arrays(columns, schema=schema))
+
+    count = 0
+    with pq.ParquetWriter(save_path, schema,
+                          compression='snappy' if fast else 'zstd') as writer:
+        batch = []
+        for values in rows:
+            batch.append([_text(v, blank_values) for v in values])
+            if len(batch) >= PARQUET_ROW_GROUP:
+                flush(batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            flush(batch)
+            count += len(batch)
+    return count
+
+
+def write_text_table(save_path, headers, rows, fmt='xlsx', fast=False, blank_values=(),
+                     max_rows=None, rollover=None, parts=None):
+    """按 fmt 写出全文本表格，返回写出的数据行数。save_path 的扩展名由调用方决定。
+
+    max_rows / rollover 只对 xlsx 有效，缺省取 settings.json 的 xlsx_max_rows /
+    xlsx_rollover。parts 为 list 时依次追加 (路径, 工作表名, 行数)，非 xlsx 只有一部分。
+    """
+    if parts is None:
+        parts = []
+    if fmt == 'xlsx':
+        from app_settings import get_setting
+        return write_text_xlsx(save_path, headers, rows, fast=fast, blank_values=blank_values,
+                               max_rows=max_rows or get_setting('xlsx_max_rows'),
+                               rollover=rollover or get_setting('xlsx_rollover'),
+                               parts=parts)
+    if fmt in CSV_ENCODINGS:
+        count = write_text_csv(save_path, headers, rows, CSV_ENCODINGS[fmt], blank_values)
+    elif fmt == 'parquet':
+        if not format_available('parquet'):
+            raise RuntimeError('Parquet 输出需要安装 pyarrow：pip install pyarrow')
+        count = write_text_parquet(save_path, headers, rows, fast, blank_values)
+    else:
+        raise ValueError(f'未知输出格式: {fmt}')
+    parts.append((save_path, '', count))
+    return count
+
+
+def remove_outputs(save_path, parts):
+    """删除写出失败、取消或无数据时留下的文件：save_path 以及 parts 中记录的各部分。
+
+    不存在或删不掉（如被占用）的文件忽略。
+    """
+    for path in dict.fromkeys([save_path] + [path for path, _, _ in parts]):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def describe_parts(parts, sources):
+    """分部索引日志行：每部分的文件/工作表、行数，以及来自哪些源文件的哪几行。
+
+    sources: [(源文件名, 行数), ...]，顺序与写出顺序一致。只有一部分时返回 []。
+    """
+    if len(parts) <= 1:
+        return []
+    lines = []
+    source_iter = iter(sources)
+    current = next(source_iter, None)
+    used = 0  # current 已分配到前面各部分的行数
+    for number, (path, sheet, count) in enumerate(parts, 1):
+        where = os.path.basename(path) + (f' [{sheet}]' if sheet else '')
+        pieces = []
+        remaining = count
+        while remaining and current is not None:
+            name, total = current
+            take = min(total - used, remaining)
+            if take:
+                pieces.append(f'{name}（全部 {total} 行）' if take == total
+                              else f'{name}（第 {used + 1}-{used + take} 行）')
+            used += take
+            remaining -= take
+            if used >= total:
+                current, used = next(source_iter, None), 0
+        lines.append(f'  第 {number} 部分 {where}：{count} 行 ← ' + '、'.join(pieces))
+    return lines
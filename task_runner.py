@@ -0,0 +1,78 @@
+"""后台任务：转换放到工作线程执行，事件经队列回到 Tk 线程（after 轮询），支持取消。
+
+工作线程不能直接操作 Tk 控件，只能通过 task['emit'](kind, payload) 发事件：
+    'log'             日志文本（通用模板为 (文本, 级别)）
+    'banner'          提示条 (文本, 级别)
+    'file_finished'   批量银行转换中某个文件完成，失败原因在其 err 字段
+    'sheet_finished'  通用模板转换中某个工作表完成（或失败）
+    'detected'        按表头识别出某个文件的银行
+工作函数抛出的异常（含取消）不经事件，由 on_done 的 error 收到。
+取消通过 task['cancel']（threading.Event）通知；工作函数在阶段/块/文件之间调用
+check_cancel，已取消时抛出 TaskCancelled，当前阶段或块处理完即停止。
+"""
+import queue
+import threading
+
+
+POLL_MS = 100
+MAX_EVENTS_PER_POLL = 500  # 单次轮询最多处理的事件数，避免日志洪峰卡住界面
+
+
+class TaskCancelled(Exception):
+    """任务已被用户取消。"""
+
+
+def check_cancel(cancel):
+    """cancel 为 threading.Event（或 None）；已取消时抛出 TaskCancelled。"""
+    if cancel is not None and cancel.is_set():
+        raise TaskCancelled('已取消')
+
+
+def start_task(widget, work, on_event, on_done):
+    """在工作线程运行 work(task)，返回 task dict（cancel / emit）。
+
+    on_event(kind, payload) 和 on_done(result, error) 都在 Tk 线程中调用；
+    work 抛出异常时 error 为该异常（取消时为 TaskCancelled），否则为 None。
+    widget 被销毁后自动取消并停止轮询。
+    """
+    events = queue.Queue()
+    task = {
+        'cancel': threading.Event(),
+        'emit': lambda kind, payload=None: events.put((kind, payload)),
+    }
+
+    def run():
+        try:
+            result = work(task)
+        except Exception as e:
+            events.put(('_done', (None, e)))
+        else:
+            events.put(('_done', (result, None)))
+
+    def poll():
+        try:
+            exists = widget.winfo_exists()
+        except Exception:
+            exists = False
+        if not exists:
+            task['cancel'].set()
+            return
+        for _ in range(MAX_EVENTS_PER_POLL):
+            try:
+                kind, payload = events.get_nowait()
+            except queue.Empty:
+                break
+            if kind == '_done':
+                on_done(*payload)
+                return
+            on_event(kind, payload)
+        widget.after(POLL_MS, poll)
+
+    threading.Thread(target=run, daemon=True).start()
+    widget.after(POLL_MS, poll)
+    return task
+
+
+def cancel_task(task):
+    if task is not None:
+        task['cancel'].set()
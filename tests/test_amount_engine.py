@@ -0,0 +1,50 @@
+"""定点整数金额管线（amount_engine）与 parse_amount + _amount_to_str 逐值对照。"""
+import random
+
+import pandas as pd
+
+from amount_engine import amount_signs, format_amount_column, parse_amount_column
+from bank_converter import _amount_to_str, parse_amount
+
+
+EDGE_VALUES = [
+    '', '-', '--', 'nan', 'None', 'Infinity', '-0', '+0', '.5', '5.', '.', '-.5',
+    '0.00000', '-0.0000', '1.23456', '123456789012345', '12345678901234.9999',
+    '00001.1000000', '1e3', '1,2,3', '¥1,234.50', '￥-8.00', '１２３', '1 000.5',
+]
+
+
+def _sample_values():
+    rnd = random.Random(0)
+    alphabet = '0123456789.,-+ ¥￥eE_a０'
+    values = list(EDGE_VALUES)
+    values += [''.join(rnd.choice(alphabet) for _ in range(rnd.randint(1, 8)))
+               for _ in range(5000)]
+    values += [str(rnd.randint(-10**16, 10**16) / 10**rnd.randint(0, 6)) for _ in range(5000)]
+    return pd.Series([v.strip() for v in values], dtype=object)
+
+
+def _sign(value):
+    if value is None:
+        return 0
+    return -1 if value < 0 else (1 if value > 0 else 0)
+
+
+def test_format_matches_parse_amount():
+    text = _sample_values()
+    got = format_amount_column(parse_amount_column(text), text.index).tolist()
+    assert got == [_amount_to_str(parse_amount(v)) for v in text]
+
+
+def test_signs_and_negation_match_parse_amount():
+    text = [v for v in _sample_values() if parse_amount(v) is None
+            or parse_amount(v).is_finite()]
+    text = pd.Series(text, dtype=object)
+    amounts = parse_amount_column(text)
+    signs = amount_signs(amounts)
+    expected = [_sign(parse_amount(v)) for v in text]
+    assert list(signs) == expected
+
+    negated = format_amount_column(amounts, text.index, mask=signs < 0, negate=True).tolist()
+    assert negated == [_amount_to_str(-parse_amount(v)) if s == -1 else ''
+                       for v, s in zip(text, expected)]
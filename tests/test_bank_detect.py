@@ -0,0 +1,40 @@
+"""按表头签名识别银行（bank_detect）：每家银行的合成流水都能识别，无关或并列时不识别。"""
+import pytest
+from openpyxl import Workbook
+
+from bank_detect import DETECT_MIN_CONFIDENCE, build_header_index, detect_bank, score_header_rows
+from benchmarks.synthetic_statements import load_rules, make_statement
+
+
+RULES = load_rules()
+INDEX = build_header_index(RULES)
+
+
+@pytest.mark.parametrize('bank', list(RULES))
+def test_detects_each_bank(tmp_path, bank):
+    path = str(tmp_path / 'statement.xlsx')
+    make_statement(path, RULES[bank], 20, seed=1)
+    assert detect_bank(path, index=INDEX) == (bank, 1.0)
+
+
+def test_unrelated_file_is_not_detected(tmp_path):
+    wb = Workbook()
+    ws = wb.active
+    for _ in range(max(INDEX['rows'])):
+        ws.append(['编号', '名称', '数量', '备注'])
+    path = str(tmp_path / 'other.xlsx')
+    wb.save(path)
+    bank, confidence = detect_bank(path, RULES)
+    assert bank is None and confidence < DETECT_MIN_CONFIDENCE
+
+
+def test_tied_banks_are_not_detected():
+    bank = next(iter(RULES))
+    rules = {'甲': RULES[bank], '乙': RULES[bank]}
+    index = build_header_index(rules)
+    header_row = RULES[bank].get('header_row', 1)
+    rows = [[] for _ in range(header_row - 1)] + [sorted(c for _, c in index['columns'])]
+
+    ranked = score_header_rows(rows, index)
+    assert sorted(ranked) == [('乙', 0.5), ('甲', 0.5)]
+    assert all(score < DETECT_MIN_CONFIDENCE for _, score in ranked)
@@ -0,0 +1,16 @@
+"""列式引擎（bank_engine）与逐行引擎对照：每家银行的合成流水逐字段一致。"""
+import pytest
+
+from bank_engine import compare_engines
+from benchmarks.synthetic_statements import load_rules, make_statement
+
+
+RULES = load_rules()
+ROWS = 300
+
+
+@pytest.mark.parametrize('bank', list(RULES))
+def test_columnar_matches_row_engine(tmp_path, bank):
+    path = str(tmp_path / f'{bank}.xlsx')
+    make_statement(path, RULES[bank], ROWS, seed=7)
+    assert compare_engines(path, RULES[bank]) is None
@@ -0,0 +1,36 @@
+"""转换结果缓存：JSON 存取往返一致，旧版 pickle 文件不被读取，clear_cache 全部清空。"""
+import os
+import pickle
+import zlib
+
+import conversion_cache
+
+
+ROWS = [{'交易日期': '2024-01-02', '金额': '1,234.50', '摘要': '转账 "工资" <a&b>'},
+        {'交易日期': '', '金额': '-0.01', '摘要': '换行\n制表\t'}]
+
+
+def test_entry_round_trip(tmp_path):
+    directory = str(tmp_path)
+    conversion_cache.save_entry(directory, 'k', ROWS, 3, ['  日志一行'])
+    assert conversion_cache.load_entry(directory, 'k') == (ROWS, 3, ['  日志一行'])
+    assert conversion_cache.load_entry(directory, 'missing') is None
+
+
+def test_pickle_entry_is_not_loaded(tmp_path):
+    directory = str(tmp_path)
+    path = os.path.join(directory, 'k' + conversion_cache.CACHE_SUFFIX)
+    entry = {'columns': [], 'data': [], 'skipped': 0, 'logs': []}
+    with open(path, 'wb') as f:
+        f.write(zlib.compress(pickle.dumps(entry)))
+    assert conversion_cache.load_entry(directory, 'k') is None
+
+
+def test_clear_cache(tmp_path):
+    directory = str(tmp_path)
+    conversion_cache.save_entry(directory, 'a', ROWS, 0, [])
+    conversion_cache.save_entry(directory, 'b', ROWS, 0, [])
+    (tmp_path / ('old' + conversion_cache.LEGACY_SUFFIX)).write_bytes(b'x')
+    (tmp_path / 'keep.txt').write_text('x')
+    assert conversion_cache.clear_cache(directory) == 3
+    assert os.listdir(directory) == ['keep.txt']
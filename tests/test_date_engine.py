@@ -0,0 +1,71 @@
+"""整列日期转换（date_engine.convert_date_column）与逐值 strptime / strftime 对照。"""
+from datetime import datetime, timedelta
+import random
+
+import pandas as pd
+import pytest
+
+from date_engine import convert_date_column
+
+
+FORMATS = [
+    ('%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M:%S'),
+    ('%Y%m%d %H:%M:%S', '%Y-%m-%d %H:%M:%S'),
+    ('%Y%m%d %H%M%S', '%Y-%m-%d %H:%M:%S'),
+    ('%Y-%m-%d', '%Y-%m-%d'),
+    ('%Y%m%d', '%Y-%m-%d'),
+    ('%Y-%m-%d %H:%M', '%Y-%m-%d %H:%M:%S'),
+    ('%Y年%m月%d日', '%Y/%m/%d'),
+    ('%d/%m/%Y', '%Y%m%d'),
+    ('%y%m%d', '%Y-%m-%d'),
+    ('%Y/%m/%d %H:%M:%S', '%Y%m%d%H%M%S'),
+]
+
+
+def _reference(value, in_fmt, out_fmt):
+    if value == '':
+        return ''
+    try:
+        return datetime.strptime(value, in_fmt).strftime(out_fmt)
+    except ValueError:
+        return value
+
+
+def _sample_values(in_fmt, rnd, size=3000):
+    values = []
+    for _ in range(size):
+        moment = datetime(1500, 1, 1) + timedelta(seconds=rnd.randint(0, 3 * 10**10))
+        text = moment.strftime(in_fmt)
+        r = rnd.random()
+        if r < 0.05:
+            text = ''
+        elif r < 0.1:
+            text = 'garbage'
+        elif r < 0.15:
+            text = text.replace('-0', '-').replace(' 0', ' ')
+        elif r < 0.2:
+            text += 'x'
+        elif r < 0.25:
+            text = str(moment)
+        elif r < 0.27:
+            text = '0000-00-00 00:00:00'
+        elif r < 0.3:
+            text = '2024-02-30 10:00:00'
+        elif r < 0.32:
+            text = '9999-12-31 23:59:59'
+        values.append(text)
+    return values + values[:size // 2]  # 重复值走同一映射
+
+
+@pytest.mark.parametrize('in_fmt,out_fmt', FORMATS)
+def test_matches_strptime(in_fmt, out_fmt):
+    values = _sample_values(in_fmt, random.Random(in_fmt))
+    got = convert_date_column(pd.Series(values, dtype=object), in_fmt, out_fmt).tolist()
+    assert got == [_reference(v, in_fmt, out_fmt) for v in values]
+
+
+def test_fallback_used_for_unparsed_values():
+    values = pd.Series(['2024-01-02', 'bad', ''], dtype=object)
+    fallback = pd.Series([' 2024-01-02 ', ' bad ', ' '], dtype=object)
+    got = convert_date_column(values, '%Y-%m-%d', '%Y%m%d', fallback=fallback).tolist()
+    assert got == ['20240102', ' bad ', '']
@@ -0,0 +1,138 @@
+"""通用模板映射的整列实现与原逐行实现对照（随机数据，逐值一致）。"""
+from datetime import datetime, timedelta
+import random
+
+import pandas as pd
+
+from excel_converter import apply_date_formats, apply_split_info
+
+
+# ---------------- 原逐行实现（对照用） ----------------
+
+def reference_split_info(dataframe, adjusted_split_info):
+    if not adjusted_split_info:
+        return dataframe
+    new_rows = []
+    for _, row in dataframe.iterrows():
+        split_values_dict = {}
+        max_length = 1
+        for col_name, sym in adjusted_split_info.items():
+            if col_name in row.index:
+                if pd.notna(row[col_name]):
+                    values = str(row[col_name]).split(sym)
+                    values = [v.strip().strip(sym).strip() for v in values]
+                    values = [v for v in values if v]
+                    if values:
+                        split_values_dict[col_name] = values
+                        max_length = max(max_length, len(values))
+                    else:
+                        split_values_dict[col_name] = [str(row[col_name])]
+                else:
+                    split_values_dict[col_name] = ['']
+        if split_values_dict:
+            for i in range(max_length):
+                new_row = row.copy()
+                for col_name, values in split_values_dict.items():
+                    new_row[col_name] = values[i] if i < len(values) else ''
+                new_rows.append(new_row)
+        else:
+            new_rows.append(row)
+    return pd.DataFrame(new_rows)
+
+
+def _reference_strftime_format(fmt):
+    if not fmt:
+        return fmt
+    for old, new in [('yyyy', '%Y'), ('yy', '%y'), ('MM', '%m'), ('dd', '%d'),
+                     ('HH', '%H'), ('mm', '%M'), ('ss', '%S')]:
+        fmt = fmt.replace(old, new)
+    return fmt
+
+
+def reference_date_formats(dataframe, date_format_info):
+    for col, fmt_config in date_format_info.items():
+        if col in dataframe.columns:
+            input_fmt = _reference_strftime_format(fmt_config.get('input', ''))
+            output_fmt = _reference_strftime_format(fmt_config.get('output', ''))
+            if input_fmt and output_fmt:
+                def convert(val, input_fmt=input_fmt, output_fmt=output_fmt):
+                    if pd.isna(val) or str(val).strip() == '':
+                        return ''
+                    try:
+                        return datetime.strptime(str(val).strip(), input_fmt).strftime(output_fmt)
+                    except ValueError:
+                        return str(val)
+                dataframe[col] = dataframe[col].apply(convert)
+    return dataframe
+
+
+def _as_lists(df):
+    df = df.astype(object).where(df.notna(), None)
+    return list(df.columns), list(df.index), df.values.tolist()
+
+
+# ---------------- 拆分 ----------------
+
+SPLIT_TOKENS = ['a', 'b', ' c ', '', ';', '；', ' ', 'x;y', ';d;', 'e ; f', '  ;  ', ',g,', 'h,']
+SPLIT_INFOS = [{'A': ';'}, {'A': ';', 'B': ','}, {'B': ', '}, {'A': '；', 'Z': ';'}, {'Z': ';'}]
+
+
+def test_split_info_matches_row_implementation():
+    rnd = random.Random(1)
+
+    def cell():
+        if rnd.random() < 0.1:
+            return None
+        return ''.join(rnd.choice(SPLIT_TOKENS) for _ in range(rnd.randint(0, 4)))
+
+    for trial in range(300):
+        n = rnd.randint(1, 30)
+        df = pd.DataFrame({'A': [cell() for _ in range(n)], 'B': [cell() for _ in range(n)],
+                           'C': [f'c{i}' for i in range(n)]}, dtype=object)
+        if trial % 3 == 0:  # 重复的行索引
+            df.index = [rnd.randint(0, 5) for _ in range(n)]
+        info = rnd.choice(SPLIT_INFOS)
+        expected = reference_split_info(df.copy(), info)
+        assert _as_lists(apply_split_info(df.copy(), info)) == _as_lists(expected), info
+
+
+# ---------------- 日期格式 ----------------
+
+DATE_INFOS = [
+    {'input': 'yyyy/MM/dd HH:mm:ss', 'output': 'yyyy-MM-dd'},
+    {'input': 'yyyy/MM/dd HH:mm:ss', 'output': 'yyyyMMdd HHmmss'},
+    {'input': 'yyyy/MM/dd', 'output': 'yyyy-MM-dd'},
+    {'input': '', 'output': 'yyyy'},
+]
+
+
+def test_date_formats_match_row_implementation():
+    rnd = random.Random(2)
+
+    def cell():
+        r = rnd.random()
+        if r < 0.05:
+            return None
+        if r < 0.1:
+            return '  '
+        if r < 0.15:
+            return 'abc'
+        if r < 0.2:
+            return '2024/13/01 10:00:00'
+        moment = datetime(2020, 1, 1) + timedelta(seconds=rnd.randrange(10**8))
+        text = moment.strftime('%Y/%m/%d %H:%M:%S')
+        if r < 0.25:
+            return f' {text} '
+        if r < 0.3:
+            return f'{moment.year}/{moment.month}/{moment.day} {moment:%H:%M:%S}'
+        return text
+
+    for trial in range(100):
+        n = rnd.choice([0, 5, 50, 500])
+        df = pd.DataFrame({'D': [cell() for _ in range(n)], 'E': [cell() for _ in range(n)]},
+                          dtype=object)
+        if trial % 2:  # 拆分后的重复行索引
+            df.index = [i // 2 for i in range(n)]
+        info = {'D': rnd.choice(DATE_INFOS), 'E': rnd.choice(DATE_INFOS), 'Z': DATE_INFOS[0]}
+        expected = reference_date_formats(df.copy(), info)
+        assert _as_lists(apply_date_formats(df.copy(), info)) == _as_lists(expected), info
@@ -0,0 +1,25 @@
+"""可合并的日志模式：每个模式都能匹配转换实际输出的日志行。"""
+from bank_converter import convert_bank_rows
+from benchmarks.synthetic_statements import load_rules, make_statement
+from log_sink import GROUPABLE_PATTERNS, _group_key, _render_group
+
+
+def test_patterns_match_emitted_messages(tmp_path):
+    rules = load_rules()
+    bank = next(iter(rules))
+    path = str(tmp_path / f'{bank}.xlsx')
+    make_statement(path, rules[bank], 300, seed=3)
+    logs = []
+    convert_bank_rows(path, rules[bank], logs)
+
+    for pattern in GROUPABLE_PATTERNS:
+        assert any(pattern.search(line) for line in logs), pattern.pattern
+    skipped = [line for line in logs if '跳过第' in line]
+    assert skipped and all(_group_key(line) is not None for line in skipped)
+
+
+def test_render_group():
+    head, tail, row = _group_key('  跳过第 5 行：余额或交易日期为空')
+    assert _render_group((head, tail, row, row, 1, None)) == '  跳过第 5 行：余额或交易日期为空'
+    assert (_render_group((head, tail, 5, 9, 5, None))
+            == '  跳过第 5-9 行：余额或交易日期为空（5 条）')
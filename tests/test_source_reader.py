@@ -0,0 +1,94 @@
+"""读取后端对照：calamine 与 openpyxl 读出的单元格、数据表和银行转换结果逐值一致。"""
+from datetime import date, datetime, time
+
+import pandas as pd
+import pytest
+
+import source_reader
+from bank_converter import convert_bank_rows
+from benchmarks.synthetic_statements import load_rules, make_statement
+
+
+RULES = load_rules()
+ROWS = 300
+
+# 顶部账户信息 + 表头 + 各类单元格（日期、时间、浮点、整数、布尔、空、大数、无缓存值的公式）
+TYPED_ROWS = [
+    ['户名', '张三'],
+    ['账号', 6222020200112233],
+    [],
+    ['日期', '时间', '金额', '余额', '整数', '布尔', '文本', '空', '比例', '大数', '记账日'],
+    [datetime(2024, 1, 2, 3, 4, 5), time(12, 30), 1234.56, 0.1 + 0.2, 100, True,
+     ' 前后空格 ', None, 0.125, 6222020200112233445, date(2024, 5, 6)],
+    [datetime(2024, 1, 2), time(0, 0, 1), -0.01, 1e-7, 0, False, '001234', '', 1.0,
+     12345678901234567890, datetime(1900, 3, 1)],
+    ['2024-01-03', '12:00', '=C5+1', 3.0, -5, None, '1,234.50', None, 2.5, 1.5e20,
+     datetime(2024, 12, 31, 23, 59, 59, 999000)],
+]
+
+
+def _use_backend(monkeypatch, name):
+    monkeypatch.setattr(source_reader, 'get_setting', lambda key: name)
+
+
+def _strip_trailing(rows):
+    result = []
+    for row in rows:
+        row = list(row)
+        while row and row[-1] is None:
+            row.pop()
+        result.append(row)
+    return result
+
+
+@pytest.fixture
+def typed_book(tmp_path):
+    from openpyxl import Workbook
+
+    wb = Workbook()
+    ws = wb.active
+    for values in TYPED_ROWS:
+        ws.append(values)
+    ws['I5'].number_format = '0.00%'
+    ws['K5'].number_format = 'yyyy-mm-dd'
+    path = str(tmp_path / 'typed.xlsx')
+    wb.save(path)
+    return path
+
+
+def test_typed_cells_match(typed_book):
+    pytest.importorskip('python_calamine')
+    addresses = ('B1', 'B2', 'A4', 'Z99')
+    df_o, cells_o = source_reader.read_source(typed_book, 4, addresses, backend='openpyxl')
+    df_c, cells_c = source_reader.read_source(typed_book, 4, addresses, backend='calamine')
+    assert cells_c == cells_o
+    pd.testing.assert_frame_equal(df_c, df_o)
+
+
+@pytest.mark.parametrize('bank', list(RULES))
+def test_bank_statement_matches(tmp_path, monkeypatch, bank):
+    pytest.importorskip('python_calamine')
+    path = str(tmp_path / f'{bank}.xlsx')
+    make_statement(path, RULES[bank], ROWS, seed=11)
+
+    results = {}
+    for name in ('openpyxl', 'calamine'):
+        _use_backend(monkeypatch, name)
+        source = source_reader.open_source(path)
+        try:
+            assert source['backend'] == name
+            top = _strip_trailing(source_reader.read_top_rows(source, 12))
+        finally:
+            source_reader.close_source(source)
+        results[name] = (top, convert_bank_rows(path, RULES[bank], engine='columnar'))
+    assert results['calamine'] == results['openpyxl']
+
+
+def test_auto_picks_calamine_for_large_xlsx(typed_book, monkeypatch):
+    pytest.importorskip('python_calamine')
+    _use_backend(monkeypatch, 'auto')
+    assert source_reader.choose_backend(typed_book) == 'openpyxl'
+    monkeypatch.setattr(source_reader, 'CALAMINE_MIN_BYTES', 0)
+    assert source_reader.choose_backend(typed_book) == 'calamine'
+    assert source_reader.choose_backend(typed_book, streaming=True) == 'openpyxl'
+    assert source_reader.choose_backend(typed_book, preferred='openpyxl') == 'openpyxl'
@@ -0,0 +1,114 @@
+"""交易指纹查重（txn_index）与批量合并的重复交易清单（flag 模式）。"""
+import csv
+import shutil
+import threading
+
+import pytest
+
+import stage_metrics
+from bank_converter import BANK_TEMPLATE_HEADERS, _run_batch
+from benchmarks.synthetic_statements import load_rules, make_statement
+from txn_index import (
+    DUP_IN_BATCH, DUP_IN_HISTORY, check_rows, close_index, commit_index, open_index,
+    reset_index,
+)
+
+
+def _row(serial, amount):
+    return {'银行账号': '6222', '银行流水号': serial, '交易日期': '2024-01-02',
+            '借方金额': amount, '贷方金额': '', '交易后余额': '100.00'}
+
+
+def test_batch_duplicates():
+    index = open_index()
+    rows = [_row('A1', '1.00'), _row('A2', '2.00'), _row('A1', '1.00')]
+    assert check_rows(index, rows, 'a.xlsx') == (1, 0, ['', '', DUP_IN_BATCH])
+    assert check_rows(index, [_row('A2', '2.00'), _row('B1', '3.00')], 'b.xlsx') == (
+        1, 0, [DUP_IN_BATCH, ''])
+    assert index['conn'] is None and commit_index(index) == 0
+
+
+def test_history_per_source_file(tmp_path):
+    path = str(tmp_path / 'index.db')
+    rows = [_row('A1', '1.00'), _row('A2', '2.00')]
+
+    index = open_index(True, path)
+    assert check_rows(index, rows, 'a.xlsx', digest='aaa') == (0, 0, ['', ''])
+    assert commit_index(index) == 2
+    close_index(index)
+
+    # 同一源文件再次合并不算以往已导入，也不重复记录
+    index = open_index(True, path)
+    assert check_rows(index, rows, 'a.xlsx', digest='aaa') == (0, 0, ['', ''])
+    assert commit_index(index) == 0
+    close_index(index)
+
+    # 另一个文件含已导入的交易
+    index = open_index(True, path)
+    other = [_row('A2', '2.00'), _row('C1', '5.00')]
+    assert check_rows(index, other, 'c.xlsx', digest='ccc') == (0, 1, [DUP_IN_HISTORY, ''])
+    assert commit_index(index) == 1
+    close_index(index)
+
+    assert reset_index(path) == 3
+    index = open_index(True, path)
+    assert check_rows(index, other, 'c.xlsx', digest='ccc') == (0, 0, ['', ''])
+    close_index(index)
+    assert reset_index(str(tmp_path / 'missing.db')) == 0
+
+
+def _read_csv(path):
+    with open(path, encoding='utf-8', newline='') as f:
+        return list(csv.reader(f))
+
+
+def test_flag_mode_writes_duplicate_report(tmp_path, monkeypatch):
+    monkeypatch.setattr(stage_metrics, '_log_dir', lambda: None)
+    rules = load_rules()
+    bank = next(iter(rules))
+    first = str(tmp_path / 'a.xlsx')
+    make_statement(first, rules[bank], 200, seed=5)
+    second = str(tmp_path / 'b.xlsx')
+    shutil.copyfile(first, second)
+
+    items = [(0, 1, 'a.xlsx', bank, first, rules[bank]),
+             (1, 2, 'b.xlsx', bank, second, rules[bank])]
+    task = {'cancel': threading.Event(), 'emit': lambda kind, payload=None: None}
+    out_dir = tmp_path / 'out'
+    out_dir.mkdir()
+    result = _run_batch(task, items, str(out_dir), '合并', workers=1, dedup='flag',
+                        fmt='csv', dedup_history=False)
+
+    assert result['status'] == 'ok'
+    merged = _read_csv(result['save_path'])
+    half = result['rows'] // 2
+    assert merged[0] == BANK_TEMPLATE_HEADERS and len(merged) == result['rows'] + 1
+    assert result['duplicates'] == half
+
+    report = _read_csv(result['duplicates_path'])
+    assert result['duplicates_path'] == result['save_path'][:-len('.csv')] + '_重复交易.csv'
+    assert report[0] == ['重复类型', '来源文件', '合并结果行号'] + BANK_TEMPLATE_HEADERS
+    assert len(report) == half + 1
+    for number, line in enumerate(report[1:], half + 1):
+        assert line[:3] == [DUP_IN_BATCH, 'b.xlsx', str(number)]
+        assert line[3:] == merged[number]
+
+
+@pytest.mark.parametrize('mode', ['drop', 'off'])
+def test_other_modes_write_no_report(tmp_path, monkeypatch, mode):
+    monkeypatch.setattr(stage_metrics, '_log_dir', lambda: None)
+    rules = load_rules()
+    bank = next(iter(rules))
+    path = str(tmp_path / 'a.xlsx')
+    make_statement(path, rules[bank], 50, seed=5)
+
+    items = [(0, 1, 'a.xlsx', bank, path, rules[bank]),
+             (1, 2, 'a.xlsx', bank, path, rules[bank])]
+    task = {'cancel': threading.Event(), 'emit': lambda kind, payload=None: None}
+    result = _run_batch(task, items, str(tmp_path), '合并', workers=1, dedup=mode,
+                        fmt='csv', dedup_history=False)
+
+    assert result['duplicates_path'] == ''
+    assert len(_read_csv(result['save_path'])) == result['rows'] + 1
+    # 第二个文件与第一个相同：drop 剔除的行数等于保留的行数，off 不查重
+    assert result['duplicates'] == (result['rows'] if mode == 'drop' else 0)
@@ -0,0 +1,107 @@
+"""流式 xlsx 写出（xlsx_writer）：经 openpyxl 回读，取值与文本格式（@）逐格一致；
+超过行数上限时滚动到新工作表 / 新文件，分部索引和清理覆盖全部分部。"""
+import pytest
+from openpyxl import load_workbook
+
+from table_writer import describe_parts, remove_outputs
+from xlsx_writer import write_text_xlsx
+
+
+HEADERS = ['交易日期', '金额', '摘要']
+
+
+def _read_back(path, sheet=None):
+    wb = load_workbook(path)
+    ws = wb[sheet] if sheet else wb.worksheets[0]
+    rows = [[cell.value for cell in row] for row in ws.iter_rows()]
+    formats = {cell.number_format for row in ws.iter_rows(min_row=2) for cell in row}
+    names = wb.sheetnames
+    wb.close()
+    return rows, formats, names
+
+
+def test_values_and_text_format(tmp_path):
+    path = str(tmp_path / 'out.xlsx')
+    rows = [
+        ['20240102', '001234.50', '1e3'],
+        ['2024-01-03', '-0.01', '=SUM(A1:A2)'],
+        [None, float('nan'), '--'],
+    ]
+    assert write_text_xlsx(path, HEADERS, rows, blank_values=('--',)) == 3
+
+    values, formats, names = _read_back(path)
+    assert names == ['Sheet1']
+    assert values == [HEADERS,
+                      ['20240102', '001234.50', '1e3'],
+                      ['2024-01-03', '-0.01', '=SUM(A1:A2)'],
+                      [None, None, None]]
+    assert formats == {'@'}
+
+
+def test_xml_escaping(tmp_path):
+    path = str(tmp_path / 'out.xlsx')
+    rows = [
+        ['<a&b>', '"引号" \'单引号\'', '  前导空格'],
+        ['尾随空格  ', '控制\x01字符\x1f', '换行\n制表\t'],
+    ]
+    write_text_xlsx(path, HEADERS, rows)
+
+    values, _, _ = _read_back(path)
+    assert values[1:] == [
+        ['<a&b>', '"引号" \'单引号\'', '  前导空格'],
+        ['尾随空格  ', '控制字符', '换行\n制表\t'],
+    ]
+
+
+def _numbered_rows(count):
+    return ([f'2024{i:04d}', f'{i}.00', f'第 {i} 笔'] for i in range(1, count + 1))
+
+
+def test_rollover_to_sheets(tmp_path):
+    path = str(tmp_path / 'out.xlsx')
+    parts = []
+    assert write_text_xlsx(path, HEADERS, _numbered_rows(5), max_rows=2, parts=parts) == 5
+    assert parts == [(path, 'Sheet1', 2), (path, 'Sheet1_2', 2), (path, 'Sheet1_3', 1)]
+
+    _, _, names = _read_back(path)
+    assert names == ['Sheet1', 'Sheet1_2', 'Sheet1_3']
+    values, formats, _ = _read_back(path, 'Sheet1_3')
+    assert values == [HEADERS, ['20240005', '5.00', '第 5 笔']]
+    assert formats == {'@'}
+
+
+def test_rollover_to_files_never_overwrites(tmp_path):
+    path = str(tmp_path / 'out.xlsx')
+    existing = tmp_path / 'out_part2.xlsx'
+    existing.write_bytes(b'keep')
+    parts = []
+    write_text_xlsx(path, HEADERS, _numbered_rows(3), max_rows=2, rollover='file', parts=parts)
+
+    second = str(tmp_path / 'out_part2_1.xlsx')
+    assert parts == [(path, 'Sheet1', 2), (second, 'Sheet1', 1)]
+    assert existing.read_bytes() == b'keep'
+    values, _, _ = _read_back(second)
+    assert values == [HEADERS, ['20240003', '3.00', '第 3 笔']]
+
+
+def test_describe_and_remove_parts(tmp_path):
+    path = str(tmp_path / 'out.xlsx')
+    parts = []
+    write_text_xlsx(path, HEADERS, _numbered_rows(5), max_rows=2, rollover='file', parts=parts)
+
+    assert describe_parts(parts, [('a.xlsx', 3), ('b.xlsx', 2)]) == [
+        '  第 1 部分 out.xlsx [Sheet1]：2 行 ← a.xlsx（第 1-2 行）',
+        '  第 2 部分 out_part2.xlsx [Sheet1]：2 行 ← a.xlsx（第 3-3 行）、b.xlsx（第 1-1 行）',
+        '  第 3 部分 out_part3.xlsx [Sheet1]：1 行 ← b.xlsx（第 2-2 行）',
+    ]
+    assert describe_parts(parts[:1], [('a.xlsx', 2)]) == []
+
+    remove_outputs(path, parts)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_unknown_rollover_writes_nothing(tmp_path):
+    path = tmp_path / 'out.xlsx'
+    with pytest.raises(ValueError):
+        write_text_xlsx(str(path), HEADERS, _numbered_rows(1), rollover='book')
+    assert not path.exists()
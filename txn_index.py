@@ -0,0 +1,143 @@
+"""交易指纹索引：批量合并时识别重复交易（日期区间重叠的流水、以往已导入的交易）。
+
+指纹 = blake2b(银行账号, 银行流水号或交易流水号, 交易日期, 借方金额, 贷方金额,
+交易后余额)，16 字节。本批内用 set 判重。
+
+模式（dedup_mode）：off 不查重；flag 保留重复行，另写一份重复交易清单（见
+bank_converter）；drop 剔除重复行。默认只查本批内的重复。
+
+导入历史（dedup_history，默认关闭）：开启后跨批次的指纹存在 SQLite（settings.json 的
+dedup_index，主键 B 树、WITHOUT ROWID），按文件批量 IN 查询后逐行查 set，单行判重与
+索引规模基本无关。历史按源文件记录：每个源文件（按内容摘要）只在第一次合并写出成功后
+记入一次，同一文件再次合并时不会把自己的交易当作「以往已导入」；失败或取消的批次
+不影响索引。reset_index 清空导入历史。
+"""
+from datetime import datetime
+import hashlib
+import os
+import sqlite3
+
+
+DEDUP_MODES = ('off', 'flag', 'drop')
+DUP_IN_BATCH = '本批重复'
+DUP_IN_HISTORY = '以往已导入'
+FINGERPRINT_FIELDS = ('银行账号', '交易日期', '借方金额', '贷方金额', '交易后余额')
+SERIAL_FIELDS = ('银行流水号', '交易流水号')
+LOOKUP_BATCH = 500  # 单条 IN 查询的参数个数，低于 SQLite 默认上限 999
+
+
+def fingerprint(row):
+    serial = next((row.get(f) for f in SERIAL_FIELDS if row.get(f)), '')
+    parts = [row.get('银行账号', ''), serial] + [row.get(f, '') for f in FINGERPRINT_FIELDS[1:]]
+    return hashlib.blake2b('\x1f'.join(map(str, parts)).encode('utf-8'),
+                           digest_size=16).digest()
+
+
+def index_path():
+    from app_settings import BASE_DIR, get_setting
+    return os.path.join(BASE_DIR, get_setting('dedup_index'))
+
+
+def _connect(path=None):
+    conn = sqlite3.connect(path or index_path())
+    # source 为源文件内容摘要（见 conversion_cache.file_digest）
+    conn.execute('CREATE TABLE IF NOT EXISTS txn_fingerprint ('
+                 'fp BLOB PRIMARY KEY, first_seen TEXT, source TEXT) WITHOUT ROWID')
+    conn.execute('CREATE TABLE IF NOT EXISTS imported_file ('
+                 'digest TEXT PRIMARY KEY, name TEXT, imported TEXT) WITHOUT ROWID')
+    return conn
+
+
+def open_index(history=False, path=None):
+    """新建一批的查重状态，返回 index dict：conn / batch / new / files。
+
+    history=True 时打开（必要时创建）SQLite 导入历史，否则 conn 为 None，只查本批内重复。
+    """
+    return {'conn': _connect(path) if history else None,
+            'batch': set(), 'new': {}, 'files': {}}
+
+
+def close_index(index):
+    if index['conn'] is not None:
+        index['conn'].close()
+
+
+def _known(conn, fps):
+    """已导入的指纹 → 来源文件摘要。"""
+    known = {}
+    fps = list(fps)
+    for start in range(0, len(fps), LOOKUP_BATCH):
+        part = fps[start:start + LOOKUP_BATCH]
+        marks = ','.join('?' * len(part))
+        known.update(conn.execute(
+            f'SELECT fp, source FROM txn_fingerprint WHERE fp IN ({marks})', part))
+    return known
+
+
+def _file_imported(conn, digest):
+    return conn.execute('SELECT 1 FROM imported_file WHERE digest = ?',
+                        (digest,)).fetchone() is not None
+
+
+def check_rows(index, rows, source='', digest=None):
+    """逐行判重，返回 (本批内重复数, 以往已导入数, 每行的重复类型列表)。
+
+    重复类型为 DUP_IN_BATCH / DUP_IN_HISTORY，不重复为 ''。以往从同一源文件
+    （digest 相同）导入的交易不算重复。开启导入历史且该文件尚未记录过时，未重复的
+    行计入待写指纹，commit_index 时连同文件记录（source 为文件名）写入 SQLite。
+    """
+    fps = [fingerprint(row) for row in rows]
+    conn = index['conn']
+    known = _known(conn, set(fps)) if conn is not None else {}
+    record = conn is not None and digest is not None and not _file_imported(conn, digest)
+    if record:
+        index['files'][digest] = source
+    in_batch = in_history = 0
+    flags = []
+    for fp in fps:
+        if fp in known and known[fp] != digest:
+            in_history += 1
+            flags.append(DUP_IN_HISTORY)
+        elif fp in index['batch']:
+            in_batch += 1
+            flags.append(DUP_IN_BATCH)
+        else:
+            index['batch'].add(fp)
+            if record and fp not in known:
+                index['new'][fp] = digest
+            flags.append('')
+    return in_batch, in_history, flags
+
+
+def commit_index(index):
+    """把本批新记录的源文件及其指纹写入 SQLite，返回写入的指纹条数。"""
+    conn = index['conn']
+    if conn is None:
+        return 0
+    stamp = datetime.now().isoformat(timespec='seconds')
+    with conn:
+        conn.executemany(
+            'INSERT OR IGNORE INTO txn_fingerprint (fp, first_seen, source) VALUES (?, ?, ?)',
+            ((fp, stamp, digest) for fp, digest in index['new'].items()))
+        conn.executemany(
+            'INSERT OR IGNORE INTO imported_file (digest, name, imported) VALUES (?, ?, ?)',
+            ((digest, name, stamp) for digest, name in index['files'].items()))
+    count = len(index['new'])
+    index['new'] = {}
+    index['files'] = {}
+    return count
+
+
+def reset_index(path=None):
+    """清空导入历史，返回清除的指纹条数；索引文件不存在时返回 0。"""
+    path = path or index_path()
+    if not os.path.exists(path):
+        return 0
+    conn = _connect(path)
+    try:
+        with conn:
+            count = conn.execute('DELETE FROM txn_fingerprint').rowcount
+            conn.execute('DELETE FROM imported_file')
+    finally:
+        conn.close()
+    return count
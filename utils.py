@@ -1,8 +1,6 @@
-"""通用工具函数：窗口居中、跨平台打开目录等。"""
+"""通用工具函数：窗口居中、跨平台打开目录等。tkinter 只在创建控件的函数中导入。"""
 import os
 import sys
-import tkinter as tk
-from tkinter import ttk
 
 
 INVALID_FILENAME_CHARS = '<>:"/\\|?*'
@@ -41,14 +39,14 @@ def sanitize_filename_part(value):
     return filename or '未命名'
 
 
-def build_unique_save_path(directory, filename):
-    save_path = os.path.join(directory, f'{filename}.xlsx')
+def build_unique_save_path(directory, filename, ext='.xlsx'):
+    save_path = os.path.join(directory, f'{filename}{ext}')
     if not os.path.exists(save_path):
         return save_path
 
     index = 1
     while True:
-        save_path = os.path.join(directory, f'{filename}_{index}.xlsx')
+        save_path = os.path.join(directory, f'{filename}_{index}{ext}')
         if not os.path.exists(save_path):
             return save_path
         index += 1
@@ -60,6 +58,9 @@ def make_searchable_combobox(parent, values, **kwargs):
     返回 (combo, var) tuple。kwargs 透传给 ttk.Combobox。
     注意：不要传 state='readonly'，那样无法输入搜索文本。
     """
+    import tkinter as tk
+    from tkinter import ttk
+
     var = kwargs.pop('textvariable', None) or tk.StringVar()
     kwargs['textvariable'] = var
     kwargs.setdefault('values', list(values))
@@ -74,3 +75,22 @@ def make_searchable_combobox(parent, values, **kwargs):
 
     combo.bind('<KeyRelease>', on_keyrelease)
     return combo, var
+
+
+def make_output_format_combobox(parent, **kwargs):
+    """创建只读的输出格式下拉框（见 table_writer），初始值取 settings.json 的 output_format。
+
+    返回 (combo, get_format)：get_format() 返回当前选中的格式名。kwargs 透传给 ttk.Combobox。
+    """
+    import tkinter as tk
+    from tkinter import ttk
+
+    from app_settings import get_setting
+    from table_writer import available_formats, format_from_label, format_label
+
+    formats = available_formats()
+    initial = get_setting('output_format')
+    var = tk.StringVar(value=format_label(initial if initial in formats else 'xlsx'))
+    combo = ttk.Combobox(parent, textvariable=var, state='readonly',
+                         values=[format_label(f) for f in formats], **kwargs)
+    return combo, lambda: format_from_label(var.get())
@@ -0,0 +1,259 @@
+"""流式 xlsx 写出：单次遍历生成全文本格式（@）工作表，内存占用与行数无关。
+
+不经过 DataFrame.to_excel → load_workbook → 逐格设格式 → 再保存 的三遍流程，
+而是直接把 SpreadsheetML 逐批写进 zip 条目（与 xlsxwriter constant_memory
+模式相同，字符串用 inlineStr），因此无需额外依赖。
+
+数据行超过 max_rows（默认为 Excel 单表上限）时滚动到下一个工作表
+（rollover='sheet'）或下一个编号文件（rollover='file'），每部分都带表头。
+"""
+from itertools import chain, islice
+import os
+import re
+import zipfile
+from xml.sax.saxutils import escape
+
+
+# fast=True 时使用的 zip 压缩级别：文件稍大，写出更快
+FAST_COMPRESS_LEVEL = 1
+DEFAULT_COMPRESS_LEVEL = 6
+WRITE_BATCH_ROWS = 2000
+# Excel 单个工作表最多 1048576 行，扣除表头后的数据行上限
+EXCEL_MAX_DATA_ROWS = 1048576 - 1
+ROLLOVER_MODES = ('sheet', 'file')
+
+# XML 1.0 不允许的控制字符（openpyxl 遇到会直接报错，这里直接剔除）
+_ILLEGAL_XML_CHARS = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+_NS_MAIN = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+_NS_REL = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+_NS_PKG_REL = 'http://schemas.openxmlformats.org/package/2006/relationships'
+_XML_DECL = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+
+# cellXfs：0 默认，1 文本格式（numFmtId=49 即 '@'），2 表头（加粗 + 细边框 + 居中，同 pandas 默认表头）
+_TEXT_STYLE = 1
+_HEADER_STYLE = 2
+_STYLES_XML = (
+    _XML_DECL
+    + f'<styleSheet xmlns="{_NS_MAIN}">'
+    '<fonts count="2">'
+    '<font><sz val="11"/><name val="Calibri"/><family val="2"/></font>'
+    '<font><b/><sz val="11"/><name val="Calibri"/><family val="2"/></font>'
+    '</fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="2"><border><left/><right/><top/><bottom/><diagonal/></border>'
+    '<border><left style="thin"/><right style="thin"/><top style="thin"/>'
+    '<bottom style="thin"/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="3">'
+    '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="49" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="0" fontId="1" fillId="0" borderId="1" xfId="0" applyFont="1" '
+    'applyBorder="1" applyAlignment="1"><alignment horizontal="center" vertical="top"/></xf>'
+    '</cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+
+
+def column_letter(index):
+    """0 起始列号 → Excel 列字母（0 → A，26 → AA）。"""
+    letters = ''
+    index += 1
+    while index:
+        index, rem = divmod(index - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+def _cell_text(value, blank_values=()):
+    if value is None:
+        return ''
+    if isinstance(value, float) and value != value:
+        return ''
+    text = value if isinstance(value, str) else str(value)
+    if text in blank_values:
+        return ''
+    if _ILLEGAL_XML_CHARS.search(text):
+        text = _ILLEGAL_XML_CHARS.sub('', text)
+    return text
+
+
+def _row_xml(row_number, values, letters, style, blank_values=()):
+    parts = [f'<row r="{row_number}">']
+    for letter, value in zip(letters, values):
+        text = _cell_text(value, blank_values)
+        ref = f'{letter}{row_number}'
+        if not text:
+            parts.append(f'<c r="{ref}" s="{style}"/>')
+            continue
+        space = ' xml:space="preserve"' if text[0].isspace() or text[-1].isspace() else ''
+        parts.append(f'<c r="{ref}" s="{style}" t="inlineStr"><is><t{space}>'
+                     f'{escape(text)}</t></is></c>')
+    parts.append('</row>')
+    return ''.join(parts)
+
+
+def _write_sheet(archive, part_name, headers, rows, blank_values=()):
+    """把一个工作表流式写入 zip 条目，返回写出的数据行数。"""
+    letters = [column_letter(i) for i in range(len(headers))]
+    count = 0
+    with archive.open(part_name, 'w', force_zip64=True) as stream:
+        stream.write((_XML_DECL + f'<worksheet xmlns="{_NS_MAIN}"><sheetData>').encode('utf-8'))
+        stream.write(_row_xml(1, headers, letters, _HEADER_STYLE).encode('utf-8'))
+        batch = []
+        for values in rows:
+            count += 1
+            batch.append(_row_xml(count + 1, values, letters, _TEXT_STYLE, blank_values))
+            if len(batch) >= WRITE_BATCH_ROWS:
+                stream.write(''.join(batch).encode('utf-8'))
+                batch = []
+        if batch:
+            stream.write(''.join(batch).encode('utf-8'))
+        stream.write(b'</sheetData></worksheet>')
+    return count
+
+
+def _write_package_parts(archive, sheet_names):
+    sheet_overrides = ''.join(
+        f'<Override PartName="/xl/worksheets/sheet{i}.xml" ContentType="application/'
+        'vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        for i in range(1, len(sheet_names) + 1)
+    )
+    archive.writestr('[Content_Types].xml', (
+        _XML_DECL
+        + '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" ContentType="application/'
+        'vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/styles.xml" ContentType="application/'
+        'vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+        + sheet_overrides + '</Types>'
+    ))
+    archive.writestr('_rels/.rels', (
+        _XML_DECL + f'<Relationships xmlns="{_NS_PKG_REL}">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/'
+        '2006/relationships/officeDocument" Target="xl/workbook.xml"/></Relationships>'
+    ))
+    sheets = ''.join(
+        f'<sheet name="{escape(name, {chr(34): "&quot;"})}" sheetId="{i}" r:id="rId{i}"/>'
+        for i, name in enumerate(sheet_names, 1)
+    )
+    archive.writestr('xl/workbook.xml', (
+        _XML_DECL + f'<workbook xmlns="{_NS_MAIN}" xmlns:r="{_NS_REL}">'
+        f'<sheets>{sheets}</sheets></workbook>'
+    ))
+    rels = ''.join(
+        f'<Relationship Id="rId{i}" Type="http://schemas.openxmlformats.org/officeDocument/'
+        f'2006/relationships/worksheet" Target="worksheets/sheet{i}.xml"/>'
+        for i in range(1, len(sheet_names) + 1)
+    )
+    styles_id = len(sheet_names) + 1
+    archive.writestr('xl/_rels/workbook.xml.rels', (
+        _XML_DECL + f'<Relationships xmlns="{_NS_PKG_REL}">{rels}'
+        f'<Relationship Id="rId{styles_id}" Type="http://schemas.openxmlformats.org/'
+        'officeDocument/2006/relationships/styles" Target="styles.xml"/></Relationships>'
+    ))
+    archive.writestr('xl/styles.xml', _STYLES_XML)
+
+
+def _split_rows(rows, max_rows):
+    """把 rows 按 max_rows 行切成若干段（惰性），rows 为空时仍产出一个空段。"""
+    end = object()
+    it = iter(rows)
+    first = next(it, end)
+    if first is end:
+        yield iter(())
+        return
+    while first is not end:
+        yield chain([first], islice(it, max_rows - 1))
+        first = next(it, end)
+
+
+def part_path(save_path, number):
+    """第 number 个分卷文件路径：第 1 个即 save_path，之后为「文件名_part2.xlsx」等。
+
+    同名文件已存在时依次改用「文件名_part2_1.xlsx」「文件名_part2_2.xlsx」…，不覆盖。
+    """
+    if number == 1:
+        return save_path
+    stem, ext = os.path.splitext(save_path)
+    path = f'{stem}_part{number}{ext}'
+    index = 1
+    while os.path.exists(path):
+        path = f'{stem}_part{number}_{index}{ext}'
+        index += 1
+    return path
+
+
+def _remove_quietly(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def part_sheet_name(sheet_name, number):
+    return sheet_name if number == 1 else f'{sheet_name}_{number}'
+
+
+def write_text_xlsx(save_path, headers, rows, sheet_name='Sheet1', fast=False,
+                    blank_values=(), max_rows=None, rollover='sheet', parts=None):
+    """把 rows（按 headers 顺序的值序列，可为生成器）写成全文本格式 xlsx。
+
+    None / NaN 以及 blank_values 中的文本写为空单元格（同样带文本格式）。
+    fast=True 时降低 zip 压缩级别。返回写出的数据行数。
+    每部分最多 max_rows 行（缺省 EXCEL_MAX_DATA_ROWS），超出时按 rollover 滚动到
+    新工作表或新文件（见 part_path）；parts 为 list 时依次追加 (路径, 工作表名, 行数)。
+    rollover 不在 ROLLOVER_MODES 中时抛出 ValueError。写到一半出错（含取消）时删除
+    正在写的那个文件后再抛出，已写完的各部分仍在 parts 中，由调用方清理。
+    """
+    if rollover not in ROLLOVER_MODES:
+        raise ValueError(f'未知的 xlsx 滚动方式: {rollover!r}'
+                         f'（可选 {" / ".join(ROLLOVER_MODES)}）')
+    level = FAST_COMPRESS_LEVEL if fast else DEFAULT_COMPRESS_LEVEL
+    max_rows = min(max_rows or EXCEL_MAX_DATA_ROWS, EXCEL_MAX_DATA_ROWS)
+    headers = list(headers)
+    blank_values = frozenset(blank_values)
+    if parts is None:
+        parts = []
+
+    def open_archive(path):
+        return zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED,
+                               allowZip64=True, compresslevel=level)
+
+    total = 0
+    segments = _split_rows(rows, max_rows)
+    if rollover == 'file':
+        for number, segment in enumerate(segments, 1):
+            path = part_path(save_path, number)
+            archive = open_archive(path)
+            try:
+                with archive:
+                    count = _write_sheet(archive, 'xl/worksheets/sheet1.xml', headers,
+                                         segment, blank_values)
+                    _write_package_parts(archive, [sheet_name])
+            except BaseException:
+                _remove_quietly(path)
+                raise
+            parts.append((path, sheet_name, count))
+            total += count
+        return total
+
+    archive = open_archive(save_path)
+    try:
+        with archive:
+            names = []
+            for number, segment in enumerate(segments, 1):
+                names.append(part_sheet_name(sheet_name, number))
+                count = _write_sheet(archive, f'xl/worksheets/sheet{number}.xml', headers,
+                                     segment, blank_values)
+                parts.append((save_path, names[-1], count))
+                total += count
+            _write_package_parts(archive, names)
+    except BaseException:
+        _remove_quietly(save_path)
+        raise
+    return total